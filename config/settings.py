@@ -55,6 +55,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # 開發時每個 view 的查詢數 / N+1 檢查 (QUERY_BUDGET_ENABLED 預設跟著 DEBUG)
+    'core.query_budget.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -75,6 +77,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.page_cache.cache_versions',
             ],
         },
     },
@@ -126,6 +129,38 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# === 本機語意搜尋索引 (python manage.py rebuild_semantic_index 產生) ===
+SEMANTIC_INDEX_DIR = BASE_DIR / 'semantic_index'
+
+# === 快取 (各程序共用) ===
+# 整頁快取、工具比對器 / 搜尋建議的版本號都靠快取在 web worker、cron (refresh_trending)、
+# run_writer_jobs 之間傳遞失效通知，不能用 Django 預設的 LocMemCache (每個程序各一份)。
+# 有 REDIS_URL 就用 Redis (多台主機時必須)；否則用本機檔案快取 (同一台主機上的程序共用)。
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_DIR', '/var/tmp/ai_navigator_cache'),
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+# 詳情頁瀏覽次數的緩衝檔 (每個程序附加寫入，背景執行緒定時寫回資料庫；見 core/view_counter.py)
+VIEW_BUFFER_DIR = Path(os.getenv('VIEW_BUFFER_DIR', '/var/tmp/ai_navigator_views'))
+
+# 測試期間改用 LocMem 與暫存的 SEMANTIC_INDEX_DIR / VIEW_BUFFER_DIR，不動到上面真正的快取與檔案 (見 core/test_runner.py)
+TEST_RUNNER = 'core.test_runner.IsolatedTestRunner'
+
+# === 公開頁面的靜態輸出 (python manage.py export_static 產生，給 nginx / CDN 服務未登入讀者) ===
+STATIC_EXPORT_DIR = BASE_DIR / 'static_export'
+
 
 # === Login / Logout Redirects ===
 LOGIN_URL = 'login' 
@@ -137,6 +172,13 @@ LOGOUT_REDIRECT_URL = 'home'
 # ⭐ 安全修正 3：從環境變數讀取 AI Key，不再直接顯示於程式碼中
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
+# 自訂 API 端點 (留空 = Google 正式環境)；壓測時指向本機假伺服器，例如 http://127.0.0.1:8765
+GEMINI_API_ENDPOINT = os.getenv('GEMINI_API_ENDPOINT', '')
+
+# === Gemini 併發上限 (批次逆向工程) ===
+# 同時送出的視覺分析請求數量，請依 API 配額 (RPM) 調整，避免整批撞上 429
+GEMINI_VISION_CONCURRENCY = int(os.getenv('GEMINI_VISION_CONCURRENCY', '4'))
+
 # 安全檢查：啟動時檢查是否成功讀取
 if not GEMINI_API_KEY:
     print("⚠️  警告：找不到 GEMINI_API_KEY！請檢查您的 .env 檔案設定。")
@@ -15,7 +15,8 @@ from tutorials.views import (
     add_article_comment, 
     article_favorite,
     article_like,
-    image_analysis  # <--- ✅ 新增這裡：引入 image_analysis
+    image_analysis,  # <--- ✅ 新增這裡：引入 image_analysis
+    image_analysis_detail,
 )
 
 # 3. 引入 Tools views
@@ -35,6 +36,7 @@ urlpatterns = [
 
     # --- 搜尋 ---
     path('search/', views.search, name='search'),
+    path('search/suggest/', views.search_suggest, name='search_suggest'),
 
     # --- 首頁與戰情室 ---
     path('', home, name='home'),
@@ -59,6 +61,7 @@ urlpatterns = [
     # --- 🧪 實驗室 ---
     # 👇 ✅ 新增這裡：註冊路徑
     path('lab/image-analysis/', image_analysis, name='image_analysis'),
+    path('lab/image-analysis/<int:pk>/', image_analysis_detail, name='image_analysis_detail'),
     
     # (Labs app 的路徑保留)
     path('labs/', include('labs.urls')), 
@@ -1,7 +1,101 @@
+from datetime import timedelta
+
 from django.contrib import admin
-from .models import UserProfile
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+
+from .llm_ledger import percentile
+from .models import UserProfile, LLMCall
 
 # 讓後台可以管理 UserProfile
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
-    list_display = ('user', 'avatar')
\ No newline at end of file
+    list_display = ('user', 'avatar')
+
+
+# 👇 LLM 呼叫帳本 (唯讀) + 統計儀表板
+@admin.register(LLMCall)
+class LLMCallAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'source', 'model_name', 'attempt', 'success', 'status_code', 'latency_ms', 'total_tokens')
+    list_filter = ('success', 'source', 'model_name', 'status_code')
+    search_fields = ('call_id', 'error')
+    date_hierarchy = 'created_at'
+    list_per_page = 50
+    change_list_template = 'admin/core/llmcall/change_list.html'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        custom = [
+            path('dashboard/', self.admin_site.admin_view(self.dashboard_view), name='core_llmcall_dashboard'),
+        ]
+        return custom + super().get_urls()
+
+    def dashboard_view(self, request):
+        try:
+            days = max(1, min(int(request.GET.get('days', 7)), 90))
+        except ValueError:
+            days = 7
+        since = timezone.now() - timedelta(days=days)
+        calls = LLMCall.objects.filter(created_at__gte=since)
+
+        # 1. 各模型：呼叫數、錯誤率、成功呼叫的延遲百分位數
+        latencies = {}
+        for model_name, latency in calls.filter(success=True).order_by('latency_ms').values_list('model_name', 'latency_ms'):
+            latencies.setdefault(model_name, []).append(latency)
+
+        per_model = []
+        for row in calls.values('model_name').annotate(
+            total=Count('id'),
+            errors=Count('id', filter=Q(success=False)),
+            rate_limited=Count('id', filter=Q(status_code=429)),
+            not_found=Count('id', filter=Q(status_code=404)),
+            tokens=Sum('total_tokens'),
+        ).order_by('-total'):
+            values = latencies.get(row['model_name'], [])
+            row.update({
+                'error_rate': row['errors'] * 100 / row['total'],
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'p99': percentile(values, 99),
+            })
+            per_model.append(row)
+
+        # 2. 各來源：請求數、靠備援才成功的比例、全軍覆沒次數
+        per_source = []
+        for row in calls.values('source').annotate(
+            requests=Count('call_id', distinct=True),
+            attempts=Count('id'),
+            served=Count('id', filter=Q(success=True)),
+            fallback_served=Count('id', filter=Q(success=True, attempt__gt=1)),
+        ).order_by('-requests'):
+            row['exhausted'] = row['requests'] - row['served']
+            row['fallback_rate'] = row['fallback_served'] * 100 / row['requests'] if row['requests'] else 0
+            row['avg_attempts'] = row['attempts'] / row['requests'] if row['requests'] else 0
+            per_source.append(row)
+
+        # 3. 每日 Token 花費
+        daily_tokens = calls.annotate(day=TruncDate('created_at')).values('day', 'model_name').annotate(
+            calls=Count('id'),
+            prompt_tokens=Sum('prompt_tokens'),
+            output_tokens=Sum('output_tokens'),
+            total_tokens=Sum('total_tokens'),
+        ).order_by('-day', '-total_tokens')
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'LLM 呼叫儀表板',
+            'days': days,
+            'per_model': per_model,
+            'per_source': per_source,
+            'daily_tokens': daily_tokens,
+        }
+        return TemplateResponse(request, 'admin/core/llmcall/dashboard.html', context)
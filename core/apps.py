@@ -3,3 +3,20 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        # 工具 / 文章 / 實驗室專案存檔時同步更新全文檢索索引與自動完成索引
+        from . import content_meta, counters, page_cache, recommend, search, semantic, suggest, trending
+        search.connect_signals()
+        semantic.connect_signals()
+        suggest.connect_signals()
+        # 收藏 / 按讚異動時增量更新共同收藏矩陣
+        recommend.connect_signals()
+        # 新增收藏時累加每日活動量 (熱門排行)
+        trending.connect_signals()
+        # 收藏 / 按讚人數的反正規化計數
+        counters.connect_signals()
+        # 公開列表頁的整頁 / 片段快取
+        page_cache.connect_signals()
+        # 文章 / 專案存檔時算好摘錄、閱讀時間與目錄
+        content_meta.connect_signals()
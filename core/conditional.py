@@ -0,0 +1,88 @@
+"""
+詳情頁的 conditional GET (ETag / Last-Modified → 304 Not Modified)
+
+文章、工具、實驗室專案的詳情頁原本每次都回完整的 200，回訪的讀者與爬蟲每次都重新下載整頁。
+@conditional_detail(kind, validators) 先用幾個很便宜的查詢算出這一頁的「版本」：
+- 該筆資料的 updated_at (auto_now)；瀏覽數、收藏 / 按讚數、熱門分數都是 update() 寫入，不會動到它
+- 頁面上顯示的關聯資料 (留言、相關文章、實驗室作品…) 的筆數與最新時間
+- 模板內容的雜湊 (部署新模板後 ETag 全部換新)
+- 已登入時再加上使用者 (與登入時間、按讚 / 收藏狀態)，頁面上的 csrf token 與按鈕狀態才不會錯
+瀏覽器帶來的 If-None-Match / If-Modified-Since 對得上就直接回 304，不再跑 view 與模板；
+304 仍然算一次瀏覽。頁面上的瀏覽數等計數不算版本，304 時讀者看到的是上次的數字。
+"""
+import functools
+import hashlib
+import json
+from pathlib import Path
+
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.template import engines
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers, quote_etag
+from django.utils.http import http_date
+
+from . import view_counter
+
+
+@functools.cache
+def template_version():
+    """所有模板內容的雜湊 (每個程序只算一次)"""
+    digest = hashlib.md5()
+    for engine in engines.all():
+        for directory in getattr(engine, 'template_dirs', ()):
+            for path in sorted(Path(directory).rglob('*.html')):
+                digest.update(str(path.relative_to(directory)).encode('utf-8'))
+                digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def versions(queryset, field):
+    """(筆數, 最新時間)：子資料新增 / 刪除 / 修改時都會改變"""
+    row = queryset.aggregate(n=Count('pk'), last=Max(field))
+    return row['n'], row['last']
+
+
+def latest(*values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def conditional_detail(kind, validators):
+    """validators(request, *args, **kwargs) 回傳 (pk, 版本資料, 最後修改時間)；找不到資料時回傳 None，交給 view 處理 404"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            # 有待顯示的訊息 (例如剛留言) 的頁面一定要重新渲染
+            if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+                return view(request, *args, **kwargs)
+            found = validators(request, *args, **kwargs)
+            if found is None:
+                return view(request, *args, **kwargs)
+
+            pk, parts, last_modified = found
+            user = request.user
+            if user.is_authenticated:
+                parts = [parts, user.pk, user.last_login]
+            raw = json.dumps([template_version(), parts], default=str, sort_keys=True)
+            etag = quote_etag(hashlib.md5(raw.encode('utf-8')).hexdigest())
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            elif response.status_code == 304:
+                view_counter.record_view(kind, pk)
+
+            # 304 也要帶 ETag / Last-Modified，瀏覽器才會沿用 (和 Django 的 @condition 一樣)
+            response.headers.setdefault('ETag', etag)
+            if timestamp is not None:
+                response.headers.setdefault('Last-Modified', http_date(timestamp))
+
+            # 每次都回來驗證 (304 很便宜)；登入後的頁面不給共用快取存
+            patch_cache_control(response, no_cache=True, **({'private': True} if user.is_authenticated else {}))
+            patch_vary_headers(response, ['Cookie'])
+            return response
+        return wrapper
+    return decorator
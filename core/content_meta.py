@@ -0,0 +1,121 @@
+"""
+文章 / 實驗室專案的衍生欄位：純文字摘錄、字數、閱讀時間、標題目錄 (TOC)
+
+列表頁原本對每篇文章的整份 HTML 做 striptags|truncatechars，AI 生成的文章又長，
+一頁要載入好幾 MB 用不到的 HTML。改成存檔時 (pre_save) 算好存進欄位，
+列表查詢就能 defer('content')，完全不讀內文。
+舊資料用 python manage.py backfill_content_meta 補算。
+"""
+import math
+import re
+from html.parser import HTMLParser
+
+from django.apps import apps
+from django.db.models.signals import post_save, pre_save
+from django.utils.html import strip_tags
+
+EXCERPT_CHARS = 300
+CJK_PER_MINUTE = 400  # 中文每分鐘約讀幾個字
+WORDS_PER_MINUTE = 200  # 英文每分鐘約讀幾個字
+TOC_LEVELS = ('h2', 'h3')
+META_FIELDS = ['excerpt', 'word_count', 'reading_minutes', 'toc']
+# (model, 內文欄位)
+SOURCES = [
+    ('tutorials.Article', 'content'),
+    ('labs.LabProject', 'content'),
+]
+
+_CJK_RE = re.compile(r'[㐀-鿿豈-﫿]')
+_WORD_RE = re.compile(r'[A-Za-z0-9]+(?:[\'’.-][A-Za-z0-9]+)*')
+
+
+class _HeadingParser(HTMLParser):
+    """依出現順序收集 h2 / h3 的文字 (與文章頁 JS 幫標題加 id 的順序相同)"""
+
+    def __init__(self):
+        super().__init__()
+        self.headings = []
+        self._current = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in TOC_LEVELS:
+            self._current = (tag, [])
+
+    def handle_endtag(self, tag):
+        if self._current and tag == self._current[0]:
+            text = ' '.join(''.join(self._current[1]).split())
+            self.headings.append({'level': int(tag[1]), 'text': text, 'anchor': f"header-{len(self.headings)}"})
+            self._current = None
+
+    def handle_data(self, data):
+        if self._current:
+            self._current[1].append(data)
+
+
+def table_of_contents(html):
+    parser = _HeadingParser()
+    parser.feed(html or '')
+    parser.close()
+    return parser.headings
+
+
+def derive(html):
+    """回傳 {excerpt, word_count, reading_minutes, toc}"""
+    text = ' '.join(strip_tags(html or '').split())
+    cjk = len(_CJK_RE.findall(text))
+    words = len(_WORD_RE.findall(text))
+    minutes = math.ceil(cjk / CJK_PER_MINUTE + words / WORDS_PER_MINUTE) if text else 0
+    return {
+        'excerpt': text[:EXCERPT_CHARS],
+        'word_count': cjk + words,
+        'reading_minutes': max(minutes, 1) if text else 0,
+        'toc': table_of_contents(html),
+    }
+
+
+def apply(obj, field='content'):
+    for name, value in derive(getattr(obj, field)).items():
+        setattr(obj, name, value)
+
+
+def backfill(batch_size=200):
+    """重算所有文章 / 專案的衍生欄位，回傳更新筆數"""
+    updated = 0
+    for label, field in SOURCES:
+        model = apps.get_model(label)
+        batch = []
+        for obj in model.objects.only('pk', field).iterator(chunk_size=batch_size):
+            apply(obj, field)
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                model.objects.bulk_update(batch, META_FIELDS)
+                updated += len(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, META_FIELDS)
+            updated += len(batch)
+    return updated
+
+
+# --- 🔄 存檔時重算 ---
+def _on_pre_save(field):
+    def receiver(sender, instance, update_fields=None, raw=False, **kwargs):
+        if raw or (update_fields is not None and field not in update_fields):
+            return
+        apply(instance, field)
+    return receiver
+
+
+def _on_post_save(field):
+    def receiver(sender, instance, update_fields=None, raw=False, **kwargs):
+        # save(update_fields=[..., 'content']) 不會寫入 pre_save 算好的欄位，這裡補寫
+        if raw or update_fields is None or field not in update_fields or set(META_FIELDS) <= set(update_fields):
+            return
+        sender.objects.filter(pk=instance.pk).update(**{name: getattr(instance, name) for name in META_FIELDS})
+    return receiver
+
+
+def connect_signals():
+    for label, field in SOURCES:
+        pre_save.connect(_on_pre_save(field), sender=label, weak=False, dispatch_uid=f'content_meta_pre_{label}')
+        post_save.connect(_on_post_save(field), sender=label, weak=False, dispatch_uid=f'content_meta_post_{label}')
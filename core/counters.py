@@ -0,0 +1,95 @@
+"""
+收藏 / 按讚的反正規化計數 (Tool.favorite_count、Article.favorite_count / like_count)
+
+頁面與排序直接讀欄位，不必每次 COUNT 整張關聯表。
+計數由 m2m_changed 以 F() 原子加減維護，所以不論是切換按鈕、後台或
+反向的 user.saved_tools.add(tool) 都會同步；remove() / clear() 之前先記下
+「真的有的」關聯，避免 remove 了本來就沒有的關聯時被扣成負數。
+計數不準時 (例如直接改資料庫) 可用 python manage.py backfill_counters 重算。
+"""
+from django.apps import apps
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed
+
+# (model, M2M 欄位, 計數欄位)
+COUNTERS = [
+    ('tools.Tool', 'favorites', 'favorite_count'),
+    ('tutorials.Article', 'favorites', 'favorite_count'),
+    ('tutorials.Article', 'likes', 'like_count'),
+]
+
+
+def through(label, field):
+    return getattr(apps.get_model(label), field).through
+
+
+def has_link(label, field, obj_id, user_id):
+    """走關聯表 (obj, user) 的唯一索引，不必載入所有收藏者"""
+    column = f"{apps.get_model(label)._meta.model_name}_id"
+    return through(label, field).objects.filter(**{column: obj_id, 'user_id': user_id}).exists()
+
+
+def toggle(obj, field, user):
+    """切換 user 對 obj 的收藏 / 按讚，回傳 (切換後是否有, 最新計數)"""
+    label = obj._meta.label
+    counter = next(c for l, f, c in COUNTERS if l == label and f == field)
+    manager = getattr(obj, field)
+    if has_link(label, field, obj.pk, user.pk):
+        manager.remove(user)
+        active = False
+    else:
+        manager.add(user)
+        active = True
+    count = type(obj).objects.filter(pk=obj.pk).values_list(counter, flat=True).first() or 0
+    setattr(obj, counter, count)
+    return active, count
+
+
+def backfill(batch_size=500):
+    """依關聯表重算所有計數欄位，回傳更新的列數"""
+    updated = 0
+    for label, field, counter in COUNTERS:
+        model = apps.get_model(label)
+        column = f"{model._meta.model_name}_id"
+        counts = (
+            through(label, field).objects.filter(**{column: OuterRef('pk')})
+            .values(column).annotate(total=Count('pk')).values('total')
+        )
+        updated += model.objects.update(**{counter: Coalesce(Subquery(counts), 0)})
+    return updated
+
+
+# --- 🔄 收藏 / 按讚異動 ---
+def _on_m2m_changed(label, field, counter):
+    def receiver(sender, instance, action, reverse, model, pk_set, **kwargs):
+        stash_attr = f'_counter_removed_{field}'
+        target = apps.get_model(label)
+        manager = getattr(instance, field if not reverse else target._meta.get_field(field).remote_field.related_name)
+        if action in ('pre_clear', 'pre_remove'):
+            existing = manager.all() if action == 'pre_clear' else manager.filter(pk__in=pk_set)
+            setattr(instance, stash_attr, set(existing.values_list('pk', flat=True)))
+            return
+        if action == 'post_add':
+            changed, delta = pk_set or set(), 1
+        elif action in ('post_remove', 'post_clear'):
+            changed, delta = getattr(instance, stash_attr, set()), -1
+        else:
+            return
+        if not changed:
+            return
+        if reverse:
+            # instance 是 User：每個工具 / 文章各 ±1
+            target.objects.filter(pk__in=changed).update(**{counter: F(counter) + delta})
+        else:
+            target.objects.filter(pk=instance.pk).update(**{counter: F(counter) + delta * len(changed)})
+    return receiver
+
+
+def connect_signals():
+    for label, field, counter in COUNTERS:
+        m2m_changed.connect(
+            _on_m2m_changed(label, field, counter),
+            sender=through(label, field), weak=False,
+            dispatch_uid=f'counter_{label}_{field}',
+        )
@@ -0,0 +1,301 @@
+"""
+本機 Gemini 替身伺服器 (Generative Language API v1beta 子集)
+
+支援：
+- GET  /v1beta/models                              (check_models)
+- GET  /v1beta/models/<model>
+- POST /v1beta/models/<model>:generateContent       (SDK / ai_writer)
+- POST /v1beta/models/<model>:streamGenerateContent (?alt=sse 或 JSON 陣列)
+
+可設定延遲分布、404 (模型不存在) 與 429 (配額用盡) 注入，用來離線壓測與驗證備援邏輯。
+帶 responseSchema 的請求一律回傳符合結構的 JSON；沒帶 schema、只在 prompt 裡要 JSON 的請求，
+可用 malformed_rate 模擬真實模型常見的壞格式 (Markdown 圍欄、前後廢話、被截斷)。
+"""
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# 專案程式碼中出現過的所有模型名稱 (預設全部「存在」)
+FAKE_MODELS = [
+    "gemini-2.0-flash",
+    "gemini-2.0-flash-001",
+    "gemini-2.0-flash-exp",
+    "gemini-2.0-flash-lite-preview",
+    "gemini-2.0-flash-lite-preview-02-05",
+    "gemini-2.5-flash",
+    "gemini-2.5-flash-lite-preview-09-2025",
+    "gemini-2.5-pro",
+    "gemini-flash-latest",
+    "gemini-flash-lite-latest",
+    "gemini-3-flash-preview",
+]
+
+MODEL_PATH_RE = re.compile(r"^/v1beta/models/(?P<model>[^/:]+)(?::(?P<method>\w+))?$")
+
+
+class LatencyModel:
+    """
+    延遲分布 (單位：毫秒)，格式：
+    fixed:200 / uniform:100,400 / normal:300,80 / lognormal:300,0.5 (中位數, sigma)
+    """
+    def __init__(self, spec="fixed:0", rng=None):
+        self.spec = spec
+        self.rng = rng or random.Random()
+        kind, _, params = spec.partition(':')
+        self.kind = kind.strip().lower()
+        self.params = [float(p) for p in params.split(',') if p.strip()]
+        if self.kind not in ('fixed', 'uniform', 'normal', 'lognormal'):
+            raise ValueError(f"不支援的延遲分布：{spec}")
+
+    def sample(self):
+        """回傳秒數"""
+        p = self.params
+        if self.kind == 'fixed':
+            ms = p[0] if p else 0
+        elif self.kind == 'uniform':
+            ms = self.rng.uniform(p[0], p[1])
+        elif self.kind == 'normal':
+            ms = self.rng.gauss(p[0], p[1])
+        else:
+            ms = self.rng.lognormvariate(math.log(max(p[0], 1e-3)), p[1])
+        return max(ms, 0) / 1000.0
+
+
+class FakeGemini:
+    """替身伺服器的設定與統計 (跨執行緒共用)"""
+
+    def __init__(self, latency="fixed:0", error_429_rate=0.0, missing_models=(), models=None,
+                 stream_chunks=4, chunk_delay_ms=50, reply_chars=1200, malformed_rate=0.0, seed=None):
+        self.rng = random.Random(seed)
+        self.latency = LatencyModel(latency, self.rng)
+        self.error_429_rate = error_429_rate
+        self.missing_models = set(missing_models)
+        self.models = [m for m in (models or FAKE_MODELS) if m not in self.missing_models]
+        self.stream_chunks = max(1, stream_chunks)
+        self.chunk_delay = chunk_delay_ms / 1000.0
+        self.reply_chars = reply_chars
+        self.malformed_rate = malformed_rate
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    # --- 統計 ---
+    def record(self, model, status):
+        with self.lock:
+            row = self.stats.setdefault(model, {'requests': 0, 200: 0, 404: 0, 429: 0})
+            row['requests'] += 1
+            row[status] = row.get(status, 0) + 1
+
+    # --- 決定這次請求的命運 ---
+    def decide(self, model):
+        if model not in self.models:
+            return 404
+        with self.lock:
+            hit_429 = self.rng.random() < self.error_429_rate
+        return 429 if hit_429 else 200
+
+    # --- 產生假回覆 (依 responseSchema 或 prompt 猜測呼叫端要的格式) ---
+    def reply_text(self, prompt, generation_config):
+        tag = uuid.uuid4().hex[:6]
+        schema = generation_config.get('responseSchema')
+        wants_json = generation_config.get('responseMimeType') == 'application/json'
+        title_match = re.search(r'"title"\s*:\s*"([^"]*)"|title 請使用「([^」]*)」', prompt)
+        title = next((g for g in title_match.groups() if g), None) if title_match else None
+
+        if schema:
+            return json.dumps(self.fake_value(schema, tag, title), ensure_ascii=False)
+
+        if 'JSON 陣列' in prompt:
+            return self.maybe_malformed(json.dumps([f"假題目 {tag}-{i}" for i in range(1, 4)], ensure_ascii=False))
+
+        if title or wants_json:
+            body = {'title': title or f"假標題 {tag}", 'content': self.fake_html(tag), 'difficulty': 1}
+            return self.maybe_malformed(json.dumps(body, ensure_ascii=False))
+
+        return self.fake_html(tag)
+
+    def fake_value(self, schema, tag, title=None, name=''):
+        kind = schema.get('type', 'STRING').upper()
+        if kind == 'ARRAY':
+            return [self.fake_value(schema.get('items', {}), f"{tag}-{i}") for i in range(1, 4)]
+        if kind == 'OBJECT':
+            return {key: self.fake_value(sub, tag, title, key) for key, sub in schema.get('properties', {}).items()}
+        if kind in ('INTEGER', 'NUMBER'):
+            return 1
+        if kind == 'BOOLEAN':
+            return True
+        if name == 'title' and title:
+            return title
+        if name in ('content', 'html'):
+            return self.fake_html(tag)
+        return f"假題目 {tag}"
+
+    def maybe_malformed(self, text):
+        with self.lock:
+            if self.rng.random() >= self.malformed_rate:
+                return text
+            kind = self.rng.choice(('fence', 'chatter', 'truncated'))
+        if kind == 'fence':
+            return f"以下是結果：\n```json\n{text}\n```"
+        if kind == 'chatter':
+            return f"{text}\n\n希望這些內容對您有幫助！如需調整請告訴我 {{^_^}}"
+        return text[:len(text) // 2]
+
+    def fake_html(self, tag):
+        paragraph = f"<p>這是本機替身伺服器產生的測試內容 ({tag})。</p>"
+        body = f"<h2>測試章節 {tag}</h2>"
+        while len(body) < self.reply_chars:
+            body += paragraph
+        return body
+
+
+def _extract_prompt(payload):
+    texts = []
+    for content in payload.get('contents', []):
+        for part in content.get('parts', []):
+            if 'text' in part:
+                texts.append(part['text'])
+    return "\n".join(texts)
+
+
+def _error_body(code, model):
+    if code == 404:
+        message, status = f"models/{model} is not found for API version v1beta.", "NOT_FOUND"
+    else:
+        message, status = "Resource has been exhausted (e.g. check quota).", "RESOURCE_EXHAUSTED"
+    return {'error': {'code': code, 'message': message, 'status': status}}
+
+
+def _model_info(model):
+    return {
+        'name': f"models/{model}",
+        'version': '001',
+        'displayName': model,
+        'description': '本機替身模型 (fake_gemini)',
+        'inputTokenLimit': 1048576,
+        'outputTokenLimit': 8192,
+        'supportedGenerationMethods': ['generateContent', 'streamGenerateContent', 'countTokens'],
+    }
+
+
+def make_handler(fake):
+    class FakeGeminiHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass  # 壓測時不洗版
+
+        def send_json(self, code, body):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json; charset=UTF-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == '/v1beta/models':
+                return self.send_json(200, {'models': [_model_info(m) for m in fake.models]})
+            match = MODEL_PATH_RE.match(path)
+            if match and not match.group('method'):
+                model = match.group('model')
+                if model in fake.models:
+                    return self.send_json(200, _model_info(model))
+                return self.send_json(404, _error_body(404, model))
+            self.send_json(404, {'error': {'code': 404, 'message': 'Not Found', 'status': 'NOT_FOUND'}})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            match = MODEL_PATH_RE.match(url.path)
+            length = int(self.headers.get('Content-Length') or 0)
+            payload = json.loads(self.rfile.read(length) or b'{}')
+
+            if not match or match.group('method') not in ('generateContent', 'streamGenerateContent'):
+                return self.send_json(404, {'error': {'code': 404, 'message': 'Not Found', 'status': 'NOT_FOUND'}})
+
+            model = match.group('model')
+            status = fake.decide(model)
+            fake.record(model, status)
+
+            # 404 立即回覆；429 與正常回覆都先模擬網路延遲
+            if status == 404:
+                return self.send_json(404, _error_body(404, model))
+            time.sleep(fake.latency.sample())
+            if status == 429:
+                return self.send_json(429, _error_body(429, model))
+
+            prompt = _extract_prompt(payload)
+            config = payload.get('generationConfig') or {}
+            text = fake.reply_text(prompt, config)
+
+            # 超過 maxOutputTokens (約 4 字元 / token) 就截斷，模擬 finishReason=MAX_TOKENS
+            finish = 'STOP'
+            max_chars = int(config.get('maxOutputTokens') or 0) * 4
+            if max_chars and len(text) > max_chars:
+                text, finish = text[:max_chars], 'MAX_TOKENS'
+            usage = {
+                'promptTokenCount': max(1, len(prompt) // 4),
+                'candidatesTokenCount': max(1, len(text) // 4),
+            }
+            usage['totalTokenCount'] = usage['promptTokenCount'] + usage['candidatesTokenCount']
+
+            if match.group('method') == 'generateContent':
+                return self.send_json(200, self.candidate(text, usage, model, finish))
+            self.stream(text, usage, model, finish, sse=parse_qs(url.query).get('alt') == ['sse'])
+
+        def candidate(self, text, usage, model, finish='STOP'):
+            body = {
+                'candidates': [{
+                    'content': {'parts': [{'text': text}], 'role': 'model'},
+                    'index': 0,
+                }],
+                'usageMetadata': usage,
+                'modelVersion': model,
+            }
+            if finish:
+                body['candidates'][0]['finishReason'] = finish
+            return body
+
+        def stream(self, text, usage, model, finish, sse):
+            size = math.ceil(len(text) / fake.stream_chunks) or 1
+            pieces = [text[i:i + size] for i in range(0, len(text), size)] or ['']
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream' if sse else 'application/json; charset=UTF-8')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+
+            def write_chunk(data):
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            for i, piece in enumerate(pieces):
+                last = i == len(pieces) - 1
+                body = self.candidate(piece, usage if last else None, model, finish if last else None)
+                if body['usageMetadata'] is None:
+                    del body['usageMetadata']
+                chunk = json.dumps(body, ensure_ascii=False)
+                if sse:
+                    write_chunk(f"data: {chunk}\r\n\r\n".encode('utf-8'))
+                else:
+                    prefix = '[' if i == 0 else ','
+                    write_chunk((prefix + chunk + (']' if last else '')).encode('utf-8'))
+                if not last:
+                    time.sleep(fake.chunk_delay)
+            write_chunk(b"")
+
+    return FakeGeminiHandler
+
+
+def start_server(fake, host='127.0.0.1', port=8765):
+    """在背景執行緒啟動伺服器，回傳 server (server.server_address 可取得實際埠號)"""
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,28 @@
+"""
+跨程序的檔案鎖 (fcntl.flock)
+
+同一台主機上的 web worker、run_writer_jobs、cron 指令共用同一份檔案時用它排隊。
+沒有 fcntl 的平台 (Windows) 不上鎖，呼叫端要自己再加一把同程序內的 threading.Lock。
+"""
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+@contextmanager
+def locked(path, blocking=True):
+    """拿 path 的獨佔鎖，yield 是否拿到 (blocking=False 且別人持有時為 False)；關檔時自動釋放"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a') as lock_file:
+        acquired = True
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                acquired = False
+        yield acquired
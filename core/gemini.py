@@ -0,0 +1,31 @@
+"""
+Gemini 連線設定 (所有 LLM 路徑共用)
+
+設定 GEMINI_API_ENDPOINT 後，SDK (google.generativeai) 與 REST 直連 (ai_writer)
+都會改打該位址，例如本機的假伺服器：python manage.py fake_gemini
+"""
+import google.generativeai as genai
+from django.conf import settings
+
+DEFAULT_API_ENDPOINT = "https://generativelanguage.googleapis.com"
+
+
+def api_endpoint():
+    return (getattr(settings, 'GEMINI_API_ENDPOINT', '') or DEFAULT_API_ENDPOINT).rstrip('/')
+
+
+def configure_genai(api_key=None):
+    """取代 genai.configure()：有自訂端點時改走 REST，才能指向 http://127.0.0.1"""
+    api_key = api_key or settings.GEMINI_API_KEY
+    if not api_key:
+        raise ValueError("尚未設定 API Key")
+
+    if getattr(settings, 'GEMINI_API_ENDPOINT', ''):
+        genai.configure(api_key=api_key, transport='rest', client_options={'api_endpoint': api_endpoint()})
+    else:
+        genai.configure(api_key=api_key)
+
+
+def rest_url(model, api_key, method='generateContent'):
+    """REST 直連用的完整網址 (ai_writer 指令使用)"""
+    return f"{api_endpoint()}/v1beta/models/{model}:{method}?key={api_key}"
@@ -0,0 +1,130 @@
+"""
+LLM 呼叫帳本：記錄每一次生成呼叫的模型、延遲、token 與備援次數
+
+寫入不在 request 路徑上：record_llm_call() 只把資料丟進記憶體佇列，
+由背景執行緒定時 (或累積滿一批時) 以 bulk_create 批次寫入 LLMCall。
+"""
+import atexit
+import math
+import queue
+import re
+import threading
+import time
+import uuid
+
+from django.db import connection
+from django.utils import timezone
+
+FLUSH_INTERVAL = 2.0   # 秒
+BATCH_SIZE = 100
+MAX_PENDING = 10000    # 佇列上限，寫不進去就丟棄，絕不拖慢生成
+
+_queue = queue.Queue(maxsize=MAX_PENDING)
+_wake = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def new_call_id():
+    return uuid.uuid4().hex
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank 百分位數 (輸入需已排序)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+# --- Token 用量 (SDK 物件 / REST JSON 兩種格式) ---
+def sdk_usage(response):
+    meta = getattr(response, 'usage_metadata', None)
+    if not meta:
+        return {}
+    return {
+        'prompt_tokens': meta.prompt_token_count or 0,
+        'output_tokens': meta.candidates_token_count or 0,
+        'total_tokens': meta.total_token_count or 0,
+    }
+
+def rest_usage(res_json):
+    meta = res_json.get('usageMetadata') or {}
+    return {
+        'prompt_tokens': meta.get('promptTokenCount', 0),
+        'output_tokens': meta.get('candidatesTokenCount', 0),
+        'total_tokens': meta.get('totalTokenCount', 0),
+    }
+
+
+def error_status(error):
+    """盡量從例外取出 HTTP 狀態碼 (urllib.HTTPError / google api_core 例外 / 錯誤字串)"""
+    code = getattr(error, 'code', None)
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        match = re.search(r'\b(400|401|403|404|429|500|503|504)\b', str(error))
+        return int(match.group(1)) if match else None
+
+
+def record_llm_call(source, model_name, started, call_id, attempt, usage=None, error=None):
+    """記下一次模型嘗試；started 為 time.perf_counter() 的起始值"""
+    row = {
+        'created_at': timezone.now(),
+        'source': source,
+        'model_name': model_name,
+        'call_id': call_id,
+        'attempt': attempt,
+        'latency_ms': int((time.perf_counter() - started) * 1000),
+        'success': error is None,
+        'status_code': 200 if error is None else error_status(error),
+        'error': str(error)[:255] if error is not None else '',
+    }
+    row.update(usage or {})
+
+    try:
+        _queue.put_nowait(row)
+    except queue.Full:
+        return
+    _ensure_worker()
+    if _queue.qsize() >= BATCH_SIZE:
+        _wake.set()
+
+
+def flush():
+    """把佇列中的紀錄一次寫入資料庫，回傳寫入筆數"""
+    from .models import LLMCall
+
+    rows = []
+    while True:
+        try:
+            rows.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    if rows:
+        LLMCall.objects.bulk_create([LLMCall(**row) for row in rows], batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+def _run():
+    while True:
+        _wake.wait(FLUSH_INTERVAL)
+        _wake.clear()
+        try:
+            flush()
+        except Exception as e:
+            print(f"⚠️ LLM 帳本寫入失敗：{e}")
+        finally:
+            connection.close()
+
+
+def _ensure_worker():
+    global _worker
+    if _worker is not None:
+        return
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_run, name='llm-ledger', daemon=True)
+            _worker.start()
+            # 指令列程式 (ai_writer) 結束前把剩下的紀錄寫完
+            atexit.register(flush)
@@ -0,0 +1,16 @@
+import time
+from django.core.management.base import BaseCommand
+from core import content_meta
+
+
+class Command(BaseCommand):
+    help = '重算所有文章 / 實驗室專案的摘錄、字數、閱讀時間與標題目錄'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **opts):
+        started = time.perf_counter()
+        count = content_meta.backfill(batch_size=opts['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"✅ 衍生欄位補算完成：{count} 筆 (耗時 {elapsed:.1f}s)"))
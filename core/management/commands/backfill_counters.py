@@ -0,0 +1,13 @@
+import time
+from django.core.management.base import BaseCommand
+from core import counters
+
+
+class Command(BaseCommand):
+    help = '依收藏 / 按讚關聯表重算工具與文章的 favorite_count / like_count'
+
+    def handle(self, *args, **opts):
+        started = time.perf_counter()
+        rows = counters.backfill()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"✅ 計數重算完成：更新 {rows} 列 (耗時 {elapsed:.1f}s)"))
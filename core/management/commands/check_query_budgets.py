@@ -0,0 +1,76 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import NoReverseMatch, reverse
+from core.query_budget import QueryRecorder, budget_for
+
+
+def _samples():
+    """每個 GET 頁面要帶的網址參數 (取資料庫裡第一筆)；None 表示沒有資料可測"""
+    from labs.models import LabProject
+    from tools.models import Tool
+    from tutorials.models import Article, ImageAnalysis
+
+    article = Article.objects.filter(is_published=True).values_list('slug', flat=True).first()
+    tool = Tool.objects.values_list('slug', flat=True).first()
+    project = LabProject.objects.values_list('pk', flat=True).first()
+    analysis = ImageAnalysis.objects.values_list('pk', flat=True).first()
+    return [
+        ('home', {}, ''), ('dashboard', {}, ''),
+        ('search', {}, '?q=AI'), ('search_suggest', {}, '?q=a'),
+        ('article_list', {}, ''), ('article_detail', article and {'slug': article}, ''),
+        ('tool_list', {}, ''), ('tool_detail', tool and {'slug': tool}, ''),
+        ('lab_list', {}, ''), ('lab_detail', project and {'pk': project}, ''),
+        ('image_analysis', {}, ''), ('image_analysis_detail', analysis and {'pk': analysis}, ''),
+        ('ai_writer', {}, ''), ('ai_writer_queue', {}, ''), ('ai_writer_queue_status', {}, ''),
+        ('reverse_engineering', {}, ''), ('reverse_batch', {}, ''), ('iso_analysis', {}, ''),
+        ('chat_view', {}, ''), ('login', {}, ''),
+        ('account_settings', {}, ''), ('change_password', {}, ''),
+    ]
+
+
+class Command(BaseCommand):
+    help = '以訪客與登入使用者走一遍所有 GET 頁面，檢查查詢預算與 N+1'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help='以哪位使用者登入 (預設第一位管理員)')
+
+    def handle(self, *args, **opts):
+        if opts['username']:
+            user = User.objects.filter(username=opts['username']).first()
+        else:
+            user = User.objects.filter(is_superuser=True).first() or User.objects.first()
+        if user is None:
+            raise CommandError('資料庫裡沒有使用者，無法檢查登入後的頁面')
+
+        anonymous = Client(SERVER_NAME='localhost')
+        member = Client(SERVER_NAME='localhost')
+        member.force_login(user)
+
+        failures = 0
+        for name, kwargs, query in _samples():
+            if kwargs is None:
+                self.stdout.write(f"  - {name}: 沒有資料可測，略過")
+                continue
+            try:
+                url = reverse(name, kwargs=kwargs) + query
+            except NoReverseMatch:
+                continue
+            for label, client in (('訪客', anonymous), ('會員', member)):
+                recorder = QueryRecorder()
+                with connection.execute_wrapper(recorder):
+                    response = client.get(url)
+                problems = recorder.problems(budget_for(name))
+                status = f"{response.status_code} {len(recorder.queries):>3}/{budget_for(name)} 查詢"
+                if problems:
+                    failures += 1
+                    self.stdout.write(self.style.ERROR(f"❌ {name} [{label}] {status}"))
+                    for problem in problems:
+                        self.stdout.write(f"     {problem}")
+                else:
+                    self.stdout.write(f"✅ {name} [{label}] {status}")
+
+        if failures:
+            raise CommandError(f"{failures} 個頁面超出查詢預算或有 N+1")
+        self.stdout.write(self.style.SUCCESS('✅ 所有頁面都在查詢預算內'))
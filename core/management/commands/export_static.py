@@ -0,0 +1,21 @@
+import time
+from django.core.management.base import BaseCommand
+from core import static_export
+
+
+class Command(BaseCommand):
+    help = '把工具 / 文章詳情與列表頁輸出成靜態 HTML (只重新渲染有變動的頁面)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='輸出目錄 (預設 settings.STATIC_EXPORT_DIR)')
+        parser.add_argument('--full', action='store_true', help='忽略上次的紀錄，全部重新渲染 (更新瀏覽數等計數)')
+        parser.add_argument('--host', default='localhost', help='渲染時使用的 Host 標頭')
+
+    def handle(self, *args, **opts):
+        started = time.perf_counter()
+        stats = static_export.export(opts['output'], full=opts['full'], host=opts['host'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ 靜態輸出完成：渲染 {stats['rendered']} 頁、未變動 {stats['skipped']} 頁、"
+            f"移除 {stats['removed']} 頁、失敗 {stats['failed']} 頁 (耗時 {elapsed:.1f}s)"
+        ))
@@ -0,0 +1,44 @@
+import time
+from django.core.management.base import BaseCommand
+from core.fake_gemini import FakeGemini, FAKE_MODELS, start_server
+
+
+class Command(BaseCommand):
+    help = '啟動本機 Gemini 替身伺服器 (離線壓測 / 備援邏輯驗證)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', default='lognormal:800,0.4',
+                            help='延遲分布 (ms)：fixed:200 / uniform:100,400 / normal:300,80 / lognormal:中位數,sigma')
+        parser.add_argument('--error-429', type=float, default=0.0, help='回傳 429 的機率 (0~1)')
+        parser.add_argument('--missing', nargs='*', default=[], help='視為不存在 (回傳 404) 的模型名稱')
+        parser.add_argument('--stream-chunks', type=int, default=4, help='串流回應切成幾段')
+        parser.add_argument('--chunk-delay', type=float, default=50, help='串流每段之間的延遲 (ms)')
+        parser.add_argument('--reply-chars', type=int, default=1200, help='假文章大約長度 (字元)')
+        parser.add_argument('--malformed', type=float, default=0.0,
+                            help='未使用 responseSchema 的 JSON 回覆中，格式損壞的機率 (0~1)')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **opts):
+        fake = FakeGemini(
+            latency=opts['latency'], error_429_rate=opts['error_429'], missing_models=opts['missing'],
+            stream_chunks=opts['stream_chunks'], chunk_delay_ms=opts['chunk_delay'],
+            reply_chars=opts['reply_chars'], malformed_rate=opts['malformed'], seed=opts['seed'],
+        )
+        server = start_server(fake, opts['host'], opts['port'])
+        host, port = server.server_address[:2]
+
+        self.stdout.write(self.style.SUCCESS(f"🧪 Gemini 替身伺服器已啟動：http://{host}:{port}"))
+        self.stdout.write(f"   延遲：{opts['latency']} ｜ 429 機率：{opts['error_429']} ｜ 404 模型：{opts['missing'] or '無'} ｜ 壞格式機率：{opts['malformed']}")
+        self.stdout.write(f"   可用模型：{len(fake.models)} / {len(FAKE_MODELS)}")
+        self.stdout.write(f"👉 在 .env 設定 GEMINI_API_ENDPOINT=http://{host}:{port} 即可讓整個網站改打替身")
+
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.shutdown()
+            self.stdout.write("\n📊 各模型請求統計：")
+            for model, row in sorted(fake.stats.items()):
+                self.stdout.write(f"   {model:<40} 共 {row['requests']:>5} ｜ 200: {row[200]} ｜ 404: {row[404]} ｜ 429: {row[429]}")
@@ -0,0 +1,161 @@
+import contextlib
+import io
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+from PIL import Image
+
+from core.fake_gemini import FakeGemini, start_server
+from core.llm_ledger import percentile
+from labs.models import LabProject, ReverseImage
+from tutorials.models import ImageAnalysis
+
+
+def _png_upload(name):
+    buffer = io.BytesIO()
+    color = tuple(random.randint(0, 255) for _ in range(3))
+    Image.new('RGB', (64, 64), color).save(buffer, format='PNG')
+    buffer.seek(0)
+    buffer.name = name
+    return buffer
+
+
+def _no_error_message(response):
+    return not any(m.level == messages.ERROR for m in get_messages(response.wsgi_request))
+
+
+# --- 各壓測目標：回傳 True 代表這次請求成功 ---
+def hit_chat(client, i):
+    response = client.post(reverse('chat_view'), {'user_input': f'壓測問題 #{i}：推薦一個簡報工具'})
+    return response.status_code == 200 and _no_error_message(response)
+
+def hit_writer(client, i):
+    response = client.post(reverse('ai_writer'), {'topic': f'壓測主題 #{i}'})
+    return response.status_code == 200 and _no_error_message(response)
+
+def hit_vision(client, i):
+    response = client.post(reverse('reverse_engineering'), {'image': _png_upload(f'loadtest_{i}.png')})
+    return response.status_code == 200 and _no_error_message(response)
+
+def hit_image(client, i):
+    response = client.post(reverse('image_analysis'), {'upload_image': _png_upload(f'loadtest_{i}.png')})
+    return response.status_code == 302
+
+def hit_cli(client, i):
+    from tutorials.management.commands.ai_writer import Command as AIWriterCommand
+    return AIWriterCommand().call_gemini(f'壓測 CLI #{i}', settings.GEMINI_API_KEY) is not None
+
+TARGETS = {
+    'chat': hit_chat,
+    'writer': hit_writer,
+    'vision': hit_vision,
+    'image': hit_image,
+    'cli': hit_cli,
+}
+
+
+class Command(BaseCommand):
+    help = 'LLM 壓力測試：併發呼叫實驗室 views，回報吞吐量與 p50/p95/p99 延遲'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--targets', nargs='+', choices=sorted(TARGETS), default=['chat'],
+                            help='壓測目標 (chat / writer / vision / image / cli)')
+        parser.add_argument('--requests', type=int, default=50, help='每個目標送出的請求數')
+        parser.add_argument('--concurrency', type=int, default=4, help='同時併發的模擬使用者數')
+        parser.add_argument('--endpoint', default='', help='Gemini 端點 (預設使用 settings.GEMINI_API_ENDPOINT)')
+        parser.add_argument('--fake', action='store_true', help='在本程序內啟動替身伺服器')
+        parser.add_argument('--latency', default='lognormal:800,0.4', help='(--fake) 延遲分布，格式同 fake_gemini')
+        parser.add_argument('--error-429', type=float, default=0.0, help='(--fake) 429 機率')
+        parser.add_argument('--missing', nargs='*', default=[], help='(--fake) 回傳 404 的模型')
+        parser.add_argument('--keep', action='store_true', help='保留壓測產生的資料 (預設結束後清除)')
+        parser.add_argument('--verbose', action='store_true', help='顯示 views 內部的 print 輸出')
+
+    def handle(self, *args, **opts):
+        fake = None
+        endpoint = opts['endpoint'] or settings.GEMINI_API_ENDPOINT
+        if opts['fake']:
+            fake = FakeGemini(latency=opts['latency'], error_429_rate=opts['error_429'], missing_models=opts['missing'])
+            server = start_server(fake, port=0)
+            endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+
+        # 安全閥：絕不對正式 API 壓測，避免燒掉真實額度
+        if not endpoint:
+            raise CommandError("請加上 --fake，或以 --endpoint / GEMINI_API_ENDPOINT 指定替身伺服器。")
+
+        settings.GEMINI_API_ENDPOINT = endpoint
+        settings.GEMINI_API_KEY = settings.GEMINI_API_KEY or 'loadtest-key'
+        self.stdout.write(f"🎯 端點：{endpoint} ｜ 每目標 {opts['requests']} 次 ｜ 併發 {opts['concurrency']}")
+
+        user = User.objects.create_user(
+            username=f"loadtest-{uuid.uuid4().hex[:8]}", password=uuid.uuid4().hex,
+            is_staff=True, is_superuser=True,
+        )
+        try:
+            for target in opts['targets']:
+                self.report(target, *self.run_target(target, user, opts))
+        finally:
+            if not opts['keep']:
+                self.cleanup(user)
+
+        if fake:
+            self.stdout.write("\n📊 替身伺服器統計 (驗證備援順序)：")
+            for model, row in sorted(fake.stats.items(), key=lambda kv: -kv[1]['requests']):
+                self.stdout.write(f"   {model:<40} 共 {row['requests']:>5} ｜ 200: {row[200]} ｜ 404: {row[404]} ｜ 429: {row[429]}")
+
+    def run_target(self, target, user, opts):
+        hit = TARGETS[target]
+        local = threading.local()
+
+        def one(i):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+                local.client.force_login(user)
+            start = time.perf_counter()
+            try:
+                ok = hit(local.client, i)
+            except Exception:
+                ok = False
+            finally:
+                elapsed = time.perf_counter() - start
+                connections.close_all()
+            return elapsed, ok
+
+        quiet = contextlib.nullcontext() if opts['verbose'] else contextlib.redirect_stdout(io.StringIO())
+        with quiet:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=max(1, opts['concurrency'])) as pool:
+                results = list(pool.map(one, range(opts['requests'])))
+            wall = time.perf_counter() - started
+        return results, wall
+
+    def report(self, target, results, wall):
+        latencies = sorted(elapsed * 1000 for elapsed, _ in results)
+        ok = sum(1 for _, success in results if success)
+        throughput = len(results) / wall if wall else 0.0
+        style = self.style.SUCCESS if ok == len(results) else self.style.WARNING
+        self.stdout.write(style(
+            f"\n✅ {target:<7} 成功 {ok}/{len(results)} ｜ 吞吐 {throughput:.2f} req/s ｜ "
+            f"p50 {percentile(latencies, 50):.0f}ms ｜ p95 {percentile(latencies, 95):.0f}ms ｜ "
+            f"p99 {percentile(latencies, 99):.0f}ms ｜ max {latencies[-1] if latencies else 0:.0f}ms"
+        ))
+
+    def cleanup(self, user):
+        for obj in ReverseImage.objects.filter(user=user):
+            obj.image.delete(save=False)
+        for obj in ImageAnalysis.objects.filter(user=user):
+            obj.image.delete(save=False)
+            if obj.preview:
+                obj.preview.delete(save=False)
+        LabProject.objects.filter(user=user).delete()
+        user.delete()
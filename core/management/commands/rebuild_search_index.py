@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.apps import apps
+from django.db import connection
+from core import search
+
+
+class Command(BaseCommand):
+    help = '重建全文檢索索引 (工具 / 文章 / 實驗室專案)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recreate', action='store_true', help='先刪除再重新建立索引表 (變更斷詞規則後使用)')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **opts):
+        if not search.supported():
+            raise CommandError(f"目前的資料庫 ({connection.vendor}) 不支援全文檢索索引，搜尋會使用 icontains。")
+
+        if opts['recreate']:
+            search.drop_index()
+        search.create_index()
+
+        started = time.perf_counter()
+        models = {kind: apps.get_model(label) for kind, label in search.MODELS.items()}
+        counts = search.rebuild(models, batch_size=opts['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        summary = ' ｜ '.join(f"{kind} {count}" for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"✅ 索引重建完成：{summary} (耗時 {elapsed:.1f}s)"))
@@ -0,0 +1,20 @@
+import time
+from django.core.management.base import BaseCommand
+from django.apps import apps
+from core import search, semantic
+
+
+class Command(BaseCommand):
+    help = '重新訓練本機語意搜尋索引 (雜湊向量 + LSA)，並重算所有工具 / 文章 / 實驗室專案的向量'
+
+    def handle(self, *args, **opts):
+        started = time.perf_counter()
+        models = {kind: apps.get_model(label) for kind, label in search.MODELS.items()}
+        count, dims = semantic.rebuild(models)
+        elapsed = time.perf_counter() - started
+        if not dims:
+            self.stdout.write(self.style.WARNING(f"⚠️ 只有 {count} 筆資料，至少需要 {semantic.MIN_DOCUMENTS} 筆才能建立語意索引"))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ 語意索引重建完成：{count} 筆、{dims} 維 → {semantic.index_dir()} (耗時 {elapsed:.1f}s)"
+        ))
@@ -0,0 +1,14 @@
+import time
+from django.core.management.base import BaseCommand
+from core import trending, view_counter
+
+
+class Command(BaseCommand):
+    help = '依最近的每日瀏覽 / 收藏重算熱門分數 (建議排程每 15 分鐘執行)'
+
+    def handle(self, *args, **opts):
+        started = time.perf_counter()
+        view_counter.flush()
+        count = trending.refresh()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"✅ 熱門分數更新完成：{count} 個項目有近期活動 (耗時 {elapsed:.1f}s)"))
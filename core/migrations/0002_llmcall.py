@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-19 19:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMCall',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='呼叫時間')),
+                ('source', models.CharField(db_index=True, max_length=50, verbose_name='呼叫來源')),
+                ('model_name', models.CharField(max_length=100, verbose_name='模型')),
+                ('call_id', models.CharField(db_index=True, max_length=32, verbose_name='呼叫 ID')),
+                ('attempt', models.PositiveSmallIntegerField(default=1, verbose_name='第幾次嘗試')),
+                ('success', models.BooleanField(default=True, verbose_name='成功')),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='狀態碼')),
+                ('error', models.CharField(blank=True, max_length=255, verbose_name='錯誤訊息')),
+                ('latency_ms', models.PositiveIntegerField(default=0, verbose_name='延遲 (ms)')),
+                ('prompt_tokens', models.PositiveIntegerField(default=0, verbose_name='輸入 Token')),
+                ('output_tokens', models.PositiveIntegerField(default=0, verbose_name='輸出 Token')),
+                ('total_tokens', models.PositiveIntegerField(default=0, verbose_name='總 Token')),
+            ],
+            options={
+                'verbose_name': 'LLM 呼叫紀錄',
+                'verbose_name_plural': 'LLM 呼叫紀錄',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['model_name', 'created_at'], name='core_llmcal_model_n_b57598_idx')],
+            },
+        ),
+    ]
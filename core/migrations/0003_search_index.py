@@ -0,0 +1,56 @@
+# Generated by Django 6.0 on 2026-10-19 19:40
+
+from django.db import DatabaseError, migrations, transaction
+
+# 建表語法固定寫在這裡 (不引用 core.search)，之後修改 search.py 不會改變這個 migration 的行為。
+# 索引內容由 python manage.py rebuild_search_index 寫入。
+TABLE = 'core_search_fts'
+SQL = {
+    'sqlite': {
+        'create': [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+            "kind UNINDEXED, object_id UNINDEXED, title, body, tokenize='unicode61')",
+        ],
+        'drop': [f"DROP TABLE IF EXISTS {TABLE}"],
+    },
+    'postgresql': {
+        'create': [
+            f"CREATE TABLE IF NOT EXISTS {TABLE} ("
+            "id bigint PRIMARY KEY, kind smallint NOT NULL, object_id bigint NOT NULL, "
+            "title text NOT NULL, body text NOT NULL, "
+            "document tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', body), 'B')) STORED)",
+            f"CREATE INDEX IF NOT EXISTS {TABLE}_document_idx ON {TABLE} USING GIN (document)",
+        ],
+        'drop': [f"DROP TABLE IF EXISTS {TABLE}"],
+    },
+}
+
+
+def run(step):
+    def operation(apps, schema_editor):
+        connection = schema_editor.connection
+        if connection.vendor not in SQL:
+            return
+        try:
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                for statement in SQL[connection.vendor][step]:
+                    cursor.execute(statement)
+        except DatabaseError as e:
+            # 例如 SQLite 編譯時未啟用 FTS5：搜尋會自動退回 icontains
+            print(f"\n⚠️ 無法建立全文檢索索引：{e}")
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_llmcall'),
+        ('tools', '0009_tool_aliases'),
+        ('tutorials', '0008_imageanalysis'),
+        ('labs', '0012_writerjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(run('create'), run('drop')),
+    ]
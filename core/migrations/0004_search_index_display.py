@@ -0,0 +1,69 @@
+# Generated by Django 6.0 on 2026-10-19 21:05
+
+from django.db import DatabaseError, migrations, transaction
+
+# 索引表新增顯示用欄位 (標題、網址、分類、純文字摘錄)，直接重建。
+# 建表語法固定寫在這裡 (不引用 core.search)；重建後的內容由 python manage.py rebuild_search_index 寫入。
+TABLE = 'core_search_fts'
+SQL = {
+    'sqlite': {
+        'drop': [f"DROP TABLE IF EXISTS {TABLE}"],
+        'create': [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+            "kind UNINDEXED, object_id UNINDEXED, title, body, "
+            "display UNINDEXED, url UNINDEXED, label UNINDEXED, excerpt UNINDEXED, tokenize='unicode61')",
+        ],
+        'create_previous': [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+            "kind UNINDEXED, object_id UNINDEXED, title, body, tokenize='unicode61')",
+        ],
+    },
+    'postgresql': {
+        'drop': [f"DROP TABLE IF EXISTS {TABLE}"],
+        'create': [
+            f"CREATE TABLE IF NOT EXISTS {TABLE} ("
+            "id bigint PRIMARY KEY, kind smallint NOT NULL, object_id bigint NOT NULL, "
+            "title text NOT NULL, body text NOT NULL, "
+            "display text NOT NULL, url text NOT NULL, label text NOT NULL, excerpt text NOT NULL, "
+            "document tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', body), 'B')) STORED)",
+            f"CREATE INDEX IF NOT EXISTS {TABLE}_document_idx ON {TABLE} USING GIN (document)",
+        ],
+        'create_previous': [
+            f"CREATE TABLE IF NOT EXISTS {TABLE} ("
+            "id bigint PRIMARY KEY, kind smallint NOT NULL, object_id bigint NOT NULL, "
+            "title text NOT NULL, body text NOT NULL, "
+            "document tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', body), 'B')) STORED)",
+            f"CREATE INDEX IF NOT EXISTS {TABLE}_document_idx ON {TABLE} USING GIN (document)",
+        ],
+    },
+}
+
+
+def run(*steps):
+    def operation(apps, schema_editor):
+        connection = schema_editor.connection
+        if connection.vendor not in SQL:
+            return
+        try:
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                for step in steps:
+                    for statement in SQL[connection.vendor][step]:
+                        cursor.execute(statement)
+        except DatabaseError as e:
+            print(f"\n⚠️ 無法重建全文檢索索引：{e}")
+            return
+        print("\n   全文檢索索引表已重建，請執行 python manage.py rebuild_search_index 寫入內容")
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(run('drop', 'create'), run('drop', 'create_previous')),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-19 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_search_index_display'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemCooccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item', models.CharField(max_length=32, verbose_name='項目')),
+                ('other', models.CharField(max_length=32, verbose_name='共同項目')),
+                ('count', models.IntegerField(default=0, verbose_name='共同人數')),
+            ],
+            options={
+                'verbose_name': '共同收藏',
+                'verbose_name_plural': '共同收藏',
+                'unique_together': {('item', 'other')},
+            },
+        ),
+    ]
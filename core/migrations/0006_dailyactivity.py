@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-19 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_itemcooccurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=16, verbose_name='種類')),
+                ('object_id', models.PositiveIntegerField(verbose_name='物件 ID')),
+                ('day', models.DateField(db_index=True, verbose_name='日期')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='瀏覽次數')),
+                ('favorites', models.IntegerField(default=0, verbose_name='新增收藏')),
+            ],
+            options={
+                'verbose_name': '每日活動量',
+                'verbose_name_plural': '每日活動量',
+                'unique_together': {('kind', 'object_id', 'day')},
+            },
+        ),
+    ]
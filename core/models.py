@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 # 建立一個 UserProfile 模型來擴充 User
 class UserProfile(models.Model):
@@ -20,4 +21,71 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
\ No newline at end of file
+    instance.profile.save()
+
+# ==========================================
+# LLM 呼叫帳本：每一次模型嘗試 (含備援) 一筆
+# ==========================================
+class LLMCall(models.Model):
+    created_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name="呼叫時間")
+    source = models.CharField(max_length=50, db_index=True, verbose_name="呼叫來源")
+    model_name = models.CharField(max_length=100, verbose_name="模型")
+
+    # 同一次請求的所有備援嘗試共用同一個 call_id，attempt 從 1 起算
+    call_id = models.CharField(max_length=32, db_index=True, verbose_name="呼叫 ID")
+    attempt = models.PositiveSmallIntegerField(default=1, verbose_name="第幾次嘗試")
+
+    success = models.BooleanField(default=True, verbose_name="成功")
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="狀態碼")
+    error = models.CharField(max_length=255, blank=True, verbose_name="錯誤訊息")
+
+    latency_ms = models.PositiveIntegerField(default=0, verbose_name="延遲 (ms)")
+    prompt_tokens = models.PositiveIntegerField(default=0, verbose_name="輸入 Token")
+    output_tokens = models.PositiveIntegerField(default=0, verbose_name="輸出 Token")
+    total_tokens = models.PositiveIntegerField(default=0, verbose_name="總 Token")
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['model_name', 'created_at'])]
+        verbose_name = "LLM 呼叫紀錄"
+        verbose_name_plural = "LLM 呼叫紀錄"
+
+    def __str__(self):
+        return f"{self.source} → {self.model_name} ({self.latency_ms}ms)"
+
+# ==========================================
+# 共同收藏矩陣：同一位使用者同時收藏 / 按讚過 item 與 other 的人數
+# (對稱存兩筆；item == other 的那筆是該項目的總人數，由 core/recommend.py 維護)
+# ==========================================
+class ItemCooccurrence(models.Model):
+    item = models.CharField(max_length=32, verbose_name="項目")
+    other = models.CharField(max_length=32, verbose_name="共同項目")
+    count = models.IntegerField(default=0, verbose_name="共同人數")
+
+    class Meta:
+        unique_together = ('item', 'other')
+        verbose_name = "共同收藏"
+        verbose_name_plural = "共同收藏"
+
+    def __str__(self):
+        return f"{self.item} × {self.other} = {self.count}"
+
+
+# ==========================================
+# 每日活動量：每個工具 / 文章 / 實驗室專案每天的瀏覽與收藏數
+# (由 core/view_counter.py 與收藏 signal 累加，core/trending.py 據此算熱門分數)
+# ==========================================
+class DailyActivity(models.Model):
+    kind = models.CharField(max_length=16, verbose_name="種類")
+    object_id = models.PositiveIntegerField(verbose_name="物件 ID")
+    day = models.DateField(db_index=True, verbose_name="日期")
+    views = models.PositiveIntegerField(default=0, verbose_name="瀏覽次數")
+    favorites = models.IntegerField(default=0, verbose_name="新增收藏")
+
+    class Meta:
+        unique_together = ('kind', 'object_id', 'day')
+        verbose_name = "每日活動量"
+        verbose_name_plural = "每日活動量"
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} {self.day} 👁 {self.views} ★ {self.favorites}"
@@ -0,0 +1,146 @@
+"""
+公開列表頁的整頁快取 + 片段快取 (依 signal 精準失效，過期時先給舊版再重算)
+
+首頁、工具列表、教學列表、實驗室列表九成以上是未登入的流量，
+每次都重跑分類 distinct、Count('lab_projects') 等查詢並重新渲染整頁。
+
+- 每個「資料群組」(tools / articles / labs) 在快取裡有一個版本號；
+  Tool / Article / LabProject 存檔或刪除時由 signal 換掉對應群組的版本號
+- @cache_public_page('tools', ...)：未登入的 GET 依「路徑 + 查詢參數」快取整頁，
+  並記下當時各群組的版本號；版本號變了或超過 FRESH_SECONDS 就視為過期
+- 過期時只有搶到鎖的那個 request 重新渲染，其他 request 先拿舊版 (stale-while-revalidate)
+- 登入使用者看不到整頁快取，但模板裡用 {% cache ... cache_versions.tools %} 的片段照樣共用
+
+版本號必須在所有程序 (各 web worker、cron 的 refresh_trending、run_writer_jobs) 之間共用，
+所以 settings.CACHES 一定要是共用的後端 (Redis / 檔案 / 資料庫)。
+設定成 LocMemCache (每個程序各一份) 時整頁快取直接停用，只會印出警告，
+否則其他程序的 post_save 換掉版本號也通知不到這個程序，會一直給過期的頁面。
+"""
+import functools
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.utils.functional import SimpleLazyObject
+
+GROUPS = ('tools', 'articles', 'labs')
+VERSION_KEY = 'page_cache:version:{group}'
+FRESH_SECONDS = 5 * 60  # 沒有 signal 的變動 (瀏覽數、熱門分數) 最多晚這麼久反映
+STALE_SECONDS = 24 * 60 * 60  # 舊版最多保留多久
+LOCK_SECONDS = 30
+# 每個程序各一份的快取後端，版本號無法跨程序失效
+LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+# (model, 影響的群組)
+SOURCES = [
+    ('tools.Tool', 'tools'),
+    ('tutorials.Article', 'articles'),
+    ('labs.LabProject', 'labs'),
+]
+
+
+@functools.cache
+def enabled():
+    backend = settings.CACHES.get('default', {}).get('BACKEND', LOCAL_BACKENDS[0])
+    if backend in LOCAL_BACKENDS:
+        print(f"⚠️ 整頁快取已停用：CACHES 使用 {backend.rsplit('.', 1)[-1]}，版本號無法在程序之間共用")
+        return False
+    return True
+
+
+# --- 🔢 群組版本號 ---
+def versions(groups=GROUPS):
+    keys = {VERSION_KEY.format(group=group): group for group in groups}
+    found = cache.get_many(list(keys))
+    missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return {group: found[key] for key, group in keys.items()}
+
+
+def invalidate(*groups):
+    cache.set_many({VERSION_KEY.format(group=group): uuid.uuid4().hex for group in groups or GROUPS}, None)
+
+
+def cache_versions(request):
+    """context processor：模板片段快取用 {% cache 600 name cache_versions.tools %} 當 key 的一部分"""
+    return {'cache_versions': SimpleLazyObject(versions)}
+
+
+# --- 📄 整頁快取 ---
+def _page_key(request):
+    params = sorted((key, value) for key, values in request.GET.lists() for value in values)
+    digest = hashlib.md5(f"{request.path}?{params}".encode('utf-8')).hexdigest()
+    return f"page_cache:page:{digest}"
+
+
+def _cacheable(request):
+    # 有待顯示的訊息 (例如剛登出) 的頁面不能給別人看
+    return request.method == 'GET' and not request.user.is_authenticated and not len(get_messages(request))
+
+
+def _from_entry(entry, state):
+    response = HttpResponse(entry['content'], status=entry['status'], content_type=entry['content_type'])
+    response['X-Page-Cache'] = state
+    return response
+
+
+def cache_public_page(*groups):
+    """未登入訪客的整頁快取；groups 是這一頁依賴的資料群組"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not enabled() or not _cacheable(request):
+                return view(request, *args, **kwargs)
+
+            key = _page_key(request)
+            current = versions(groups)
+            entry = cache.get(key)
+            locked = False
+            if entry is not None:
+                if entry['versions'] == current and time.time() - entry['created'] < FRESH_SECONDS:
+                    return _from_entry(entry, 'hit')
+                locked = cache.add(f"{key}:lock", 1, LOCK_SECONDS)
+                if not locked:
+                    return _from_entry(entry, 'stale')  # 別人正在重算，先給舊版
+
+            try:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200 and not response.cookies and not getattr(response, 'streaming', False):
+                    cache.set(key, {
+                        'content': response.content,
+                        'status': response.status_code,
+                        'content_type': response['Content-Type'],
+                        'versions': current,
+                        'created': time.time(),
+                    }, STALE_SECONDS)
+                    response['X-Page-Cache'] = 'miss'
+                return response
+            finally:
+                if locked:
+                    cache.delete(f"{key}:lock")
+        return wrapper
+    return decorator
+
+
+# --- 🔄 內容異動時換掉群組版本號 ---
+def _on_change(group):
+    def receiver(sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        invalidate(group)
+    return receiver
+
+
+def connect_signals():
+    for label, group in SOURCES:
+        post_save.connect(_on_change(group), sender=label, weak=False, dispatch_uid=f'page_cache_save_{label}')
+        post_delete.connect(_on_change(group), sender=label, weak=False, dispatch_uid=f'page_cache_delete_{label}')
@@ -0,0 +1,154 @@
+"""
+每個 view 的 SQL 查詢預算 + N+1 偵測
+
+QueryBudgetMiddleware 以 connection.execute_wrapper 記下這個 request 執行的每一條 SQL，
+把數字 / 字串常數 / IN (...) 清單換成 ? 得到「查詢形狀」：
+- 同一個形狀重複 N_PLUS_ONE_REPEATS 次以上 → 幾乎一定是迴圈裡逐筆查關聯 (N+1)
+- 總查詢數超過 BUDGETS[url name] (或 settings.QUERY_BUDGETS 覆寫) → 超出預算
+預設只印出警告；settings.QUERY_BUDGET_STRICT = True 時直接丟 QueryBudgetExceeded (測試 / CI 用)。
+回應會帶 X-Query-Count 標頭，方便在瀏覽器開發者工具裡看。
+
+測試裡可以用 query_budget() 包住一段程式：
+    with query_budget('article_list'):
+        self.client.get(reverse('article_list'))
+python manage.py check_query_budgets 會以訪客 / 登入使用者各走一遍所有 GET 網址並列出結果。
+"""
+import re
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+DEFAULT_BUDGET = 20
+N_PLUS_ONE_REPEATS = 3
+
+# url name → 該頁最多幾個查詢 (登入使用者、含 session / user 查詢；資料量變多也不該增加)
+BUDGETS = {
+    # 首頁與戰情室
+    'home': 8,
+    'dashboard': 12,
+    # 搜尋
+    'search': 10,
+    'search_suggest': 2,
+    # 新手村
+    'article_list': 8,
+    'article_detail': 16,  # 含 conditional GET 的版本查詢 (內容沒變時回 304 只要 4 個)
+    'add_article_comment': 6,
+    'article_favorite': 25,  # 收藏 / 按讚會同步更新推薦矩陣、熱門統計與計數
+    'article_like': 25,
+    # 工具
+    'tool_list': 8,
+    'tool_detail': 14,
+    'add_comment': 6,
+    'toggle_favorite': 25,
+    'tool_favorite': 25,
+    # 實驗室
+    'image_analysis': 10,
+    'image_analysis_detail': 6,
+    'lab_list': 10,
+    'lab_detail': 6,
+    'ai_writer': 10,
+    'ai_writer_queue': 10,
+    'ai_writer_queue_status': 6,
+    'publish_lab_to_article': 30,
+    'reverse_engineering': 10,
+    'reverse_batch': 10,
+    'iso_analysis': 10,
+    'chat_view': 10,
+    # 會員
+    'login': 4,
+    'logout': 4,
+    'account_settings': 8,
+    'change_password': 8,
+}
+
+_SHAPE_RULES = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\bIN\s*\((?:\s*(?:\?|%s)\s*,?)+\)', re.IGNORECASE), 'IN (...)'),
+    (re.compile(r'\s+'), ' '),
+]
+# SAVEPOINT 名稱每次不同、BEGIN / COMMIT 不算真正的查詢
+_IGNORED = re.compile(r'^\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT|BEGIN|COMMIT)\b', re.IGNORECASE)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def shape(sql):
+    for pattern, replacement in _SHAPE_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def budget_for(url_name):
+    overrides = getattr(settings, 'QUERY_BUDGETS', {})
+    return overrides.get(url_name, BUDGETS.get(url_name, DEFAULT_BUDGET))
+
+
+class QueryRecorder:
+    """execute_wrapper：只記 SQL 字串，不保留參數"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not _IGNORED.match(sql):
+            self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold=N_PLUS_ONE_REPEATS):
+        counts = Counter(shape(sql) for sql in self.queries)
+        return [(sql, count) for sql, count in counts.most_common() if count >= threshold]
+
+    def problems(self, budget):
+        """回傳問題描述清單 (沒問題時為空)"""
+        problems = []
+        if budget is not None and len(self.queries) > budget:
+            problems.append(f"查詢數 {len(self.queries)} 超過預算 {budget}")
+        for sql, count in self.repeated():
+            problems.append(f"疑似 N+1：同一形狀執行 {count} 次：{sql[:200]}")
+        return problems
+
+
+@contextmanager
+def query_budget(url_name=None, budget=None):
+    """測試用：區塊內的查詢超出預算或出現 N+1 時丟 QueryBudgetExceeded"""
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        yield recorder
+    limit = budget if budget is not None else budget_for(url_name)
+    problems = recorder.problems(limit)
+    if problems:
+        raise QueryBudgetExceeded(f"{url_name or '查詢區塊'}：" + '；'.join(problems))
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'QUERY_BUDGET_ENABLED', settings.DEBUG)
+        self.strict = getattr(settings, 'QUERY_BUDGET_STRICT', False)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        # 串流回應 (例如批次逆向工程) 的查詢發生在迭代時，這裡只算到開始串流為止
+        response['X-Query-Count'] = str(len(recorder.queries))
+
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.url_name if match else None
+        if not url_name or url_name not in BUDGETS and url_name not in getattr(settings, 'QUERY_BUDGETS', {}):
+            return response  # admin、靜態檔等不設預算
+        problems = recorder.problems(budget_for(url_name))
+        if problems:
+            message = f"{request.method} {request.path} ({url_name})：" + '；'.join(problems)
+            if self.strict:
+                raise QueryBudgetExceeded(message)
+            print(f"⚠️ 查詢預算：{message}")
+        return response
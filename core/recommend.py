@@ -0,0 +1,202 @@
+"""
+共同收藏推薦 (item-item co-occurrence)
+
+把「收藏工具、收藏文章、按讚文章」都視為使用者感興趣的項目 (tool:3、article:12)，
+ItemCooccurrence 記錄每兩個項目被同一位使用者同時選過的人數 (稀疏矩陣，只存非零格)。
+推薦分數 = Σ 共同人數 / √(項目 A 人數 × 項目 B 人數)，也就是兩個項目收藏者集合的餘弦相似度，
+避免熱門工具因為人人都收藏而永遠排第一。
+
+收藏 / 按讚異動時由 m2m_changed 增量更新矩陣，並清掉該使用者的推薦快取；
+每位使用者的 top-N 推薦放在快取裡，戰情室頁面命中快取時不需要再計算。
+矩陣可用 python manage.py rebuild_recommendations 整批重建 (例如刪除使用者之後)。
+"""
+import math
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models import F, Q
+from django.db.models.signals import m2m_changed
+
+TOP_N = 5
+CACHE_TTL = 60 * 60  # 別人的收藏也會影響推薦，最多一小時後重算
+CACHE_KEY = 'recommend:{kind}:{user_id}'
+
+# (項目種類, model, M2M 欄位, User 端的 related_name)
+RELATIONS = [
+    ('tool', 'tools.Tool', 'favorites', 'saved_tools'),
+    ('article', 'tutorials.Article', 'favorites', 'saved_articles'),
+    ('article', 'tutorials.Article', 'likes', 'liked_articles'),
+]
+
+
+def item_key(kind, pk):
+    return f"{kind}:{pk}"
+
+
+def _model(kind):
+    return apps.get_model(next(label for k, label, _, _ in RELATIONS if k == kind))
+
+
+def _through(label, field):
+    return getattr(apps.get_model(label), field).through
+
+
+def user_items(user_id):
+    """回傳 Counter({item_key: 幾種關聯})；文章同時收藏又按讚時為 2"""
+    items = Counter()
+    for kind, label, field, _ in RELATIONS:
+        through = _through(label, field)
+        column = f"{apps.get_model(label)._meta.model_name}_id"
+        items.update(item_key(kind, pk) for pk in through.objects.filter(user_id=user_id).values_list(column, flat=True))
+    return items
+
+
+# --- 🔁 增量更新 ---
+def _bump(key, others, delta):
+    """key 與 others 兩兩的共同人數 (含 key 自己的總人數) 加上 delta"""
+    from .models import ItemCooccurrence
+
+    others = list(others)
+    pairs = [(key, key)] + [(key, other) for other in others] + [(other, key) for other in others]
+    pair_filter = Q(item=key, other__in=[key, *others]) | Q(item__in=others, other=key)
+    with transaction.atomic():
+        ItemCooccurrence.objects.filter(pair_filter).update(count=F('count') + delta)
+        if delta > 0:
+            existing = set(ItemCooccurrence.objects.filter(pair_filter).values_list('item', 'other'))
+            ItemCooccurrence.objects.bulk_create(
+                [ItemCooccurrence(item=item, other=other, count=delta) for item, other in pairs if (item, other) not in existing],
+                ignore_conflicts=True,
+            )
+        else:
+            ItemCooccurrence.objects.filter(pair_filter, count__lte=0).delete()
+
+
+def apply_changes(user_id, keys, delta):
+    """使用者新增 (delta=1) 或移除 (delta=-1) 了 keys 這些項目 (資料庫已是異動後的狀態)"""
+    current = user_items(user_id)
+    remaining = list(dict.fromkeys(keys))
+    while remaining:
+        key = remaining.pop()
+        if delta > 0:
+            if current[key] > 1:
+                continue  # 已經透過另一種關聯 (收藏 / 按讚) 算過
+            others = set(current) - set(remaining) - {key}
+        else:
+            if current[key] > 0:
+                continue  # 仍然透過另一種關聯持有這個項目
+            others = (set(current) | set(remaining)) - {key}
+        _bump(key, others, delta)
+    invalidate(user_id)
+
+
+def safe_apply(user_id, keys, delta):
+    try:
+        apply_changes(user_id, keys, delta)
+    except DatabaseError as e:
+        # 推薦矩陣寫不進去不該讓收藏失敗，之後 rebuild_recommendations 即可補齊
+        print(f"⚠️ 推薦矩陣更新失敗 (user #{user_id})：{e}")
+
+
+def rebuild(batch_size=1000):
+    """依目前所有收藏 / 按讚重算整個矩陣，回傳非零格數"""
+    from .models import ItemCooccurrence
+
+    users = defaultdict(set)
+    for kind, label, field, _ in RELATIONS:
+        column = f"{apps.get_model(label)._meta.model_name}_id"
+        for user_id, pk in _through(label, field).objects.values_list('user_id', column):
+            users[user_id].add(item_key(kind, pk))
+
+    counts = Counter()
+    for items in users.values():
+        for item in items:
+            for other in items:
+                counts[(item, other)] += 1
+
+    with transaction.atomic():
+        ItemCooccurrence.objects.all().delete()
+        ItemCooccurrence.objects.bulk_create(
+            (ItemCooccurrence(item=item, other=other, count=count) for (item, other), count in counts.items()),
+            batch_size=batch_size,
+        )
+    cache.delete_many([CACHE_KEY.format(kind=kind, user_id=user_id) for user_id in users for kind in ('tool', 'article')])
+    return len(counts)
+
+
+# --- 🎯 推薦 ---
+def compute(user_id, kind='tool', n=TOP_N):
+    """回傳推薦的 pk 清單 (依分數排序)；共同收藏不足 n 個時以熱門項目補滿"""
+    from .models import ItemCooccurrence
+
+    owned = user_items(user_id)
+    prefix = f"{kind}:"
+    scores = Counter()
+    if owned:
+        rows = ItemCooccurrence.objects.filter(item__in=list(owned), other__startswith=prefix).exclude(other__in=list(owned))
+        cooccurrence = list(rows.values_list('item', 'other', 'count'))
+        candidates = {other for _, other, _ in cooccurrence}
+        totals = dict(
+            ItemCooccurrence.objects.filter(item=F('other'), item__in=[*owned, *candidates]).values_list('item', 'count')
+        )
+        for item, other, count in cooccurrence:
+            scores[other] += count / math.sqrt(max(totals.get(item, 1), 1) * max(totals.get(other, 1), 1))
+
+    picked = [int(key.split(':', 1)[1]) for key, _ in scores.most_common(n)]
+    if len(picked) < n:
+        model = _model(kind)
+        exclude = picked + [int(key.split(':', 1)[1]) for key in owned if key.startswith(prefix)]
+        popular = model.objects.exclude(pk__in=exclude)
+        if kind == 'article':
+            popular = popular.filter(is_published=True)
+        picked += list(popular.order_by('-trending_score', '-views').values_list('pk', flat=True)[:n - len(picked)])
+    return picked
+
+
+def recommend(user, kind='tool', n=TOP_N):
+    """戰情室用：回傳推薦的物件清單 (top-N pk 快取在 cache)"""
+    key = CACHE_KEY.format(kind=kind, user_id=user.pk)
+    pks = cache.get(key)
+    if pks is None:
+        pks = compute(user.pk, kind, TOP_N)
+        cache.set(key, pks, CACHE_TTL)
+    objects = _model(kind).objects.in_bulk(pks[:n])
+    return [objects[pk] for pk in pks[:n] if pk in objects]
+
+
+def invalidate(user_id):
+    cache.delete_many([CACHE_KEY.format(kind=kind, user_id=user_id) for kind in ('tool', 'article')])
+
+
+# --- 🔄 收藏 / 按讚異動 (正向 tool.favorites.add(user) 與反向 user.saved_tools.add(tool) 都會觸發) ---
+def _on_m2m_changed(kind, field, related_name):
+    def receiver(sender, instance, action, reverse, pk_set, **kwargs):
+        stash_attr = f'_recommend_removed_{related_name}'
+        manager = getattr(instance, related_name if reverse else field)
+        if action in ('pre_clear', 'pre_remove'):
+            # 移除之後就查不到原本有哪些；remove() 的 pk_set 也可能含有本來就沒有的關聯
+            existing = manager.all() if action == 'pre_clear' else manager.filter(pk__in=pk_set)
+            setattr(instance, stash_attr, set(existing.values_list('pk', flat=True)))
+            return
+        if action in ('post_clear', 'post_remove'):
+            pk_set = getattr(instance, stash_attr, set())
+        elif action != 'post_add':
+            return
+        delta = 1 if action == 'post_add' else -1
+        if reverse:
+            # instance 是 User，pk_set 是工具 / 文章
+            safe_apply(instance.pk, [item_key(kind, pk) for pk in pk_set], delta)
+        else:
+            for user_id in pk_set:
+                safe_apply(user_id, [item_key(kind, instance.pk)], delta)
+    return receiver
+
+
+def connect_signals():
+    for kind, label, field, related_name in RELATIONS:
+        m2m_changed.connect(
+            _on_m2m_changed(kind, field, related_name),
+            sender=_through(label, field), weak=False,
+            dispatch_uid=f'recommend_{label}_{field}',
+        )
@@ -0,0 +1,484 @@
+"""
+全文檢索索引 (工具 / 文章 / 實驗室專案)
+
+- SQLite：FTS5 虛擬表，依 BM25 排序 (標題權重 10、內文 1)
+- PostgreSQL：tsvector + GIN 索引，依 ts_rank_cd 排序 (標題 A 權重、內文 B 權重)
+- 其他資料庫：search() 回傳 None，呼叫端退回原本的 icontains 查詢
+
+FTS5 / PostgreSQL 內建的斷詞器都不會切中文，所以寫入與查詢前先在 Python 端斷好詞：
+英數字詞整個保留，中文連續字串拆成單字 + 二元組 (bigram)，再以空白串起來交給資料庫。
+索引由 signal 即時同步，也可以用 python manage.py rebuild_search_index 整批重建。
+
+索引表同時存一份顯示用欄位 (原始標題、網址、分類、純文字摘錄)，
+搜尋頁只要讀目前這一頁的幾筆就能產生結果與高亮片段，不必載入完整的文章 HTML。
+"""
+import re
+import unicodedata
+from collections import Counter
+
+from django.apps import apps
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.signals import post_delete, post_save
+from django.urls import reverse
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import mark_safe
+
+from .title_index import normalize
+
+TABLE = 'core_search_fts'
+KINDS = {'tool': 1, 'article': 2, 'project': 3}
+MODELS = {'tool': 'tools.Tool', 'article': 'tutorials.Article', 'project': 'labs.LabProject'}
+MAX_RESULTS = 500
+MAX_QUERY_TOKENS = 32
+SEARCH_WINDOW = 200  # 綜合搜尋最多排序前 200 筆，再多的結果使用者也不會翻到
+EXCERPT_CHARS = 2000  # 索引中保留的純文字長度 (產生 snippet 用)
+SNIPPET_CHARS = 120
+
+_WORD_RE = re.compile(r'[a-z0-9][a-z0-9+#.]*|[㐀-鿿]+')
+
+SQL = {
+    'sqlite': {
+        'create': [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+            "kind UNINDEXED, object_id UNINDEXED, title, body, "
+            "display UNINDEXED, url UNINDEXED, label UNINDEXED, excerpt UNINDEXED, tokenize='unicode61')",
+        ],
+        'drop': [f"DROP TABLE IF EXISTS {TABLE}"],
+        'delete': f"DELETE FROM {TABLE} WHERE rowid = %s",
+        'insert': (
+            f"INSERT INTO {TABLE} (rowid, kind, object_id, title, body, display, url, label, excerpt) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"
+        ),
+        'clear': f"DELETE FROM {TABLE}",
+        'search': (
+            f"SELECT object_id, bm25({TABLE}, 0, 0, 10.0, 1.0) AS score FROM {TABLE} "
+            f"WHERE {TABLE} MATCH %s AND kind = %s ORDER BY score LIMIT %s"
+        ),
+        # 三種內容在同一張表、同一套 BM25 統計下評分，分數可以直接合併排序
+        'search_all': (
+            f"SELECT kind, object_id, bm25({TABLE}, 0, 0, 10.0, 1.0) AS score FROM {TABLE} "
+            f"WHERE {TABLE} MATCH %s AND kind IN ({{kinds}}) ORDER BY score LIMIT %s"
+        ),
+        'fetch': f"SELECT rowid, display, url, label, excerpt FROM {TABLE} WHERE rowid IN ({{ids}})",
+    },
+    'postgresql': {
+        'create': [
+            f"CREATE TABLE IF NOT EXISTS {TABLE} ("
+            "id bigint PRIMARY KEY, kind smallint NOT NULL, object_id bigint NOT NULL, "
+            "title text NOT NULL, body text NOT NULL, "
+            "display text NOT NULL, url text NOT NULL, label text NOT NULL, excerpt text NOT NULL, "
+            "document tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', body), 'B')) STORED)",
+            f"CREATE INDEX IF NOT EXISTS {TABLE}_document_idx ON {TABLE} USING GIN (document)",
+        ],
+        'drop': [f"DROP TABLE IF EXISTS {TABLE}"],
+        'delete': f"DELETE FROM {TABLE} WHERE id = %s",
+        'insert': (
+            f"INSERT INTO {TABLE} (id, kind, object_id, title, body, display, url, label, excerpt) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"
+        ),
+        'clear': f"DELETE FROM {TABLE}",
+        'search': (
+            f"SELECT object_id, ts_rank_cd(document, query) AS score "
+            f"FROM {TABLE}, to_tsquery('simple', %s) AS query "
+            f"WHERE document @@ query AND kind = %s ORDER BY score DESC LIMIT %s"
+        ),
+        'search_all': (
+            f"SELECT kind, object_id, ts_rank_cd(document, query) AS score "
+            f"FROM {TABLE}, to_tsquery('simple', %s) AS query "
+            f"WHERE document @@ query AND kind IN ({{kinds}}) ORDER BY score DESC LIMIT %s"
+        ),
+        'fetch': f"SELECT id, display, url, label, excerpt FROM {TABLE} WHERE id IN ({{ids}})",
+    },
+}
+
+
+# --- ✂️ 斷詞 ---
+def tokenize(text):
+    """'Notion 入門教學' → ['notion', '入', '門', '教', '學', '入門', '門教', '教學']"""
+    tokens = []
+    for word in _WORD_RE.findall(normalize(text)):
+        if word[0].isascii():
+            tokens.append(word.rstrip('.'))
+        else:
+            tokens.extend(word)
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def query_tokens(query):
+    """查詢端只用 bigram (單一中文字才用單字)，英數字詞做前綴比對"""
+    tokens = []
+    for word in _WORD_RE.findall(normalize(query)):
+        if word[0].isascii():
+            tokens.append((word.rstrip('.'), True))
+        elif len(word) == 1:
+            tokens.append((word, False))
+        else:
+            tokens.extend((word[i:i + 2], False) for i in range(len(word) - 1))
+    return list(dict.fromkeys(tokens))[:MAX_QUERY_TOKENS]
+
+
+def match_expression(tokens, vendor):
+    if vendor == 'sqlite':
+        return ' '.join(f'"{token}"' + ('*' if prefix else '') for token, prefix in tokens)
+    return ' & '.join(f"'{token}'" + (':*' if prefix else '') for token, prefix in tokens)
+
+
+# --- 📄 各種物件要被索引的文字 ---
+def document(kind, obj):
+    if kind == 'tool':
+        title = f"{obj.name} {obj.aliases}"
+        body = f"{obj.category} {obj.description}"
+    elif kind == 'article':
+        title = obj.title
+        body = strip_tags(obj.content or '')
+    else:
+        tool_name = obj.related_tool.name if obj.related_tool_id else ''
+        title = obj.title
+        body = f"{tool_name} {obj.description} {strip_tags(obj.content or '')}"
+    return ' '.join(tokenize(title)), ' '.join(tokenize(body))
+
+
+def plain_text(html, limit=EXCERPT_CHARS):
+    text = unicodedata.normalize('NFKC', strip_tags(html or ''))
+    return ' '.join(text.split())[:limit]
+
+
+def _body_text(obj):
+    """內文被 defer 時 (搜尋結果頁) 用存檔時算好的摘錄，否則取完整純文字給索引用"""
+    if 'content' in obj.get_deferred_fields():
+        return obj.excerpt
+    return plain_text(obj.content)
+
+
+def display_fields(kind, obj):
+    """搜尋結果要顯示的 (標題, 網址, 分類標籤, 純文字摘錄)"""
+    if kind == 'tool':
+        return obj.name, reverse('tool_detail', args=[obj.slug]), obj.category, plain_text(obj.description)
+    if kind == 'article':
+        return obj.title, reverse('article_detail', args=[obj.slug]), obj.category, _body_text(obj)
+    tool_name = obj.related_tool.name if obj.related_tool_id else ''
+    excerpt = plain_text(f"{obj.description or ''} {_body_text(obj)}")
+    return obj.title, reverse('lab_detail', args=[obj.pk]), tool_name, excerpt
+
+
+def indexable(kind, obj):
+    """草稿文章不進索引 (搜尋只看得到已發布的文章)"""
+    return kind != 'article' or obj.is_published
+
+
+def doc_id(kind, pk):
+    return (KINDS[kind] << 40) | pk
+
+
+def _row(kind, obj):
+    return [doc_id(kind, obj.pk), KINDS[kind], obj.pk, *document(kind, obj), *display_fields(kind, obj)]
+
+
+def supported(conn=connection):
+    return conn.vendor in SQL
+
+
+# --- ✍️ 寫入 ---
+def create_index(conn=connection):
+    if not supported(conn):
+        return
+    with conn.cursor() as cursor:
+        for statement in SQL[conn.vendor]['create']:
+            cursor.execute(statement)
+
+
+def drop_index(conn=connection):
+    if not supported(conn):
+        return
+    with conn.cursor() as cursor:
+        for statement in SQL[conn.vendor]['drop']:
+            cursor.execute(statement)
+
+
+def index_object(kind, obj):
+    if not supported():
+        return
+    if not indexable(kind, obj):
+        return remove_object(kind, obj.pk)
+    sql = SQL[connection.vendor]
+    row_id = doc_id(kind, obj.pk)
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql['delete'], [row_id])
+            cursor.execute(sql['insert'], _row(kind, obj))
+    except DatabaseError as e:
+        # 索引寫不進去不該讓內容存檔失敗，之後 rebuild_search_index 即可補齊
+        print(f"⚠️ 搜尋索引更新失敗 ({kind} #{obj.pk})：{e}")
+
+
+def index_objects(kind, objs):
+    """bulk_create 不會觸發 post_save，批次寫入後由呼叫端補上索引"""
+    if not supported() or not objs:
+        return
+    sql = SQL[connection.vendor]
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql['delete'], [[doc_id(kind, obj.pk)] for obj in objs])
+            cursor.executemany(sql['insert'], [_row(kind, obj) for obj in objs if indexable(kind, obj)])
+    except DatabaseError as e:
+        print(f"⚠️ 搜尋索引批次更新失敗 ({kind})：{e}")
+
+
+def remove_object(kind, pk):
+    if not supported():
+        return
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(SQL[connection.vendor]['delete'], [doc_id(kind, pk)])
+    except DatabaseError as e:
+        print(f"⚠️ 搜尋索引刪除失敗 ({kind} #{pk})：{e}")
+
+
+def rebuild(models, conn=connection, batch_size=500):
+    """models: {kind: model class}；清空後整批重建，回傳各類筆數"""
+    counts = {}
+    sql = SQL[conn.vendor]
+    with transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+        cursor.execute(sql['clear'])
+        for kind, model in models.items():
+            queryset = model.objects.using(conn.alias)
+            if kind == 'article':
+                queryset = queryset.filter(is_published=True)
+            if kind == 'project':
+                queryset = queryset.select_related('related_tool')
+            rows = []
+            counts[kind] = 0
+            for obj in queryset.iterator(chunk_size=batch_size):
+                rows.append(_row(kind, obj))
+                if len(rows) >= batch_size:
+                    cursor.executemany(sql['insert'], rows)
+                    counts[kind] += len(rows)
+                    rows = []
+            if rows:
+                cursor.executemany(sql['insert'], rows)
+                counts[kind] += len(rows)
+    return counts
+
+
+# --- 🔍 查詢 ---
+def search(kind, query, limit=MAX_RESULTS):
+    """回傳 [(object_id, score)] 依相關度排序；資料庫不支援或查詢無有效詞彙時回傳 None"""
+    tokens = query_tokens(query)
+    if not tokens or not supported():
+        return None
+    sql = SQL[connection.vendor]
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql['search'], [match_expression(tokens, connection.vendor), KINDS[kind], limit])
+            return cursor.fetchall()
+    except DatabaseError:
+        return None
+
+
+def rank_queryset(queryset, kind, query, limit=MAX_RESULTS):
+    """把 queryset 限縮成命中的物件並依相關度排序；無法使用索引時回傳 None"""
+    hits = search(kind, query, limit)
+    if hits is None:
+        return None
+    ids = [object_id for object_id, _ in hits]
+    if not ids:
+        return queryset.none()
+    order = Case(*[When(pk=pk, then=Value(i)) for i, pk in enumerate(ids)], output_field=IntegerField())
+    return queryset.filter(pk__in=ids).order_by(order)
+
+
+# --- 🧭 綜合搜尋 (工具 + 文章 + 專案 合併排序、分頁) ---
+FALLBACK_FILTERS = {
+    'tool': lambda q: Q(name__icontains=q) | Q(aliases__icontains=q) | Q(description__icontains=q) | Q(category__icontains=q),
+    'article': lambda q: Q(is_published=True) & (Q(title__icontains=q) | Q(content__icontains=q)),
+    'project': lambda q: Q(title__icontains=q) | Q(description__icontains=q) | Q(related_tool__name__icontains=q),
+}
+
+
+def search_all(query, kinds=None, window=SEARCH_WINDOW):
+    """回傳前 window 筆 [(kind, object_id)]，依相關度合併排序；不支援全文索引時回傳 None"""
+    tokens = query_tokens(query)
+    if not tokens or not supported():
+        return None
+    kinds = list(kinds or KINDS)
+    names = {number: kind for kind, number in KINDS.items()}
+    sql = SQL[connection.vendor]['search_all'].format(kinds=', '.join(['%s'] * len(kinds)))
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, [match_expression(tokens, connection.vendor), *[KINDS[k] for k in kinds], window])
+            return [(names[kind], object_id) for kind, object_id, _ in cursor.fetchall()]
+    except DatabaseError:
+        return None
+
+
+def fallback_search(query, kinds=None, window=SEARCH_WINDOW):
+    """沒有全文索引時用 icontains 逐類查詢 (只取 pk)，依 工具 → 文章 → 專案 串接"""
+    hits = []
+    for kind in kinds or KINDS:
+        model = apps.get_model(MODELS[kind])
+        pks = model.objects.filter(FALLBACK_FILTERS[kind](query)).order_by('-pk').values_list('pk', flat=True)[:window]
+        hits.extend((kind, pk) for pk in pks)
+    return hits[:window]
+
+
+def highlight_pattern(query):
+    """查詢詞的正規表示式：完整中文詞優先，其次 bigram / 單字；英數字詞做前綴比對"""
+    terms = []
+    for word in _WORD_RE.findall(normalize(query)):
+        if word[0].isascii():
+            terms.append(re.escape(word.rstrip('.')) + r'[a-z0-9]*')
+        else:
+            terms.append(re.escape(word))
+            terms.extend(re.escape(word[i:i + 2]) for i in range(len(word) - 1))
+    terms = sorted(set(terms), key=len, reverse=True)
+    return re.compile('|'.join(terms), re.IGNORECASE) if terms else None
+
+
+def highlight(text, pattern):
+    """跳脫 HTML 後把命中的詞包進 <mark>"""
+    if not pattern:
+        return escape(text)
+    parts, last = [], 0
+    for match in pattern.finditer(text):
+        parts.append(escape(text[last:match.start()]))
+        parts.append(f"<mark>{escape(match.group())}</mark>")
+        last = match.end()
+    parts.append(escape(text[last:]))
+    return mark_safe(''.join(parts))
+
+
+def snippet(text, pattern, length=SNIPPET_CHARS):
+    """從第一個命中處往前留一點上下文，截出 length 字的片段並高亮"""
+    match = pattern.search(text) if pattern else None
+    start = max(0, match.start() - length // 4) if match else 0
+    end = min(len(text), start + length)
+    start = max(0, end - length)
+    body = highlight(text[start:end], pattern)
+    return mark_safe(f"{'…' if start else ''}{body}{'…' if end < len(text) else ''}")
+
+
+def _display_rows(hits, from_index):
+    """只讀出這一頁要顯示的欄位：{(kind, pk): (標題, 網址, 標籤, 摘錄)}"""
+    if not hits:
+        return {}
+    if from_index:
+        ids = [doc_id(kind, pk) for kind, pk in hits]
+        names = {number: kind for kind, number in KINDS.items()}
+        sql = SQL[connection.vendor]['fetch'].format(ids=', '.join(['%s'] * len(ids)))
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(sql, ids)
+                return {(names[row_id >> 40], row_id & ((1 << 40) - 1)): tuple(rest) for row_id, *rest in cursor.fetchall()}
+        except DatabaseError:
+            pass  # 索引表不存在 (例如只建了語意索引)：改從物件本身讀
+    rows = {}
+    for kind in KINDS:
+        pks = [pk for k, pk in hits if k == kind]
+        if not pks:
+            continue
+        queryset = apps.get_model(MODELS[kind]).objects.all()
+        if kind != 'tool':
+            queryset = queryset.defer('content')
+        if kind == 'project':
+            queryset = queryset.select_related('related_tool')
+        for pk, obj in queryset.in_bulk(pks).items():
+            rows[(kind, pk)] = display_fields(kind, obj)
+    return rows
+
+
+RRF_K = 60
+
+
+def fuse(*rankings):
+    """Reciprocal Rank Fusion：只看名次不看分數，BM25 與餘弦相似度不必換算成同一尺度"""
+    scores = Counter()
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking):
+            scores[hit] += 1 / (RRF_K + rank + 1)
+    return [hit for hit, _ in scores.most_common()]
+
+
+def ranked_hits(query, kinds=None, window=SEARCH_WINDOW, mode='hybrid'):
+    """
+    mode: keyword (全文索引 / icontains)、semantic (本機語意索引)、hybrid (兩者以 RRF 合併)
+    語意索引尚未建立時一律只用關鍵字結果
+    """
+    keyword = []
+    if mode != 'semantic':
+        keyword = search_all(query, kinds, window)
+        if keyword is None:
+            keyword = fallback_search(query, kinds, window)
+    if mode == 'keyword':
+        return keyword
+
+    from . import semantic
+    similar = semantic.search(query, kinds, window)
+    if similar is None:
+        return keyword if mode == 'hybrid' else ranked_hits(query, kinds, window, 'keyword')
+    similar = [(kind, pk) for kind, pk, _ in similar]
+    if mode == 'semantic':
+        return similar
+    return fuse(keyword, similar)[:window]
+
+
+def unified_search(query, page=1, per_page=10, kind=None, window=SEARCH_WINDOW, mode='hybrid'):
+    """
+    綜合搜尋：合併排序後分頁，回傳 {'page', 'counts', 'total', 'truncated'}
+    page.object_list 是這一頁的結果 dict (kind, title, url, label, snippet)；
+    記憶體中只保留前 window 筆的 (kind, pk)，顯示欄位只讀這一頁。
+    """
+    kinds = [kind] if kind in KINDS else None
+    hits = ranked_hits(query, window=window, mode=mode)
+    counts = Counter(k for k, _ in hits)
+    truncated = len(hits) >= window
+    if kinds:
+        # 篩選單一類型時重新取前 window 筆，避免被其他類型擠出視窗
+        hits = ranked_hits(query, kinds, window, mode)
+
+    page_obj = Paginator(hits, per_page).get_page(page)
+    rows = _display_rows(list(page_obj.object_list), supported())
+    pattern = highlight_pattern(query)
+    results = []
+    for kind_name, pk in page_obj.object_list:
+        if (kind_name, pk) not in rows:
+            continue  # 索引尚未同步刪除的物件
+        title, url, label, excerpt = rows[(kind_name, pk)]
+        results.append({
+            'kind': kind_name,
+            'title': highlight(title, pattern),
+            'url': url,
+            'label': label,
+            'snippet': snippet(excerpt, pattern),
+        })
+    page_obj.object_list = results
+    return {
+        'page': page_obj,
+        'counts': {k: counts.get(k, 0) for k in KINDS},
+        'total': sum(counts.values()),
+        'truncated': truncated,
+    }
+
+
+# --- 🔄 即時同步 (只更新瀏覽數的 save 不重建) ---
+def _on_save(kind):
+    def receiver(sender, instance, update_fields=None, raw=False, **kwargs):
+        if raw or (update_fields and set(update_fields) <= {'views'}):
+            return
+        index_object(kind, instance)
+    return receiver
+
+
+def _on_delete(kind):
+    def receiver(sender, instance, **kwargs):
+        remove_object(kind, instance.pk)
+    return receiver
+
+
+def connect_signals():
+    for kind, model in MODELS.items():
+        post_save.connect(_on_save(kind), sender=model, weak=False, dispatch_uid=f'search_index_save_{kind}')
+        post_delete.connect(_on_delete(kind), sender=model, weak=False, dispatch_uid=f'search_index_delete_{kind}')
@@ -0,0 +1,297 @@
+"""
+本機語意搜尋 (不連網：雜湊向量 + LSA 潛在語意，記憶體映射的 NumPy 矩陣)
+
+關鍵字搜尋找不到換句話說的查詢 (「怎麼做簡報」↔「Gamma 投影片教學」)。
+這裡不呼叫任何外部模型：
+1. 雜湊向量化：文字切成英數字詞 + 中文單字 / bigram (與全文檢索相同)，以 crc32 雜湊到固定維度
+2. LSA：對整批文件的 TF-IDF 矩陣做截斷 SVD，把常一起出現的詞 (簡報、投影片) 投影到相近的方向
+3. 文件向量 (每列已正規化) 存成 .npy，以 mmap 開啟，查詢時整批內積 (暴力搜尋，幾千筆只要幾毫秒)
+
+rebuild_semantic_index 會重新訓練 SVD 並重算所有向量；之後單筆存檔 / 刪除由 signal
+以現有的投影矩陣「折入」(fold-in) 更新對應的那一列，不必重新訓練。
+各 web worker 與 run_writer_jobs 共用同一組 mmap 檔案，所有寫入都先拿索引目錄的檔案鎖
+(fcntl.flock)，拿到鎖後檔案若已被別的程序換掉 (擴充 / 重建) 就重新開啟，不會寫進舊檔。
+索引還沒建立時 search() 回傳 None，綜合搜尋只用關鍵字結果。
+"""
+import os
+import threading
+import uuid
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.utils.html import strip_tags
+
+from . import search as search_index
+from .file_lock import locked
+
+HASH_DIM = 1 << 15
+DIM = 128
+DOCS_PER_DIM = 10  # 文件少時維度也要少，LSA 才會把同主題的詞合併到同一個方向
+MIN_DOCUMENTS = 3
+MIN_SIMILARITY = 0.3  # 低於這個分數的語意結果不列入
+TEXT_CHARS = 5000
+CACHE_VERSION_KEY = 'semantic_index:version'
+
+_lock = threading.Lock()
+_index = None
+_loaded_version = None
+
+
+def index_dir():
+    return os.fspath(getattr(settings, 'SEMANTIC_INDEX_DIR', settings.BASE_DIR / 'semantic_index'))
+
+
+def _path(name):
+    return os.path.join(index_dir(), name)
+
+
+def _stamp():
+    """vectors / keys 檔案的 inode：換檔 (os.replace) 後就不同"""
+    try:
+        return tuple(os.stat(_path(name)).st_ino for name in ('vectors.npy', 'keys.npy'))
+    except OSError:
+        return None
+
+
+@contextmanager
+def _writing():
+    """寫入鎖：同一程序內用 _lock，跨程序用索引目錄裡的 .lock 檔"""
+    with _lock, locked(_path('.lock')):
+        yield
+
+
+# --- ✂️ 雜湊向量 ---
+def text_for(kind, obj):
+    if kind == 'tool':
+        return f"{obj.name} {obj.aliases} {obj.category} {obj.description}"
+    if kind == 'article':
+        return f"{obj.title} {obj.title} {obj.category} {strip_tags(obj.content or '')[:TEXT_CHARS]}"
+    tool_name = obj.related_tool.name if obj.related_tool_id else ''
+    return f"{obj.title} {tool_name} {obj.prompt_text} {obj.description} {strip_tags(obj.content or '')[:TEXT_CHARS]}"
+
+
+def hashed(text):
+    """回傳 {bucket: 1 + log(tf)}"""
+    counts = {}
+    for token in search_index.tokenize(text):
+        bucket = zlib.crc32(token.encode('utf-8')) % HASH_DIM
+        counts[bucket] = counts.get(bucket, 0) + 1
+    return {bucket: 1 + np.log(tf) for bucket, tf in counts.items()}
+
+
+def _sparse_rows(features, idf=None):
+    from scipy.sparse import csr_matrix
+
+    rows, cols, values = [], [], []
+    for row, feature in enumerate(features):
+        for bucket, weight in feature.items():
+            rows.append(row)
+            cols.append(bucket)
+            values.append(weight)
+    matrix = csr_matrix((values, (rows, cols)), shape=(len(features), HASH_DIM), dtype=np.float32)
+    if idf is not None:
+        matrix = matrix.multiply(idf.reshape(1, -1)).tocsr()
+    return matrix
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return (vectors / norms).astype(np.float32)
+
+
+# --- 📦 索引檔 ---
+class SemanticIndex:
+    """components (HASH_DIM × DIM)、idf、vectors (容量 × DIM) 與對應的 keys (doc_id，0 表示空列)"""
+
+    def __init__(self):
+        self.components = np.load(_path('components.npy'), mmap_mode='r')
+        self.idf = np.load(_path('idf.npy'))
+        self.vectors = np.load(_path('vectors.npy'), mmap_mode='r+')
+        self.keys = np.load(_path('keys.npy'), mmap_mode='r+')
+        self.stamp = _stamp()
+
+    def current(self):
+        return self.stamp == _stamp()
+
+    def embed(self, texts):
+        matrix = _sparse_rows([hashed(text) for text in texts], self.idf)
+        return _normalize(np.asarray(matrix @ self.components))
+
+    def search(self, query, kinds, limit):
+        scores = self.vectors @ self.embed([query])[0]
+        allowed = np.isin(self.keys >> 40, [search_index.KINDS[kind] for kind in kinds]) & (self.keys != 0)
+        scores = np.where(allowed & (scores >= MIN_SIMILARITY), scores, -1)
+        top = np.argsort(-scores)[:limit]
+        names = {number: kind for kind, number in search_index.KINDS.items()}
+        mask = (1 << 40) - 1
+        return [(names[int(self.keys[i]) >> 40], int(self.keys[i]) & mask, float(scores[i])) for i in top if scores[i] >= 0]
+
+    def put(self, key, vector):
+        rows = np.flatnonzero(self.keys == key)
+        if not len(rows):
+            rows = np.flatnonzero(self.keys == 0)
+        if not len(rows):
+            self.grow()
+            rows = np.flatnonzero(self.keys == 0)
+        self.vectors[rows[0]] = vector
+        self.keys[rows[0]] = key
+        self.flush()
+
+    def remove(self, key):
+        rows = np.flatnonzero(self.keys == key)
+        if len(rows):
+            self.keys[rows] = 0
+            self.vectors[rows] = 0
+            self.flush()
+
+    def grow(self):
+        """容量用完時加倍 (呼叫端須持有寫入鎖；換檔後通知其他程序重新開啟)"""
+        capacity = max(len(self.keys) * 2, 64)
+        _write_array('vectors.npy', np.vstack([self.vectors, np.zeros((capacity - len(self.keys), DIM), np.float32)]))
+        _write_array('keys.npy', np.concatenate([self.keys, np.zeros(capacity - len(self.keys), np.int64)]))
+        self.vectors = np.load(_path('vectors.npy'), mmap_mode='r+')
+        self.keys = np.load(_path('keys.npy'), mmap_mode='r+')
+        self.stamp = _stamp()
+        cache.set(CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+
+    def flush(self):
+        self.vectors.flush()
+        self.keys.flush()
+
+
+def _write_array(name, array):
+    """先寫暫存檔再換名，其他程序不會讀到寫一半的檔案"""
+    tmp = _path(f".{name}.tmp")
+    with open(tmp, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp, _path(name))
+
+
+def exists():
+    return all(os.path.exists(_path(name)) for name in ('components.npy', 'idf.npy', 'vectors.npy', 'keys.npy'))
+
+
+def get_index():
+    """索引不存在時回傳 None；其他程序重建 / 擴充過就重新開啟"""
+    global _index, _loaded_version
+    version = cache.get_or_set(CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+    if _index is None or version != _loaded_version:
+        with _lock:
+            if _index is None or version != _loaded_version:
+                _index = SemanticIndex() if exists() else None
+                _loaded_version = version
+    return _index
+
+
+# --- 🧱 整批重建 ---
+def rebuild(models):
+    """models: {kind: model class}；訓練 LSA 並寫出所有向量，回傳 (文件數, 維度)"""
+    from scipy.sparse.linalg import svds
+
+    keys, features = [], []
+    for kind, model in models.items():
+        queryset = model.objects.all()
+        if kind == 'article':
+            queryset = queryset.filter(is_published=True)
+        if kind == 'project':
+            queryset = queryset.select_related('related_tool')
+        for obj in queryset.iterator(chunk_size=500):
+            keys.append(search_index.doc_id(kind, obj.pk))
+            features.append(hashed(text_for(kind, obj)))
+    if len(keys) < MIN_DOCUMENTS:
+        return len(keys), 0
+
+    tf = _sparse_rows(features)
+    df = np.bincount(tf.indices, minlength=HASH_DIM)
+    idf = np.log((len(keys) + 1) / (df + 1)).astype(np.float32) + 1
+    weighted = tf.multiply(idf.reshape(1, -1)).tocsr()
+
+    k = min(DIM, len(keys) - 1, max(2, len(keys) // DOCS_PER_DIM))
+    _, _, vt = svds(weighted, k=k)
+    components = np.zeros((HASH_DIM, DIM), np.float32)
+    components[:, :k] = vt.T
+    vectors = _normalize(np.asarray(weighted @ components))
+
+    os.makedirs(index_dir(), exist_ok=True)
+    capacity = max(64, int(len(keys) * 1.25))
+    padded = np.zeros((capacity, DIM), np.float32)
+    padded[:len(keys)] = vectors
+    padded_keys = np.zeros(capacity, np.int64)
+    padded_keys[:len(keys)] = keys
+    with _writing():
+        _write_array('components.npy', components)
+        _write_array('idf.npy', idf)
+        _write_array('vectors.npy', padded)
+        _write_array('keys.npy', padded_keys)
+        cache.set(CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+    return len(keys), k
+
+
+# --- 🔍 查詢 ---
+def search(query, kinds=None, limit=search_index.SEARCH_WINDOW):
+    """回傳 [(kind, object_id, 相似度)]；索引不存在時回傳 None"""
+    index = get_index()
+    if index is None or not query.strip():
+        return None
+    return index.search(query, list(kinds or search_index.KINDS), limit)
+
+
+# --- 🔄 單筆更新 (以現有投影矩陣折入，不重新訓練) ---
+def _writable(index):
+    """持有寫入鎖時呼叫：別的程序擴充 / 重建過就重新開啟，回傳最新的索引"""
+    global _index
+    if not index.current():
+        _index = index = SemanticIndex()
+    return index
+
+
+def update_object(kind, obj):
+    index = get_index()
+    if index is None:
+        return
+    key = search_index.doc_id(kind, obj.pk)
+    try:
+        with _writing():
+            index = _writable(index)
+            if search_index.indexable(kind, obj):
+                index.put(key, index.embed([text_for(kind, obj)])[0])
+            else:
+                index.remove(key)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 語意索引更新失敗 ({kind} #{obj.pk})：{e}")
+
+
+def remove_object(kind, pk):
+    index = get_index()
+    if index is None:
+        return
+    try:
+        with _writing():
+            _writable(index).remove(search_index.doc_id(kind, pk))
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 語意索引刪除失敗 ({kind} #{pk})：{e}")
+
+
+def _on_save(kind):
+    def receiver(sender, instance, update_fields=None, raw=False, **kwargs):
+        if raw or (update_fields and set(update_fields) <= {'views'}):
+            return
+        update_object(kind, instance)
+    return receiver
+
+
+def _on_delete(kind):
+    def receiver(sender, instance, **kwargs):
+        remove_object(kind, instance.pk)
+    return receiver
+
+
+def connect_signals():
+    for kind, model in search_index.MODELS.items():
+        post_save.connect(_on_save(kind), sender=model, weak=False, dispatch_uid=f'semantic_index_save_{kind}')
+        post_delete.connect(_on_delete(kind), sender=model, weak=False, dispatch_uid=f'semantic_index_delete_{kind}')
@@ -0,0 +1,57 @@
+"""
+批次配發唯一網址 Slug (中文友善)
+
+舊寫法是每個候選 slug 各查一次 exists()：python-教學、python-教學-1、python-教學-2 ...
+這裡把一批標題的 base slug 一次查出所有「base 或 base-數字」的既有 slug，
+在記憶體中直接算出下一個可用編號。
+
+配發結果仍可能與同時進行的另一個請求撞號，呼叫端應在 transaction 中寫入，
+遇到 IntegrityError 時重新配發 (見 labs.views.publish_projects)。
+"""
+import re
+import uuid
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from django.utils.text import slugify
+
+QUERY_CHUNK = 200  # 每次查詢最多帶幾個 base，避免 SQLite 運算式深度上限
+SUFFIX_RESERVE = 6  # 保留給 "-12345" 的長度
+
+
+def base_slug(title, max_length=50):
+    base = slugify(title, allow_unicode=True)[:max_length - SUFFIX_RESERVE].strip('-')
+    # 萬一標題全是特殊符號，回退到隨機碼
+    return base or f"ai-{uuid.uuid4().hex[:8]}"
+
+
+def allocate_slugs(titles, model, field='slug'):
+    """依 titles 順序回傳不重複的 slug 清單 (同一批內的重複標題也會各自編號)"""
+    max_length = model._meta.get_field(field).max_length or 50
+    bases = [base_slug(title, max_length) for title in titles]
+
+    taken = set()
+    unique_bases = sorted(set(bases))
+    for i in range(0, len(unique_bases), QUERY_CHUNK):
+        chunk = unique_bases[i:i + QUERY_CHUNK]
+        condition = reduce(or_, (Q(**{f"{field}__startswith": f"{base}-"}) for base in chunk), Q(**{f"{field}__in": chunk}))
+        taken.update(model.objects.filter(condition).values_list(field, flat=True))
+
+    # 每個 base 目前用到的最大編號
+    next_number = {}
+    for base in unique_bases:
+        pattern = re.compile(rf"^{re.escape(base)}-(\d+)$")
+        numbers = [int(match.group(1)) for match in map(pattern.match, taken) if match]
+        next_number[base] = max(numbers, default=0) + 1
+
+    slugs = []
+    for base in bases:
+        if base not in taken:
+            slug = base
+        else:
+            slug = f"{base}-{next_number[base]}"
+            next_number[base] += 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
@@ -0,0 +1,229 @@
+"""
+公開頁面的靜態預先渲染 (給 nginx / CDN 直接服務未登入的讀者)
+
+python manage.py export_static 會把所有工具詳情、已發布文章詳情，以及工具 / 文章列表的每一頁
+以「未登入訪客」的身分走一遍完整的 Django 流程，寫成 STATIC_EXPORT_DIR 底下的 HTML：
+    /tool/<slug>/         → tool/<slug>/index.html
+    /tools/?page=2        → tools/page/2/index.html
+靜態檔一併收集到 STATIC_EXPORT_DIR/static，檔名帶內容雜湊 (ManifestStaticFilesStorage)，
+HTML 裡的 /static/... 改寫成雜湊後的檔名，CDN 可以設很長的快取時間。
+
+增量輸出：每一頁算一個「指紋」(該筆資料的欄位 + 頁面上用到的留言 / 提示詞 / 相關文章等)，
+和上次記在 .export-state.json 的指紋相同就不重新渲染；模板或靜態檔有變動時全部重來。
+瀏覽數、收藏 / 按讚數、熱門分數不算進指紋 (否則每次都要全部重算)，定期加 --full 整批重建即可。
+已刪除 / 取消發布的頁面會從輸出目錄移除。
+
+nginx 範例 (有 page 以外的查詢參數、或已登入 (有 sessionid cookie) 時交給 Django)：
+    location ~ ^/(tool|tutorial|tools|tutorials)/ {
+        if ($cookie_sessionid) { proxy_pass http://django; }
+        if ($args ~ "^page=(\\d+)$") { rewrite ^/(tools|tutorials)/$ /$1/page/$arg_page/ break; }
+        if ($args) { proxy_pass http://django; }
+        root /path/to/static_export;
+        try_files $uri/index.html @django;
+    }
+使用者上傳的圖片仍是 /media/... 網址，由 nginx 直接對應 MEDIA_ROOT。
+"""
+import hashlib
+import json
+import math
+import os
+import re
+from pathlib import Path
+from urllib.parse import quote, unquote, urlsplit
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.db.models import Count, Max
+from django.test import Client
+from django.urls import reverse
+
+from . import conditional, view_counter
+
+STATE_FILE = '.export-state.json'
+IGNORE_PATTERNS = ['CVS', '.*', '*~']
+# 指紋看 auto_now 的 updated_at 就知道內容有沒有改；計數類欄位 (views、favorite_count…) 以 update() 寫入，不影響它
+TOOL_FIELDS = ['id', 'slug', 'updated_at']
+ARTICLE_FIELDS = ['id', 'slug', 'updated_at', 'related_tool_id']
+
+
+def _digest(*parts):
+    return hashlib.md5(json.dumps(parts, default=str, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+# --- 🎨 靜態檔 (雜湊檔名) ---
+def collect_static(root):
+    """把所有靜態檔收集到 root/static 並產生雜湊檔名，回傳 {原始路徑: 雜湊後路徑}"""
+    storage = ManifestStaticFilesStorage(location=root / 'static', base_url=settings.STATIC_URL)
+    found = {}
+    for finder in finders.get_finders():
+        for path, source in finder.list(IGNORE_PATTERNS):
+            found.setdefault(path, (source, path))
+
+    for path, (source, _) in found.items():
+        # 來源沒變就不再複製 (和 collectstatic 一樣比修改時間)
+        if storage.exists(path):
+            if storage.get_modified_time(path) >= source.get_modified_time(path):
+                continue
+            storage.delete(path)
+        with source.open(path) as f:
+            storage.save(path, f)
+
+    for name, hashed_name, processed in storage.post_process(found):
+        if isinstance(processed, Exception):
+            print(f"⚠️ 靜態檔雜湊失敗 (保留原檔名)：{name}：{processed}")
+    return dict(storage.hashed_files)
+
+
+def rewrite_static_urls(html, hashed_files):
+    prefix = settings.STATIC_URL
+    pattern = re.compile(re.escape(prefix) + r'([^"\'\s?#)]+)')
+
+    def replace(match):
+        hashed = hashed_files.get(unquote(match.group(1)))
+        return prefix + quote(hashed) if hashed else match.group(0)
+    return pattern.sub(replace, html)
+
+
+# --- 🔑 指紋 ---
+def _child_stats(model, fk, latest='id', **filters):
+    """parent id → (筆數, 最新一筆)：新增 / 刪除 / 修改子資料時會改變"""
+    rows = model.objects.filter(**filters).values(fk).annotate(n=Count('id'), last=Max(latest)).order_by()
+    return {row[fk]: (row['n'], row['last']) for row in rows}
+
+
+def build_fingerprint(hashed_files):
+    """模板內容 + 靜態檔雜湊；任一個變了，所有頁面都要重新渲染"""
+    return _digest(conditional.template_version(), hashed_files)
+
+
+def pages():
+    """回傳 {網址: 指紋}，涵蓋所有要輸出的頁面"""
+    from tools.views import TOOLS_PER_PAGE
+    from tutorials.views import ARTICLES_PER_PAGE
+
+    Tool = apps.get_model('tools.Tool')
+    Article = apps.get_model('tutorials.Article')
+
+    tools = {row['id']: row for row in Tool.objects.values(*TOOL_FIELDS)}
+    tool_prints = {pk: _digest(row) for pk, row in tools.items()}
+    articles = {row['id']: row for row in Article.objects.filter(is_published=True).values(*ARTICLE_FIELDS)}
+
+    # 詳情頁上顯示的關聯資料
+    comments = _child_stats(apps.get_model('tools.Comment'), 'tool_id')
+    tool_articles = _child_stats(Article, 'related_tool_id', latest='updated_at', is_published=True)
+    lab_projects = _child_stats(apps.get_model('labs.LabProject'), 'related_tool_id', latest='updated_at')
+    prompts = _child_stats(apps.get_model('tutorials.Prompt'), 'article_id', latest='id')
+    related = {}
+    for article_id, related_id in apps.get_model('tutorials.RelatedArticle').objects.order_by('rank').values_list('article_id', 'related_id'):
+        related.setdefault(article_id, []).append(related_id)
+    # 沒有相關文章索引時，詳情頁退回顯示最新文章
+    latest = list(Article.objects.filter(is_published=True).order_by('-created_at').values_list('id', flat=True)[:4])
+
+    def article_links(ids):
+        """頁面上列出的其他文章 (標題 + 連結)：改名 (updated_at) 或改 slug 都要重新渲染；未發布的不會顯示"""
+        return [(pk, articles[pk]['slug'], articles[pk]['updated_at']) for pk in ids if pk in articles]
+
+    result = {}
+    for pk, row in tools.items():
+        result[reverse('tool_detail', args=[row['slug']])] = _digest(
+            tool_prints[pk], comments.get(pk), tool_articles.get(pk), lab_projects.get(pk),
+        )
+    for pk, row in articles.items():
+        result[reverse('article_detail', args=[row['slug']])] = _digest(
+            row, prompts.get(pk), article_links(related.get(pk, [])) or article_links(latest), tool_prints.get(row['related_tool_id']),
+        )
+
+    # 列表頁：任何一筆變動就重算整個列表 (列表頁數量少)
+    listings = [
+        ('tool_list', TOOLS_PER_PAGE, len(tools), _digest(sorted(tool_prints.items()))),
+        ('article_list', ARTICLES_PER_PAGE, len(articles), _digest(sorted(articles.items()), sorted(tool_prints.items()))),
+    ]
+    for url_name, per_page, total, fingerprint in listings:
+        url = reverse(url_name)
+        for page in range(1, max(1, math.ceil(total / per_page)) + 1):
+            result[url if page == 1 else f"{url}?page={page}"] = fingerprint
+    return result
+
+
+# --- 📝 輸出 ---
+def output_path(root, url):
+    parts = urlsplit(url)
+    path = root / unquote(parts.path).strip('/')
+    page = dict(pair.split('=', 1) for pair in parts.query.split('&') if pair).get('page')
+    if page:
+        path = path / 'page' / page
+    return path / 'index.html'
+
+
+def _write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(content)
+    os.replace(tmp, path)  # nginx 不會讀到寫到一半的檔案
+
+
+def _remove(root, path):
+    path.unlink(missing_ok=True)
+    for parent in path.parents:
+        if parent == root or not parent.is_relative_to(root):
+            break
+        try:
+            parent.rmdir()
+        except OSError:
+            break
+
+
+def _load_state(root):
+    try:
+        return json.loads((root / STATE_FILE).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def export(root=None, full=False, host='localhost'):
+    """輸出 / 更新靜態頁面，回傳 {'rendered', 'skipped', 'removed', 'failed'} 筆數"""
+    root = Path(root or settings.STATIC_EXPORT_DIR)
+    root.mkdir(parents=True, exist_ok=True)
+    hashed_files = collect_static(root)
+    build = build_fingerprint(hashed_files)
+
+    state = _load_state(root)
+    previous = state.get('pages', {}) if state.get('build') == build and not full else {}
+    current = pages()
+    stats = {'rendered': 0, 'skipped': 0, 'removed': 0, 'failed': 0}
+    done = {}
+
+    for url in set(state.get('pages', {})) - set(current):
+        _remove(root, output_path(root, url))
+        stats['removed'] += 1
+
+    client = Client(HTTP_HOST=host)
+    try:
+        # 輸出不算瀏覽次數
+        with view_counter.paused():
+            for url, fingerprint in current.items():
+                path = output_path(root, url)
+                if previous.get(url) == fingerprint and path.exists():
+                    done[url] = fingerprint
+                    stats['skipped'] += 1
+                    continue
+                try:
+                    response = client.get(url)
+                except Exception as e:
+                    print(f"⚠️ 靜態輸出失敗 {url}：{e}")
+                    stats['failed'] += 1
+                    continue
+                if response.status_code != 200:
+                    print(f"⚠️ 靜態輸出略過 {url}：HTTP {response.status_code}")
+                    stats['failed'] += 1
+                    continue
+                html = response.content.decode(response.charset or 'utf-8')
+                _write(path, rewrite_static_urls(html, hashed_files).encode('utf-8'))
+                done[url] = fingerprint
+                stats['rendered'] += 1
+    finally:
+        # 中途失敗也記下已完成的頁面，下次只補剩下的
+        _write(root / STATE_FILE, json.dumps({'build': build, 'pages': done}, ensure_ascii=False).encode('utf-8'))
+    return stats
@@ -0,0 +1,155 @@
+"""
+搜尋框自動完成 (前綴索引，常駐記憶體)
+
+把工具名稱 / 別名、已發布文章標題與分類整理成一份候選清單，
+每個「詞首」(英數字詞的開頭、中文字串中的每個字) 記成一個位置，依後綴字串排序成陣列。
+查詢時用二分搜尋找出以輸入字串開頭的區段，不必每次按鍵都查資料庫。
+
+陣列只存 (候選編號 << 8 | 起始位置) 的整數，文字本身只保留一份。
+Tool / Article 存檔或刪除時由 signal 換掉快取裡的版本號，各程序下次查詢時重建。
+"""
+import heapq
+import threading
+import uuid
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.urls import reverse
+
+from .title_index import normalize
+
+CACHE_VERSION_KEY = 'suggest_index:version'
+MAX_SUGGESTIONS = 8
+MAX_OFFSET = 255  # 起始位置存在低 8 位元，超過的詞首不建索引
+SCAN_LIMIT = 2000  # 很短的前綴 (例如單一字母) 最多只看這麼多個命中位置
+KIND_ORDER = {'tool': 0, 'category': 1, 'article': 2}
+
+_lock = threading.Lock()
+_index = None
+_built_version = None
+
+
+def word_starts(text):
+    """英數字詞只從詞首開始比對；中文沒有空白斷詞，每個字都可以是開頭"""
+    for i, ch in enumerate(text[:MAX_OFFSET + 1]):
+        if not ch.isalnum():
+            continue
+        if not ch.isascii() or i == 0 or not text[i - 1].isalnum() or not text[i - 1].isascii():
+            yield i
+
+
+class PrefixIndex:
+    def __init__(self, entries):
+        """entries: (比對用文字, 顯示文字, kind, 目標, 權重) 的序列；目標是網址或 (url name, slug)"""
+        self.entries = list(entries)
+        self.texts = [normalize(key) for key, *_ in self.entries]
+        positions = [(i << 8) | start for i, text in enumerate(self.texts) for start in word_starts(text)]
+        positions.sort(key=self._suffix)
+        self.positions = array('Q', positions)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _suffix(self, position):
+        return self.texts[position >> 8][position & 0xFF:]
+
+    def lookup(self, prefix, limit=MAX_SUGGESTIONS):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        lo = bisect_left(self.positions, prefix, key=self._suffix)
+        hi = bisect_left(self.positions, prefix + '\U0010ffff', lo=lo, key=self._suffix)
+
+        # 同一個候選可能在多個詞首命中，只留最前面的位置 (從開頭命中的排前面)
+        best = {}
+        for position in self.positions[lo:min(hi, lo + SCAN_LIMIT)]:
+            i, start = position >> 8, position & 0xFF
+            if i not in best or start < best[i]:
+                best[i] = start
+
+        def rank(i):
+            key, label, kind, target, weight = self.entries[i]
+            return (best[i] > 0, KIND_ORDER[kind], -weight, len(label))
+
+        seen, results = set(), []
+        for i in heapq.nsmallest(limit * 2, best, key=rank):
+            key, label, kind, target, weight = self.entries[i]
+            if (kind, target) in seen:
+                continue  # 工具名稱與別名同時命中
+            seen.add((kind, target))
+            # 網址等到真的要回傳時才 reverse (建索引時逐筆 reverse 太慢)
+            url = target if isinstance(target, str) else reverse(target[0], args=[target[1]])
+            results.append({'label': label, 'kind': kind, 'url': url})
+            if len(results) >= limit:
+                break
+        return results
+
+
+def build_entries():
+    from tools.models import Tool
+    from tutorials.models import Article
+    from .tool_matcher import split_aliases
+
+    entries = []
+    tool_categories = Counter()
+    for name, slug, aliases, category, views in Tool.objects.values_list('name', 'slug', 'aliases', 'category', 'views'):
+        target = ('tool_detail', slug)
+        entries.append((name, name, 'tool', target, views))
+        entries.extend((alias, name, 'tool', target, views) for alias in split_aliases(aliases))
+        tool_categories[category] += 1
+
+    article_categories = Counter()
+    for title, slug, category, views in Article.objects.filter(is_published=True).values_list('title', 'slug', 'category', 'views'):
+        entries.append((title, title, 'article', ('article_detail', slug), views))
+        article_categories[category] += 1
+
+    # 工具分類直接連到工具列表的篩選；只有文章用到的分類交給搜尋頁
+    for category, count in tool_categories.items():
+        url = f"{reverse('tool_list')}?{urlencode({'category': category})}"
+        entries.append((category, category, 'category', url, count))
+    for category, count in article_categories.items():
+        if category not in tool_categories:
+            entries.append((category, category, 'category', f"{reverse('search')}?{urlencode({'q': category})}", count))
+    return entries
+
+
+def get_index():
+    global _index, _built_version
+    version = cache.get_or_set(CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+    if _index is None or version != _built_version:
+        with _lock:
+            if _index is None or version != _built_version:
+                _index = PrefixIndex(build_entries())
+                _built_version = version
+    return _index
+
+
+def invalidate():
+    global _index
+    cache.set(CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+    _index = None
+
+
+def suggest(prefix, limit=MAX_SUGGESTIONS):
+    return get_index().lookup(prefix, limit)
+
+
+# --- 🔄 名稱 / 標題 / 分類異動時重建 (只更新瀏覽數的 save 不算) ---
+def _on_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and set(update_fields) <= {'views'}):
+        return
+    invalidate()
+
+
+def _on_delete(sender, instance, **kwargs):
+    invalidate()
+
+
+def connect_signals():
+    for model in ('tools.Tool', 'tutorials.Article'):
+        post_save.connect(_on_save, sender=model, weak=False, dispatch_uid=f'suggest_index_save_{model}')
+        post_delete.connect(_on_delete, sender=model, weak=False, dispatch_uid=f'suggest_index_delete_{model}')
@@ -0,0 +1,31 @@
+"""
+測試執行器：不讓測試碰到開發者真正的索引檔與共用快取
+
+測試裡建立的 Tool / Article 會觸發 signal：語意索引把測試用的 pk 寫進 SEMANTIC_INDEX_DIR 的向量檔，
+整頁快取 / 搜尋建議 / 語意索引換掉共用快取 (Redis 或 /var/tmp 檔案快取) 裡的版本號，
+詳情頁的瀏覽寫進 VIEW_BUFFER_DIR 的緩衝檔。
+這裡在整個測試期間把 CACHES 換成 LocMem、兩個目錄換成暫存目錄，結束後刪除。
+"""
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class IsolatedTestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.tmp_dir = Path(tempfile.mkdtemp(prefix='ai_navigator_test_'))
+        self.isolated = override_settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+            SEMANTIC_INDEX_DIR=self.tmp_dir / 'semantic_index',
+            VIEW_BUFFER_DIR=self.tmp_dir / 'view_buffer',
+        )
+        self.isolated.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.isolated.disable()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
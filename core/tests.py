@@ -1,3 +1,218 @@
-from django.test import TestCase
+import os
+import subprocess
+import sys
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from core import counters, trending, view_counter
+from core.models import DailyActivity
+from core.slugs import allocate_slugs
+from core.title_index import TitleIndex
+from core.tool_matcher import ToolMatcher
+from tools.models import Tool
+from tutorials.models import Article
+
+
+# --- 🏷️ 批次配發 Slug ---
+class AllocateSlugsTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user('writer')
+
+    def make_article(self, slug):
+        return Article.objects.create(title=slug, slug=slug, content='<p>內容</p>', author=self.author)
+
+    def test_unused_title_keeps_base_slug(self):
+        self.assertEqual(allocate_slugs(['Python 教學'], Article), ['python-教學'])
+
+    def test_collision_continues_after_highest_suffix(self):
+        self.make_article('python-教學')
+        self.make_article('python-教學-2')
+        self.assertEqual(allocate_slugs(['Python 教學'], Article), ['python-教學-3'])
+
+    def test_duplicate_titles_in_one_batch_get_their_own_suffix(self):
+        self.make_article('python-教學')
+        self.assertEqual(
+            allocate_slugs(['Python 教學', 'Python 教學', 'Notion'], Article),
+            ['python-教學-1', 'python-教學-2', 'notion'],
+        )
+
+    def test_longer_slug_sharing_the_prefix_is_not_a_suffix(self):
+        # python-教學-進階 以 "python-教學-" 開頭，但不是編號，不能算成已用掉的號碼
+        self.make_article('python-教學-進階')
+        self.assertEqual(allocate_slugs(['Python 教學'], Article), ['python-教學'])
+
+    def test_symbol_only_title_falls_back_to_random_slug(self):
+        [slug] = allocate_slugs(['!!!'], Article)
+        self.assertRegex(slug, r'^ai-[0-9a-f]{8}$')
+
+
+# --- 🔗 工具名稱比對 ---
+class ToolMatcherTests(SimpleTestCase):
+    def setUp(self):
+        self.matcher = ToolMatcher([
+            (1, 'Midjourney', 'MJ'),
+            (2, 'Notion', ''),
+            (3, 'Notion AI', ''),
+            (4, 'ChatGPT', '聊天機器人'),
+        ])
+
+    def test_ascii_alias_must_match_a_whole_word(self):
+        self.assertEqual(self.matcher.rank('把圖片轉成 mjpeg 格式'), [])
+        self.assertEqual(self.matcher.rank('用 MJ 畫圖'), [1])
+
+    def test_cjk_alias_matches_inside_text(self):
+        self.assertEqual(self.matcher.rank('打造自己的聊天機器人教學'), [4])
+
+    def test_longer_match_ranks_first(self):
+        # "notion ai" 同時命中 Notion 與 Notion AI，命中較長的排前面
+        self.assertEqual(self.matcher.rank('Notion AI 入門'), [3, 2])
+
+    def test_earlier_text_outranks_longer_match(self):
+        # 主題裡的 Notion 排第一；內文裡再依命中長度：Midjourney (10) > ChatGPT (7)
+        self.assertEqual(self.matcher.rank('Notion 技巧', 'ChatGPT 與 Midjourney'), [2, 1, 4])
+
+    def test_limit(self):
+        self.assertEqual(len(self.matcher.rank('Notion AI、MJ、ChatGPT', limit=2)), 2)
+
+
+# --- 🔁 標題去重 ---
+class TitleIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = TitleIndex(['Notion 入門教學', 'ChatGPT 提示詞技巧'])
+
+    def test_exact_match_ignores_case_and_fullwidth(self):
+        self.assertEqual(self.index.near_duplicate('ＮＯＴＩＯＮ 入門教學 '), 'Notion 入門教學')
+
+    def test_near_duplicate_at_threshold(self):
+        # 6 個詞彙裡有 4 個相同：Dice = 2*4 / (4+6) = 0.8
+        self.assertEqual(self.index.near_duplicate('Notion 入門教學指南'), 'Notion 入門教學')
+
+    def test_shared_tool_name_alone_is_not_a_duplicate(self):
+        self.assertIsNone(self.index.near_duplicate('Notion 進階技巧'))
+
+    def test_unrelated_title(self):
+        self.assertIsNone(self.index.near_duplicate('Python 自動化腳本'))
+
+    def test_adding_same_title_twice_is_ignored(self):
+        self.index.add('notion 入門教學')
+        self.assertEqual(len(self.index), 2)
+
+
+# --- ❤️ 收藏計數 ---
+class CountersTests(TestCase):
+    def setUp(self):
+        self.tool = Tool.objects.create(name='Notion', slug='notion', description='筆記工具')
+        self.alice = User.objects.create_user('alice')
+        self.bob = User.objects.create_user('bob')
+
+    def count(self, tool=None):
+        return Tool.objects.values_list('favorite_count', flat=True).get(pk=(tool or self.tool).pk)
+
+    def test_add_and_remove(self):
+        self.tool.favorites.add(self.alice, self.bob)
+        self.assertEqual(self.count(), 2)
+        self.tool.favorites.remove(self.alice)
+        self.assertEqual(self.count(), 1)
+
+    def test_removing_missing_link_does_not_go_negative(self):
+        self.tool.favorites.add(self.alice)
+        self.tool.favorites.remove(self.alice, self.bob)
+        self.tool.favorites.remove(self.alice)
+        self.assertEqual(self.count(), 0)
+
+    def test_clear(self):
+        self.tool.favorites.add(self.alice, self.bob)
+        self.tool.favorites.clear()
+        self.assertEqual(self.count(), 0)
+
+    def test_reverse_side_updates_each_tool(self):
+        other = Tool.objects.create(name='Canva', slug='canva', description='設計工具')
+        self.alice.saved_tools.add(self.tool, other)
+        self.assertEqual((self.count(), self.count(other)), (1, 1))
+        self.alice.saved_tools.clear()
+        self.assertEqual((self.count(), self.count(other)), (0, 0))
+
+    def test_toggle(self):
+        self.assertEqual(counters.toggle(self.tool, 'favorites', self.alice), (True, 1))
+        self.assertEqual(counters.toggle(self.tool, 'favorites', self.alice), (False, 0))
+        self.assertEqual(self.tool.favorite_count, 0)
+
+
+# --- 👀 瀏覽次數緩衝檔 ---
+@mock.patch.object(view_counter, '_ensure_worker')  # 由測試自己呼叫 flush()，不開背景執行緒
+class ViewCounterTests(TestCase):
+    def setUp(self):
+        self.tool = Tool.objects.create(name='Notion', slug='notion', description='筆記工具')
+        self.directory = view_counter.buffer_dir()
+
+    def views(self):
+        return Tool.objects.values_list('views', flat=True).get(pk=self.tool.pk)
+
+    def write_log(self, pid, text):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{view_counter.HOST}-{pid}-test.log"
+        path.write_text(text)
+        self.addCleanup(path.unlink, missing_ok=True)
+        return path
+
+    def test_flush_writes_buffered_views(self, _):
+        self.assertEqual(view_counter.record_view('tool', self.tool.pk), 1)
+        self.assertEqual(view_counter.record_view('tool', self.tool.pk), 2)
+        self.assertEqual(view_counter.flush(), 1)
+        self.assertEqual(self.views(), 2)
+        self.assertEqual(DailyActivity.objects.get(kind='tool', object_id=self.tool.pk).views, 2)
+        self.assertEqual([p.name for p in self.directory.iterdir()], ['.lock'])
+
+    def test_log_left_by_dead_process_is_recovered(self, _):
+        dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+        dead.wait()
+        path = self.write_log(dead.pid, f"tool {self.tool.pk}\n" * 3)
+        view_counter.flush()
+        self.assertEqual(self.views(), 3)
+        self.assertFalse(path.exists())
+
+    def test_log_of_running_process_is_left_alone(self, _):
+        path = self.write_log(os.getppid(), f"tool {self.tool.pk}\n")
+        view_counter.flush()
+        self.assertEqual(self.views(), 0)
+        self.assertTrue(path.exists())
+
+    def test_malformed_lines_are_skipped(self, _):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / 'x.sealed').write_text(f"tool {self.tool.pk}\nunknown 1\ntool\ntool {self.tool.pk}")
+        view_counter.flush()
+        self.assertEqual(self.views(), 2)
+
+
+# --- 🔥 熱門分數的收藏增減 ---
+class TrendingFavoriteTests(TestCase):
+    def setUp(self):
+        self.tool = Tool.objects.create(name='Notion', slug='notion', description='筆記工具')
+        self.user = User.objects.create_user('alice')
+
+    def favorites(self, tool=None):
+        row = DailyActivity.objects.filter(kind='tool', object_id=(tool or self.tool).pk).first()
+        return row.favorites if row else 0
+
+    def test_toggling_repeatedly_does_not_pump_score(self):
+        for _ in range(5):
+            counters.toggle(self.tool, 'favorites', self.user)
+            counters.toggle(self.tool, 'favorites', self.user)
+        self.assertEqual(self.favorites(), 0)
+        self.assertEqual(trending.scores()['tool'][self.tool.pk], 0)
+
+    def test_removing_missing_link_is_not_recorded(self):
+        self.tool.favorites.add(self.user)
+        self.tool.favorites.remove(self.user, User.objects.create_user('bob'))
+        self.tool.favorites.remove(self.user)
+        self.assertEqual(self.favorites(), 0)
+
+    def test_reverse_clear(self):
+        other = Tool.objects.create(name='Canva', slug='canva', description='設計工具')
+        self.user.saved_tools.add(self.tool, other)
+        self.user.saved_tools.remove(other)
+        self.assertEqual((self.favorites(), self.favorites(other)), (1, 0))
+        self.user.saved_tools.clear()
+        self.assertEqual(self.favorites(), 0)
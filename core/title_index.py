@@ -0,0 +1,99 @@
+"""
+標題相似度索引 (純 Python、常駐記憶體)
+
+中文沒有空白斷詞，所以用「英數字詞 + 中文字二元組 (bigram)」當作詞彙單位，
+以 Dice 係數計算兩個標題的相似度；倒排索引讓查詢只比對有共同詞彙的標題。
+"""
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+_WORD_RE = re.compile(r'[a-z0-9][a-z0-9+#.]*|[㐀-鿿]+')
+
+
+def normalize(text):
+    return unicodedata.normalize('NFKC', text or '').lower().strip()
+
+
+def terms(text):
+    """'Notion 入門教學' → {'notion', '入門', '門教', '教學'}"""
+    result = set()
+    for word in _WORD_RE.findall(normalize(text)):
+        if word[0].isascii():
+            result.add(word.rstrip('.'))
+        elif len(word) == 1:
+            result.add(word)
+        else:
+            result.update(word[i:i + 2] for i in range(len(word) - 1))
+    return result
+
+
+def dice(a, b):
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class TitleIndex:
+    def __init__(self, titles=()):
+        self.titles = []
+        self.term_sets = []
+        self.postings = defaultdict(set)
+        self.exact = {}
+        for title in titles:
+            self.add(title)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def add(self, title):
+        key = normalize(title)
+        if key in self.exact:
+            return
+        idx = len(self.titles)
+        self.titles.append(title)
+        self.exact[key] = title
+        term_set = terms(title)
+        self.term_sets.append(term_set)
+        for term in term_set:
+            self.postings[term].add(idx)
+
+    def similar(self, text, k=10):
+        """回傳與 text 最相近的 k 個 (分數, 標題)，分數由高到低"""
+        query = terms(text)
+        candidates = set()
+        for term in query:
+            candidates |= self.postings.get(term, set())
+        scored = [(dice(query, self.term_sets[i]), self.titles[i]) for i in candidates]
+        scored.sort(key=lambda pair: -pair[0])
+        return scored[:k]
+
+    def near_duplicate(self, title, threshold=NEAR_DUPLICATE_THRESHOLD):
+        """已有完全相同或高度相似的標題就回傳它，否則回傳 None"""
+        if normalize(title) in self.exact:
+            return self.exact[normalize(title)]
+        best = self.similar(title, k=1)
+        if best and best[0][0] >= threshold:
+            return best[0][1]
+        return None
+
+    def digest(self, top=12, exclude=()):
+        """整體摘要：篇數 + 最常出現的詞彙 (讓模型知道哪些方向已經寫過)"""
+        skip = set()
+        for text in exclude:
+            skip |= terms(text)
+        counts = Counter(term for term_set in self.term_sets for term in term_set if term not in skip)
+
+        # 「網頁發布」會拆出 網頁 / 頁發 / 發布，跳過與已選詞共用字的跨詞 bigram
+        common, used_chars = [], set()
+        for term, count in counts.most_common():
+            if count < 2 or len(common) >= top:
+                break
+            if not term.isascii():
+                if used_chars & set(term):
+                    continue
+                used_chars.update(term)
+            common.append(term)
+        return f"共 {len(self.titles)} 篇；常見主題詞：{'、'.join(common) or '無'}"
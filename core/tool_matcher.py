@@ -0,0 +1,146 @@
+"""
+工具名稱比對器 (Aho-Corasick 多模式字串比對)
+
+把所有工具名稱與別名編成一台自動機，掃描一次文字就找出所有被提到的工具，
+不用再對每個工具各做一次 substring 檢查；工具數量成長到上千個，成本也只跟文字長度有關。
+
+自動機常駐在每個程序的記憶體中；每次取用前先查一次 Tool 的「筆數 + 最新 updated_at」當版本，
+在後台改了名稱 / 別名 (或新增、刪除工具)，ai_writer、run_writer_jobs 與其他 web 程序下次取用時就會重建。
+版本直接看資料庫，不依賴快取後端是否跨程序共用。
+"""
+import threading
+from collections import deque
+
+from django.db.models import Count, Max
+
+from .title_index import normalize
+
+MIN_PATTERN_LENGTH = 2
+
+_lock = threading.Lock()
+_matcher = None
+_built_version = None
+
+
+class AhoCorasick:
+    """patterns: {字串: payload}；iter() 回傳所有命中的 (起始位置, 字串, payload)"""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for pattern, payload in patterns.items():
+            node = 0
+            for ch in pattern:
+                if ch not in self.goto[node]:
+                    self.goto[node][ch] = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                node = self.goto[node][ch]
+            self.out[node].append((pattern, payload))
+
+        # 以 BFS 建立失敗連結，並把失敗節點的輸出合併進來
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and ch not in self.goto[state]:
+                    state = self.fail[state]
+                target = self.goto[state].get(ch, 0)
+                self.fail[child] = target if target != child else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def iter(self, text):
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            for pattern, payload in self.out[node]:
+                yield i - len(pattern) + 1, pattern, payload
+
+
+def split_aliases(aliases):
+    return [alias.strip() for alias in (aliases or '').replace('，', ',').split(',') if alias.strip()]
+
+
+def _is_ascii_word_char(ch):
+    return ch.isascii() and ch.isalnum()
+
+
+def _on_word_boundary(text, start, end):
+    """英數別名要整個字命中 (避免 'mj' 命中 'mjpeg')；中文不受限"""
+    if start > 0 and _is_ascii_word_char(text[start]) and _is_ascii_word_char(text[start - 1]):
+        return False
+    if end < len(text) and _is_ascii_word_char(text[end - 1]) and _is_ascii_word_char(text[end]):
+        return False
+    return True
+
+
+class ToolMatcher:
+    def __init__(self, rows):
+        """rows: (pk, name, aliases) 的序列"""
+        patterns = {}
+        for pk, name, aliases in rows:
+            for alias in [name, *split_aliases(aliases)]:
+                key = normalize(alias)
+                if len(key) >= MIN_PATTERN_LENGTH:
+                    patterns.setdefault(key, set()).add(pk)
+        self.automaton = AhoCorasick(patterns)
+
+    def rank(self, *texts, limit=5):
+        """
+        texts 依重要性排列 (例如 主題, 內文)：在越前面的文字中命中的工具排越前面，
+        同一段內依命中長度總和、再依首次出現位置排序；回傳工具 pk 清單
+        """
+        hits = {}
+        for order, text in enumerate(texts):
+            text = normalize(text)
+            for start, pattern, pks in self.automaton.iter(text):
+                if not _on_word_boundary(text, start, start + len(pattern)):
+                    continue
+                for pk in pks:
+                    hit = hits.setdefault(pk, [order, 0, start])
+                    hit[1] += len(pattern)
+        ranked = sorted(hits, key=lambda pk: (hits[pk][0], -hits[pk][1], hits[pk][2]))
+        return ranked[:limit]
+
+
+def _db_version():
+    from tools.models import Tool
+    row = Tool.objects.aggregate(n=Count('id'), last=Max('updated_at'))
+    return row['n'], row['last']
+
+
+def get_matcher():
+    global _matcher, _built_version
+    version = _db_version()
+    if _matcher is None or version != _built_version:
+        with _lock:
+            if _matcher is None or version != _built_version:
+                from tools.models import Tool
+                _matcher = ToolMatcher(Tool.objects.values_list('pk', 'name', 'aliases'))
+                _built_version = version
+    return _matcher
+
+
+def invalidate():
+    """丟掉這個程序裡的自動機，下次取用時重建"""
+    global _matcher
+    _matcher = None
+
+
+def match_tools(*texts, limit=5):
+    """回傳依相關度排序的 Tool 物件"""
+    from tools.models import Tool
+    pks = get_matcher().rank(*texts, limit=limit)
+    tools = Tool.objects.in_bulk(pks)
+    return [tools[pk] for pk in pks if pk in tools]
+
+
+def best_tool(*texts):
+    matches = match_tools(*texts, limit=1)
+    return matches[0] if matches else None
@@ -0,0 +1,148 @@
+"""
+近期熱門排行 (每日活動量 + 指數衰減)
+
+累計的 views 只會越來越大，老工具永遠排在前面。這裡改看「最近」：
+- DailyActivity 記錄每個工具 / 文章 / 實驗室專案每天的瀏覽數與收藏淨增減
+  (瀏覽由 view_counter 批次寫回時一起累加；收藏由 m2m_changed 加減，反覆收藏 / 取消不會一直加分)
+- refresh() 把最近 WINDOW_DAYS 天的活動量依天數衰減 (半衰期 HALF_LIFE_DAYS 天) 加總，
+  寫進各 model 有索引的 trending_score 欄位
+
+首頁 / 列表頁直接 order_by('-trending_score')，不必在 request 裡彙總。
+由排程定時執行 python manage.py refresh_trending (例如每 15 分鐘)。
+"""
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.apps import apps
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed
+from django.utils import timezone
+
+from . import page_cache
+
+WINDOW_DAYS = 14
+HALF_LIFE_DAYS = 3
+FAVORITE_WEIGHT = 5  # 一次收藏約等於幾次瀏覽
+RETENTION_DAYS = 90  # 更舊的每日紀錄在 refresh 時刪除
+BATCH_SIZE = 500
+MODELS = {
+    'tool': 'tools.Tool',
+    'article': 'tutorials.Article',
+    'project': 'labs.LabProject',
+}
+# 會計入收藏增減的 M2M 關聯
+FAVORITE_RELATIONS = [
+    ('tool', 'tools.Tool', 'favorites'),
+    ('article', 'tutorials.Article', 'favorites'),
+]
+
+
+# --- ➕ 累加每日活動量 ---
+def record(kind, deltas, field='views', day=None):
+    """deltas: {object_id: 增量}；累加到今天 (或 day) 的 DailyActivity"""
+    from .models import DailyActivity
+
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    day = day or timezone.localdate()
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        by_delta[delta].append(pk)
+
+    with transaction.atomic():
+        rows = DailyActivity.objects.filter(kind=kind, day=day)
+        for delta, pks in by_delta.items():
+            rows.filter(object_id__in=pks).update(**{field: F(field) + delta})
+        existing = set(rows.filter(object_id__in=list(deltas)).values_list('object_id', flat=True))
+        DailyActivity.objects.bulk_create(
+            [DailyActivity(kind=kind, object_id=pk, day=day, **{field: max(delta, 0)})
+             for pk, delta in deltas.items() if pk not in existing],
+            ignore_conflicts=True,
+        )
+
+
+def safe_record(kind, deltas, field='views'):
+    try:
+        record(kind, deltas, field)
+    except DatabaseError as e:
+        # 熱門統計寫不進去不該影響收藏本身
+        print(f"⚠️ 每日活動量寫入失敗 ({kind} {field})：{e}")
+
+
+# --- 📈 重算熱門分數 ---
+def decay(age_days):
+    return 0.5 ** (age_days / HALF_LIFE_DAYS)
+
+
+def scores(today=None):
+    """回傳 {kind: {object_id: 分數}}"""
+    from .models import DailyActivity
+
+    today = today or timezone.localdate()
+    result = defaultdict(lambda: defaultdict(float))
+    rows = DailyActivity.objects.filter(day__gt=today - timedelta(days=WINDOW_DAYS), day__lte=today)
+    for kind, pk, day, views, favorites in rows.values_list('kind', 'object_id', 'day', 'views', 'favorites').iterator():
+        result[kind][pk] += (views + FAVORITE_WEIGHT * max(favorites, 0)) * decay((today - day).days)
+    return result
+
+
+def refresh(today=None):
+    """重算所有 trending_score 並清掉過期的每日紀錄；回傳有分數的物件數"""
+    from .models import DailyActivity
+
+    today = today or timezone.localdate()
+    all_scores = scores(today)
+    total = 0
+    with transaction.atomic():
+        for kind, label in MODELS.items():
+            model = apps.get_model(label)
+            fresh = {pk: round(score, 4) for pk, score in all_scores.get(kind, {}).items()}
+            # 已經掉出視窗的物件歸零，其餘只更新分數有變的
+            stale = model.objects.filter(trending_score__gt=0).exclude(pk__in=list(fresh))
+            stale.update(trending_score=0)
+            current = dict(model.objects.filter(pk__in=list(fresh)).values_list('pk', 'trending_score'))
+            changed = [model(pk=pk, trending_score=score) for pk, score in fresh.items()
+                       if pk in current and not math.isclose(current[pk], score)]
+            model.objects.bulk_update(changed, ['trending_score'], batch_size=BATCH_SIZE)
+            total += len(fresh)
+        DailyActivity.objects.filter(day__lt=today - timedelta(days=RETENTION_DAYS)).delete()
+    # bulk_update 不會觸發 signal，熱門排序變了要自己讓列表頁快取失效
+    page_cache.invalidate()
+    return total
+
+
+# --- ★ 收藏 +1 / 取消 -1 (正向 tool.favorites.add(user) 與反向 user.saved_tools.add(tool) 都算) ---
+def _on_favorite(kind, field, related_name):
+    def receiver(sender, instance, action, reverse, pk_set, **kwargs):
+        stash_attr = f'_trending_removed_{related_name}'
+        if action in ('pre_clear', 'pre_remove'):
+            # 移除之後就查不到原本有哪些；remove() 的 pk_set 也可能含有本來就沒有的關聯
+            manager = getattr(instance, related_name if reverse else field)
+            existing = manager.all() if action == 'pre_clear' else manager.filter(pk__in=pk_set)
+            setattr(instance, stash_attr, set(existing.values_list('pk', flat=True)))
+            return
+        if action in ('post_clear', 'post_remove'):
+            pk_set = getattr(instance, stash_attr, set())
+        elif action != 'post_add':
+            return
+        if not pk_set:
+            return
+        delta = 1 if action == 'post_add' else -1
+        if reverse:
+            safe_record(kind, {pk: delta for pk in pk_set}, 'favorites')
+        else:
+            safe_record(kind, {instance.pk: delta * len(pk_set)}, 'favorites')
+    return receiver
+
+
+def connect_signals():
+    for kind, label, field in FAVORITE_RELATIONS:
+        related_name = apps.get_model(label)._meta.get_field(field).remote_field.related_name
+        m2m_changed.connect(
+            _on_favorite(kind, field, related_name),
+            sender=getattr(apps.get_model(label), field).through, weak=False,
+            dispatch_uid=f'trending_{label}_{field}',
+        )
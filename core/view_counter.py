@@ -0,0 +1,196 @@
+"""
+瀏覽次數緩衝計數器
+
+詳情頁原本每次瀏覽都 obj.views += 1; obj.save()：讀-改-寫在併發下會掉次數，
+而且每一次瀏覽都是一筆寫入，SQLite 上就是 "database is locked" 的主要來源。
+
+這裡改成 record_view() 只在 VIEW_BUFFER_DIR 的緩衝檔「附加一行」(每個程序自己一個 .log，
+O_APPEND 寫進作業系統的檔案快取)：程序被 SIGKILL、OOM 或 max_requests 回收時已記下的瀏覽不會遺失。
+背景執行緒定時 (或累積夠多時) 把自己的 .log 封存成 .sealed 並換新檔，
+拿到目錄檔案鎖的那個程序再把所有封存檔 (和已結束程序留下的 .log) 彙總，依「相同增量」分組，
+以 UPDATE ... SET views = views + n WHERE id IN (...) 批次寫回，
+同時累加今天的 DailyActivity (見 core/trending.py)。
+寫回成功才刪檔，失敗時檔案留著下次再試；寫回與刪檔之間剛好當機的話那一批會重複計入 (寧可多算不要漏算)。
+update() 不會觸發 post_save，也不會動到 auto_now 的 updated_at。
+"""
+import atexit
+import os
+import socket
+import threading
+import uuid
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from . import trending
+from .file_lock import locked
+
+FLUSH_INTERVAL = 10.0  # 秒
+FLUSH_THRESHOLD = 500  # 累積這麼多次瀏覽就提早寫入
+MODELS = trending.MODELS
+HOST = socket.gethostname()
+
+# 這個程序尚未寫回的次數 (只給頁面顯示用，真正的紀錄在緩衝檔)
+_pending = Counter()
+_pending_views = 0
+_pending_lock = threading.Lock()
+_log = None  # (pid, fd, path)：fork 出來的子程序會另開自己的檔案
+_flush_lock = threading.Lock()
+_wake = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+_paused = False
+
+
+def buffer_dir():
+    return Path(getattr(settings, 'VIEW_BUFFER_DIR', settings.BASE_DIR / 'view_buffer'))
+
+
+def _open_log():
+    global _log
+    if _log is None or _log[0] != os.getpid():
+        directory = buffer_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{HOST}-{os.getpid()}-{uuid.uuid4().hex[:8]}.log"
+        _log = (os.getpid(), os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644), path)
+    return _log[1]
+
+
+def record_view(kind, pk):
+    """記一次瀏覽，回傳這個程序裡尚未寫回的次數 (頁面顯示 obj.views + 這個值)"""
+    global _pending_views
+    if _paused:
+        return 0
+    with _pending_lock:
+        try:
+            os.write(_open_log(), f"{kind} {pk}\n".encode('ascii'))
+        except OSError as e:
+            print(f"⚠️ 瀏覽次數寫入緩衝檔失敗：{e}")
+            return 0
+        _pending[(kind, pk)] += 1
+        _pending_views += 1
+        count, total = _pending[(kind, pk)], _pending_views
+    _ensure_worker()
+    if total >= FLUSH_THRESHOLD:
+        _wake.set()
+    return count
+
+
+@contextmanager
+def paused():
+    """區塊內的瀏覽不記錄 (整個程序生效；給 export_static 這類批次渲染用)"""
+    global _paused
+    _paused = True
+    try:
+        yield
+    finally:
+        _paused = False
+
+
+# --- 📦 封存與寫回 ---
+def _seal():
+    """把這個程序目前的 .log 封存成 .sealed，之後的瀏覽寫進新檔"""
+    global _log, _pending, _pending_views
+    with _pending_lock:
+        if _log is None or _log[0] != os.getpid():
+            return
+        _, fd, path = _log
+        _log = None
+        _pending, _pending_views = Counter(), 0
+        os.close(fd)
+        os.replace(path, path.with_suffix('.sealed'))
+
+
+def _orphaned(path):
+    """同一台主機上已結束的程序留下、來不及封存的 .log"""
+    try:
+        host, pid, _ = path.stem.rsplit('-', 2)
+        pid = int(pid)
+    except ValueError:
+        return False
+    # Windows 的 os.kill 會直接結束對方程序，不能拿來探測
+    if host != HOST or pid == os.getpid() or os.name == 'nt':
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass  # 程序還在，只是不屬於這個使用者
+    return False
+
+
+def _read(paths):
+    batch = Counter()
+    for path in paths:
+        with open(path, encoding='ascii', errors='ignore') as f:
+            for line in f:
+                kind, _, pk = line.strip().partition(' ')
+                if kind in MODELS and pk.isdigit():
+                    batch[(kind, int(pk))] += 1
+    return batch
+
+
+def flush(blocking=True):
+    """封存這個程序的緩衝，再把所有封存檔寫回資料庫，回傳更新的物件數 (別的程序正在寫回時回傳 0)"""
+    _seal()
+    directory = buffer_dir()
+    if not directory.exists():
+        return 0
+    with _flush_lock, locked(directory / '.lock', blocking) as acquired:
+        if not acquired:
+            return 0
+        paths = sorted(directory.glob('*.sealed')) + [path for path in directory.glob('*.log') if _orphaned(path)]
+        batch = _read(paths)
+
+        # 同一種 model、相同增量的物件合成一個 UPDATE
+        groups = defaultdict(list)
+        for (kind, pk), delta in batch.items():
+            groups[(kind, delta)].append(pk)
+        with transaction.atomic():
+            for (kind, delta), pks in groups.items():
+                apps.get_model(MODELS[kind]).objects.filter(pk__in=pks).update(views=F('views') + delta)
+            # 同時累加今天的每日瀏覽數 (熱門排行用)
+            for kind in MODELS:
+                trending.record(kind, {pk: delta for (k, pk), delta in batch.items() if k == kind})
+        for path in paths:
+            path.unlink(missing_ok=True)
+    return len(batch)
+
+
+def _run():
+    while True:
+        _wake.wait(FLUSH_INTERVAL)
+        _wake.clear()
+        try:
+            # 別的程序正在寫回就跳過，封存檔留給它或下一輪
+            flush(blocking=False)
+        except Exception as e:
+            print(f"⚠️ 瀏覽次數寫入失敗 (緩衝檔保留，下次重試)：{e}")
+        finally:
+            connection.close()
+
+
+def _ensure_worker():
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        # fork 出來的子程序繼承了 _worker，但執行緒沒有跟過來
+        if _worker is None or not _worker.is_alive():
+            if _worker is None:
+                atexit.register(_flush_at_exit)
+            _worker = threading.Thread(target=_run, name='view-counter', daemon=True)
+            _worker.start()
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception as e:
+        print(f"⚠️ 結束前寫入瀏覽次數失敗 (緩衝檔保留，下次重試)：{e}")
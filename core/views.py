@@ -1,12 +1,14 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
+from django.http import JsonResponse
+from django.views.decorators.cache import cache_control
 
 # 引入 App 模型
 from tools.models import Tool
-from tutorials.models import Article
 from labs.models import LabProject
+from . import search as search_index
+from . import page_cache, recommend, suggest
 
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.forms import PasswordChangeForm
@@ -17,9 +19,11 @@ from .models import UserProfile
 # ==========================================
 # 1. 首頁 (Home)
 # ==========================================
+@page_cache.cache_public_page('tools', 'labs')
 def home(request):
-    latest_projects = LabProject.objects.all().order_by('-created_at')[:3]
-    popular_tools = Tool.objects.all().order_by('-views')[:4]
+    latest_projects = LabProject.objects.select_related('related_tool').defer('content').order_by('-created_at')[:3]
+    # 近期熱門 (trending_score 由 refresh_trending 定時更新)；沒有近期活動時依累計瀏覽數
+    popular_tools = Tool.objects.all().order_by('-trending_score', '-views')[:5]
 
     context = {
         'latest_projects': latest_projects,
@@ -33,35 +37,35 @@ def home(request):
 # 2. 搜尋功能 (Search)
 # ==========================================
 def search(request):
-    query = request.GET.get('q', '')
-    
-    tools = []
-    articles = []
-    projects = []
-    
+    query = request.GET.get('q', '').strip()
+    kind = request.GET.get('type', '')
+    if kind not in search_index.KINDS:
+        kind = ''
+    # 搜尋模式：hybrid (預設，關鍵字 + 語意) / keyword / semantic
+    mode = request.GET.get('mode', 'hybrid')
+    if mode not in ('hybrid', 'keyword', 'semantic'):
+        mode = 'hybrid'
+
+    results = None
     if query:
-        tools = Tool.objects.filter(
-            Q(name__icontains=query) | 
-            Q(description__icontains=query) |
-            Q(category__icontains=query)
-        )
-        articles = Article.objects.filter(
-            Q(title__icontains=query) | 
-            Q(content__icontains=query)
-        )
-        # 實驗室搜尋 (只搜工具名與標題)
-        projects = LabProject.objects.filter(
-            Q(related_tool__name__icontains=query) | 
-            Q(title__icontains=query)
-        )
+        # 工具 / 教學 / 實驗室合併成單一排序結果，每頁 10 筆，只讀取這一頁的顯示欄位
+        results = search_index.unified_search(query, page=request.GET.get('page'), kind=kind, mode=mode)
 
     return render(request, 'search_results.html', {
-        'query': query, 
-        'tools': tools,
-        'articles': articles,
-        'projects': projects
+        'query': query,
+        'kind': kind,
+        'mode': mode,
+        'results': results,
     })
 
+
+# 搜尋框自動完成：由記憶體中的前綴索引回應，不查資料庫
+@cache_control(max_age=30)
+def search_suggest(request):
+    query = request.GET.get('q', '').strip()
+    suggestions = suggest.suggest(query) if query else []
+    return JsonResponse({'query': query, 'suggestions': suggestions})
+
 # ==========================================
 # 3. 戰情室 (Dashboard)
 # ==========================================
@@ -73,16 +77,16 @@ def dashboard(request):
         favorite_tools = []
 
     try:
-        favorite_articles = request.user.saved_articles.all().order_by('-created_at')
+        favorite_articles = request.user.saved_articles.defer('content').order_by('-created_at')
     except AttributeError:
         favorite_articles = []
     
     total_tools_fav = len(favorite_tools)
     total_articles_fav = len(favorite_articles)
     
-    recommended_tool = Tool.objects.exclude(favorites=request.user).order_by('-views').first()
-    if not recommended_tool:
-        recommended_tool = Tool.objects.first()
+    # 共同收藏推薦 (top-N 快取在 cache)；沒有任何資料時才退回第一個工具
+    recommended_tools = recommend.recommend(request.user, 'tool')
+    recommended_tool = recommended_tools[0] if recommended_tools else Tool.objects.first()
 
     context = {
         'favorite_tools': favorite_tools,
@@ -90,6 +94,7 @@ def dashboard(request):
         'total_tools_fav': total_tools_fav,
         'total_articles_fav': total_articles_fav,
         'recommended_tool': recommended_tool,
+        'recommended_tools': recommended_tools,
     }
     return render(request, 'dashboard.html', context)
 
@@ -1,6 +1,6 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.utils.html import format_html # 👈 用來產生 HTML圖片標籤
-from .models import LabProject
+from .models import LabProject, WriterJob
 
 @admin.register(LabProject)
 class LabProjectAdmin(admin.ModelAdmin):
@@ -20,6 +20,9 @@ class LabProjectAdmin(admin.ModelAdmin):
     # 每頁顯示幾筆
     list_per_page = 20
 
+    # 批次發布成新手村文章
+    actions = ['publish_selected']
+
     # === 2. 編輯頁設定 ===
     # 使用 fieldsets 將欄位分組，讓版面更整潔
     fieldsets = (
@@ -67,4 +70,30 @@ class LabProjectAdmin(admin.ModelAdmin):
         if obj.before_image:
             return format_html('<img src="{}" style="max-width: 300px; border-radius: 10px; margin-top: 10px;" />', obj.before_image.url)
         return "尚未上傳 Before 對比圖"
-    before_preview_large.short_description = "對比圖預覽 (Before)"
\ No newline at end of file
+    before_preview_large.short_description = "對比圖預覽 (Before)"
+
+    # === 6. 批次發布 ===
+    @admin.action(description="發布成新手村文章")
+    def publish_selected(self, request, queryset):
+        from .views import publish_projects
+        try:
+            results = publish_projects(queryset.order_by('pk'), request.user)
+        except Exception as e:
+            self.message_user(request, f"發布發生錯誤：{e}", messages.ERROR)
+            return
+        created = sum(1 for _, _, is_new in results if is_new)
+        self.message_user(request, f"已發布 {created} 篇，{len(results) - created} 篇之前已發布過。", messages.SUCCESS)
+
+
+# 👇 AI 寫手背景任務
+@admin.register(WriterJob)
+class WriterJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'topic', 'status', 'auto_publish', 'used_model', 'project', 'article', 'created_at', 'finished_at')
+    list_filter = ('status', 'auto_publish', 'created_at')
+    search_fields = ('topic', 'batch', 'error')
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
+    actions = ['requeue']
+
+    @admin.action(description="重新排入佇列")
+    def requeue(self, request, queryset):
+        queryset.update(status='queued', error='', started_at=None, finished_at=None)
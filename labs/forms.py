@@ -1,7 +1,16 @@
+import functools
+import os
+import zipfile
 from django import forms
 # 👇 1. 引入相關模型
 from .models import ReverseImage, IsoAnalysis 
 
+# 批次逆向工程的上限 (一次最多幾張、單張最大容量、整批解壓後的總容量)
+REVERSE_BATCH_MAX_FILES = 200
+REVERSE_BATCH_MAX_FILE_SIZE = 10 * 1024 * 1024
+REVERSE_BATCH_MAX_TOTAL_SIZE = 200 * 1024 * 1024
+REVERSE_BATCH_IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp')
+
 # ==========================================
 # 1. AI 自動寫手表單 (保留原樣)
 # ==========================================
@@ -15,6 +24,37 @@ class AIWriterForm(forms.Form):
         })
     )
 
+# ==========================================
+# 1-1. AI 寫手批次排程表單 (一行一個主題)
+# ==========================================
+WRITER_BATCH_MAX_TOPICS = 100
+
+class AIWriterBatchForm(forms.Form):
+    topics = forms.CharField(
+        label='文章主題 (一行一個)',
+        widget=forms.Textarea(attrs={
+            'class': 'form-control form-control-lg',
+            'rows': 8,
+            'placeholder': 'Midjourney V6 完整教學\nPython 爬蟲入門\nSora 影片生成指南'
+        })
+    )
+    auto_publish = forms.BooleanField(
+        label='生成完成後自動發布到新手村', required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+
+    def clean_topics(self):
+        topics = []
+        for line in self.cleaned_data['topics'].splitlines():
+            topic = line.strip()[:200]
+            if topic and topic not in topics:
+                topics.append(topic)
+        if not topics:
+            raise forms.ValidationError("請至少輸入一個主題")
+        if len(topics) > WRITER_BATCH_MAX_TOPICS:
+            raise forms.ValidationError(f"一次最多排入 {WRITER_BATCH_MAX_TOPICS} 個主題")
+        return topics
+
 # ==========================================
 # 2. 逆向工程圖片上傳表單 (保留原樣)
 # ==========================================
@@ -32,6 +72,94 @@ class ReverseImageForm(forms.ModelForm):
             })
         }
 
+# ==========================================
+# 2-1. 批次逆向工程表單 (多檔 / ZIP 上傳)
+# ==========================================
+class MultipleFileInput(forms.ClearableFileInput):
+    allow_multiple_selected = True
+
+
+class MultipleFileField(forms.FileField):
+    """允許一次選取多個檔案，clean 後回傳檔案清單"""
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('widget', MultipleFileInput())
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None):
+        single_file_clean = super().clean
+        if isinstance(data, (list, tuple)):
+            return [single_file_clean(d, initial) for d in data]
+        return [single_file_clean(data, initial)] if data else []
+
+
+class ReverseBatchForm(forms.Form):
+    images = MultipleFileField(
+        label='多張圖片', required=False,
+        widget=MultipleFileInput(attrs={
+            'class': 'form-control bg-dark text-light border-secondary',
+            'accept': 'image/*'
+        })
+    )
+    archive = forms.FileField(
+        label='ZIP 壓縮檔', required=False,
+        widget=forms.FileInput(attrs={
+            'class': 'form-control bg-dark text-light border-secondary',
+            'accept': '.zip,application/zip'
+        })
+    )
+
+    def clean(self):
+        """
+        只檢查大小、不讀內容：batch_images 是 (檔名, read) 清單，
+        read() 由工作執行緒在真正分析時才呼叫，整批圖片不會同時載入記憶體
+        """
+        cleaned_data = super().clean()
+        batch = []
+        total_size = 0
+
+        def add(name, size, read):
+            nonlocal total_size
+            if size > REVERSE_BATCH_MAX_FILE_SIZE:
+                raise forms.ValidationError(f"「{name}」超過 10MB 上限")
+            if len(batch) >= REVERSE_BATCH_MAX_FILES:
+                raise forms.ValidationError(f"一次最多處理 {REVERSE_BATCH_MAX_FILES} 張圖片")
+            total_size += size
+            if total_size > REVERSE_BATCH_MAX_TOTAL_SIZE:
+                raise forms.ValidationError(f"圖片總容量超過 {REVERSE_BATCH_MAX_TOTAL_SIZE // (1024 * 1024)}MB 上限")
+            batch.append((name, read))
+
+        # 1. 直接上傳的多張圖片 (大檔 Django 已暫存在磁碟上)
+        for f in cleaned_data.get('images') or []:
+            add(f.name, f.size, functools.partial(_read_upload, f))
+
+        # 2. ZIP 壓縮檔 (只取圖片，略過資料夾與 macOS 隱藏檔)
+        # 以中央目錄記載的解壓後大小 (file_size) 先擋下壓縮炸彈；實際解壓時 zipfile 也不會讀超過這個大小
+        archive = cleaned_data.get('archive')
+        if archive:
+            try:
+                zf = zipfile.ZipFile(archive)
+            except zipfile.BadZipFile:
+                raise forms.ValidationError("ZIP 檔案毀損或格式不正確")
+            for info in zf.infolist():
+                name = os.path.basename(info.filename)
+                if info.is_dir() or not name or name.startswith('.') or '__MACOSX' in info.filename:
+                    continue
+                if not name.lower().endswith(REVERSE_BATCH_IMAGE_EXTS):
+                    continue
+                # ZipFile 讀取成員時有內部鎖，多個工作執行緒可以共用同一個 zf
+                add(name, info.file_size, functools.partial(zf.read, info))
+
+        if not batch:
+            raise forms.ValidationError("請至少上傳一張圖片或一個包含圖片的 ZIP 檔")
+
+        cleaned_data['batch_images'] = batch
+        return cleaned_data
+
+
+def _read_upload(f):
+    f.seek(0)
+    return f.read()
+
 # ==========================================
 # 3. 👇 ISO 數據分析上傳表單 (升級版)
 # ==========================================
@@ -0,0 +1,95 @@
+import time
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from labs.models import WriterJob
+from labs.views import generate_lab_project, publish_project
+
+REVIVE_INTERVAL = 60  # 秒：多久檢查一次中斷的任務
+
+
+class Command(BaseCommand):
+    help = 'AI 寫手背景 worker：從 WriterJob 佇列領取主題，平行生成草稿 (可自動發布)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=3, help='同時生成的文章數 (請依 API 配額調整)')
+        parser.add_argument('--poll', type=float, default=5, help='佇列空時的輪詢間隔 (秒)')
+        parser.add_argument('--once', action='store_true', help='把目前佇列清空後就結束 (適合 cron)')
+        parser.add_argument('--stale-minutes', type=int, default=30, help='超過幾分鐘仍是「生成中」視為中斷，重新排隊')
+
+    def handle(self, *args, **opts):
+        workers = max(1, opts['workers'])
+        stale_after = timedelta(minutes=opts['stale_minutes'])
+
+        # 上次 worker 中斷時留下的「生成中」任務，重新排回佇列
+        self.revive_stale(stale_after)
+        last_revive = time.monotonic()
+
+        self.stdout.write(f"🚀 寫手 worker 啟動 (併發 {workers})")
+        running = {}  # future → job id
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                # 其他 worker 中途掛掉留下的任務，長時間執行的 worker 也要定期撿回來
+                if time.monotonic() - last_revive >= REVIVE_INTERVAL:
+                    self.revive_stale(stale_after, exclude=running.values())
+                    last_revive = time.monotonic()
+
+                while len(running) < workers:
+                    job_id = self.claim_next()
+                    if job_id is None:
+                        break
+                    running[pool.submit(self.process, job_id)] = job_id
+
+                if not running:
+                    if opts['once']:
+                        break
+                    time.sleep(opts['poll'])
+                    continue
+
+                done = wait(running, timeout=opts['poll'], return_when=FIRST_COMPLETED).done
+                for future in done:
+                    del running[future]
+
+        self.stdout.write(self.style.SUCCESS("🏁 佇列已清空"))
+
+    def revive_stale(self, stale_after, exclude=()):
+        """超過 stale_after 仍是「生成中」的任務 (worker 中斷或存檔失敗) 重新排隊；exclude 是自己正在跑的任務"""
+        stale = WriterJob.objects.filter(status='running', started_at__lt=timezone.now() - stale_after).exclude(pk__in=list(exclude))
+        revived = stale.update(status='queued', started_at=None)
+        if revived:
+            self.stdout.write(self.style.WARNING(f"♻️ 重新排隊 {revived} 個中斷的任務"))
+        return revived
+
+    def claim_next(self):
+        """以條件式 UPDATE 搶任務，多個 worker 同時跑也不會重複領取"""
+        candidates = WriterJob.objects.filter(status='queued').order_by('created_at').values_list('pk', flat=True)[:20]
+        for job_id in candidates:
+            if WriterJob.objects.filter(pk=job_id, status='queued').update(status='running', started_at=timezone.now()):
+                return job_id
+        return None
+
+    def process(self, job_id):
+        job = None
+        try:
+            # 讀取任務也放在 try 裡：任何一步出錯都要把任務標成失敗，不能卡在「生成中」
+            job = WriterJob.objects.select_related('user').get(pk=job_id)
+            self.stdout.write(f"✍️ 正在撰寫：{job.topic}")
+            job.project, job.used_model = generate_lab_project(job.topic, job.user, source='writer_queue')
+            if job.auto_publish:
+                job.article, _ = publish_project(job.project, job.user)
+            job.status = 'done'
+            self.stdout.write(self.style.SUCCESS(f"✅ 完成：{job.topic} ({job.used_model})"))
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"💥 失敗：{job.topic if job else f'任務 #{job_id}'} - {e}"))
+            if job is None:
+                WriterJob.objects.filter(pk=job_id).update(status='failed', error=str(e), finished_at=timezone.now())
+            else:
+                job.status = 'failed'
+                job.error = str(e)
+        finally:
+            if job is not None:
+                job.finished_at = timezone.now()
+                job.save()
+            connection.close()
@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-19 19:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0011_isoanalysis_density_isoanalysis_param_alpha_and_more'),
+        ('tutorials', '0008_imageanalysis'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WriterJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=200, verbose_name='文章主題')),
+                ('batch', models.CharField(db_index=True, max_length=32, verbose_name='批次')),
+                ('auto_publish', models.BooleanField(default=False, verbose_name='完成後自動發布')),
+                ('status', models.CharField(choices=[('queued', '排隊中'), ('running', '生成中'), ('done', '完成'), ('failed', '失敗')], default='queued', max_length=20, verbose_name='狀態')),
+                ('error', models.TextField(blank=True, verbose_name='錯誤訊息')),
+                ('used_model', models.CharField(blank=True, max_length=100, verbose_name='使用模型')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('article', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='writer_jobs', to='tutorials.article', verbose_name='發布的文章')),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='writer_jobs', to='labs.labproject', verbose_name='生成的草稿')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='建立者')),
+            ],
+            options={
+                'verbose_name': '寫手任務',
+                'verbose_name_plural': '寫手任務',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='labs_writer_status_6b7b76_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0012_writerjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='labproject',
+            name='trending_score',
+            field=models.FloatField(db_index=True, default=0, verbose_name='熱門分數'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 20:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0014_labproject_excerpt_labproject_reading_minutes_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='labproject',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
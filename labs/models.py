@@ -17,6 +17,11 @@ class LabProject(models.Model):
     # === 新增功能區 (為了 AI 自動寫手) ===
     # 1. 完整內容：用來存 Gemini 寫好的 HTML 文章
     content = models.TextField(blank=True, null=True, verbose_name="完整文章內容")
+    # 存檔時由 core/content_meta.py 算好，列表頁不必讀整份內文
+    excerpt = models.TextField(blank=True, editable=False, verbose_name="純文字摘錄")
+    word_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="字數")
+    reading_minutes = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="閱讀時間 (分鐘)")
+    toc = models.JSONField(default=list, blank=True, editable=False, verbose_name="標題目錄")
     
     # 2. 建立者：記錄是誰生成的 (設為 null=True 以免舊資料報錯)
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="建立者")
@@ -43,6 +48,8 @@ class LabProject(models.Model):
     
     # === 數據區 (保持您原本的設定) ===
     views = models.PositiveIntegerField(default=0, verbose_name="瀏覽次數")
+    # 近期熱門分數 (每日瀏覽 / 收藏依時間衰減加總，由 refresh_trending 定時更新)
+    trending_score = models.FloatField(default=0, db_index=True, verbose_name="熱門分數")
     
     related_tool = models.ForeignKey(
         'tools.Tool', 
@@ -54,6 +61,8 @@ class LabProject(models.Model):
     )
     
     created_at = models.DateTimeField(auto_now_add=True)
+    # 內容最後修改時間 (詳情頁 ETag / Last-Modified 用)；瀏覽數、熱門分數以 update() 寫入，不會動到它
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
@@ -119,4 +128,41 @@ class IsoAnalysis(models.Model):
         
     class Meta:
         verbose_name = "ISO分析紀錄"
-        verbose_name_plural = "ISO分析紀錄"
\ No newline at end of file
+        verbose_name_plural = "ISO分析紀錄"
+
+# ==========================================
+# 4. AI 寫手背景任務佇列 (DB 佇列 + run_writer_jobs worker)
+# ==========================================
+class WriterJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', '排隊中'),
+        ('running', '生成中'),
+        ('done', '完成'),
+        ('failed', '失敗'),
+    ]
+
+    topic = models.CharField(max_length=200, verbose_name="文章主題")
+    # 同一次送出的所有主題共用一個 batch，方便在進度頁一起追蹤
+    batch = models.CharField(max_length=32, db_index=True, verbose_name="批次")
+    auto_publish = models.BooleanField(default=False, verbose_name="完成後自動發布")
+
+    status = models.CharField(max_length=20, default='queued', choices=STATUS_CHOICES, verbose_name="狀態")
+    error = models.TextField(blank=True, verbose_name="錯誤訊息")
+    used_model = models.CharField(max_length=100, blank=True, verbose_name="使用模型")
+
+    project = models.ForeignKey(LabProject, on_delete=models.SET_NULL, null=True, blank=True, related_name='writer_jobs', verbose_name="生成的草稿")
+    article = models.ForeignKey('tutorials.Article', on_delete=models.SET_NULL, null=True, blank=True, related_name='writer_jobs', verbose_name="發布的文章")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="建立者")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"[{self.get_status_display()}] {self.topic}"
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+        verbose_name = "寫手任務"
+        verbose_name_plural = "寫手任務"
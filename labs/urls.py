@@ -10,11 +10,16 @@ urlpatterns = [
 
     # AI 自動寫手頁面
     path('ai-writer/', views.ai_writer_view, name='ai_writer'),
+    # AI 寫手背景佇列 (批次排程 + 進度)
+    path('ai-writer/queue/', views.ai_writer_queue_view, name='ai_writer_queue'),
+    path('ai-writer/queue/status/', views.ai_writer_queue_status, name='ai_writer_queue_status'),
 
     # 👇 關鍵修正：name 必須改成 'publish_lab_to_article' 才能跟 Template 對上
     path('project/<int:pk>/publish/', views.publish_lab_to_article, name='publish_lab_to_article'),
     # 👇 新增這行
     path('reverse-engineering/', views.reverse_engineering_view, name='reverse_engineering'),
+    # 批次逆向工程 (多檔 / ZIP，逐張串流回傳)
+    path('reverse-engineering/batch/', views.reverse_batch_view, name='reverse_batch'),
     path('iso-analysis/', views.iso_analysis_view, name='iso_analysis'),
     # 👇 新增這一行：ISO 11608 分析儀的路徑
     path('iso-analysis/', views.iso_analysis_view, name='iso_analysis'),
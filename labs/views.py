@@ -1,11 +1,13 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
+from django.http import StreamingHttpResponse, JsonResponse
 from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
 from django.db.models import Count
 from django.contrib import messages
 from django.conf import settings
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.utils.html import strip_tags 
-from django.utils.text import slugify # 👈 引入這個來做中文網址
 import uuid
 import json
 import time
@@ -21,11 +23,18 @@ from scipy import stats
 import io
 from django.core.files.base import ContentFile
 import warnings
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # 👇 引入所有 Model 和 Form
-from .models import LabProject, ReverseImage, IsoAnalysis
-from .forms import AIWriterForm, ReverseImageForm, IsoAnalysisForm
+from .models import LabProject, ReverseImage, IsoAnalysis, WriterJob
+from .forms import AIWriterForm, AIWriterBatchForm, ReverseImageForm, ReverseBatchForm, IsoAnalysisForm
 from tutorials.models import Article 
+from tutorials import related
+from core.gemini import configure_genai
+from core.tool_matcher import best_tool, get_matcher
+from core.slugs import allocate_slugs
+from core import conditional, content_meta, page_cache, search, semantic, suggest, view_counter
+from core.llm_ledger import new_call_id, record_llm_call, sdk_usage
 
 try:
     from tools.models import Tool
@@ -51,10 +60,8 @@ def clean_ai_content(text):
     return cleaned.strip()
 
 # --- 🔧 文字生成函式 (Gemini 2.0) ---
-def try_generate_content(prompt):
-    api_key = settings.GEMINI_API_KEY
-    if not api_key: raise ValueError("尚未設定 API Key")
-    genai.configure(api_key=api_key)
+def try_generate_content(prompt, source='lab_text'):
+    configure_genai()
 
     candidate_models = [
         "gemini-2.0-flash",           # 首選
@@ -65,13 +72,18 @@ def try_generate_content(prompt):
     ]
 
     last_error = None
-    for model_name in candidate_models:
+    call_id = new_call_id()
+    for attempt, model_name in enumerate(candidate_models, start=1):
+        started = time.perf_counter()
         try:
             print(f"📡 AI 寫手嘗試連線: {model_name} ...")
             model = genai.GenerativeModel(model_name)
             response = model.generate_content(prompt)
-            return clean_ai_content(response.text), model_name
+            result_text = clean_ai_content(response.text)
+            record_llm_call(source, model_name, started, call_id, attempt, usage=sdk_usage(response))
+            return result_text, model_name
         except Exception as e:
+            record_llm_call(source, model_name, started, call_id, attempt, error=e)
             print(f"⚠️ {model_name} 失敗: {str(e)}")
             last_error = e
             if "429" in str(e): time.sleep(1)
@@ -80,10 +92,8 @@ def try_generate_content(prompt):
     raise RuntimeError(f"所有模型皆無法連線。請檢查 API Key 或網路。")
 
 # --- 👁️ 視覺生成函式 (逆向工程) ---
-def try_generate_vision(prompt, img):
-    api_key = settings.GEMINI_API_KEY
-    if not api_key: raise ValueError("尚未設定 API Key")
-    genai.configure(api_key=api_key)
+def try_generate_vision(prompt, img, source='reverse_engineering'):
+    configure_genai()
 
     candidate_models = [
         "gemini-2.0-flash",             
@@ -94,14 +104,19 @@ def try_generate_vision(prompt, img):
     ]
 
     last_error = None
-    for model_name in candidate_models:
+    call_id = new_call_id()
+    for attempt, model_name in enumerate(candidate_models, start=1):
+        started = time.perf_counter()
         try:
             print(f"👁️ 逆向工程嘗試連線: {model_name} ...")
             model = genai.GenerativeModel(model_name)
             response = model.generate_content([prompt, img])
+            result_text = clean_ai_content(response.text)
+            record_llm_call(source, model_name, started, call_id, attempt, usage=sdk_usage(response))
             print(f"✅ 視覺分析成功！使用模型: {model_name}")
-            return clean_ai_content(response.text)
+            return result_text
         except Exception as e:
+            record_llm_call(source, model_name, started, call_id, attempt, error=e)
             print(f"⚠️ {model_name} 失敗: {str(e)}")
             last_error = e
             if "429" in str(e): time.sleep(1)
@@ -110,12 +125,28 @@ def try_generate_vision(prompt, img):
     raise RuntimeError(f"視覺模型全數陣亡。")
 
 
+# --- 👁️ 逆向工程共用指令 (單張 / 批次共用) ---
+REVERSE_PROMPT = """
+你是一位精通 Midjourney 的 Prompt 工程師。
+請仔細觀察這張圖片，進行「逆向工程」。
+請輸出兩部分內容：
+1. 【英文咒語 (Prompts)】：寫出能生成這張圖片風格、構圖、光影、內容的 Midjourney 英文指令。
+2. 【中文分析】：用繁體中文簡短分析這張圖的「構圖技巧」、「光影設定」和「藝術風格」。
+【格式要求 - 請直接輸出 HTML】：
+請不要給 Markdown 代碼塊。
+英文咒語部分請用 <div class="p-3 bg-black text-warning font-monospace rounded mb-3 border border-secondary"> 包裹。
+中文分析部分請用 <div class="text-light opacity-75"> 包裹。
+標題請用 <h5 class="text-white fw-bold mt-3">。
+"""
+
+
 # ==========================================
 # 1. 一般視圖 (Views)
 # ==========================================
 
+@page_cache.cache_public_page('labs', 'tools')
 def lab_list(request):
-    projects_all = LabProject.objects.all().order_by('-created_at')
+    projects_all = LabProject.objects.select_related('related_tool').defer('content').order_by('-created_at')
     tool_filter = request.GET.get('tool')
     if tool_filter:
         projects_all = projects_all.filter(related_tool__name=tool_filter)
@@ -124,19 +155,133 @@ def lab_list(request):
     if Tool:
         tools = Tool.objects.filter(lab_projects__isnull=False).annotate(total_projects=Count('lab_projects')).order_by('-total_projects')
 
+    sort = request.GET.get('sort')
+    if sort == 'trending':
+        projects_all = projects_all.order_by('-trending_score', '-views')
+
     paginator = Paginator(projects_all, 6)
     page_obj = paginator.get_page(request.GET.get('page'))
     
     return render(request, 'labs/lab_list.html', {
-        'projects': page_obj, 'tools': tools, 'current_tool': tool_filter, 'total_count': LabProject.objects.count()
+        'projects': page_obj, 'tools': tools, 'current_tool': tool_filter, 'total_count': LabProject.objects.count,  # 交給模板呼叫，片段快取命中時就不查
+        'sort': sort,
     })
 
+def lab_project_versions(request, pk):
+    """專案本身 + 關聯工具 (conditional GET 用)"""
+    project = LabProject.objects.filter(pk=pk).values('updated_at', 'related_tool__updated_at').first()
+    if project is None:
+        return None
+    parts = [project['updated_at'], project['related_tool__updated_at']]
+    return pk, parts, conditional.latest(*parts)
+
+
+@conditional.conditional_detail('project', lab_project_versions)
 def lab_detail(request, pk):
-    project = get_object_or_404(LabProject, pk=pk)
-    project.views += 1
-    project.save()
+    project = get_object_or_404(LabProject.objects.select_related('related_tool'), pk=pk)
+    # 瀏覽次數先附加到緩衝檔，由背景執行緒批次寫回 (見 core/view_counter.py)
+    project.views += view_counter.record_view('project', project.pk)
     return render(request, 'labs/lab_detail.html', {'project': project})
 
+# --- ✍️ AI 寫手核心：生成一篇草稿 (網頁 / 背景任務共用) ---
+def generate_lab_project(topic, user, source='ai_writer_view'):
+    """呼叫 Gemini 生成文章、自動關聯工具並存成 LabProject，回傳 (project, used_model)"""
+    prompt = f"""
+    你現在是一位專業的科技部落客。請寫一篇關於「{topic}」的繁體中文教學文章。
+    【格式嚴格要求】：
+    1. 直接給我 HTML 原始碼，從 <h2> 開始寫。
+    2. 絕對不要包含 <html>, <head>, <body> 標籤。
+    3. 使用 <h2>, <h3>, <p>, <ul>, <li>, <strong> 標籤排版。
+    【文章結構】：
+    1. 引言 (用 <p> 開頭)
+    2. 三個核心重點章節 (用 <h2> 標題)
+    3. 總結
+    """
+    result_text, used_model = try_generate_content(prompt, source=source)
+    
+    # === ⭐ 自動關聯工具 (主題優先，其次是生成內容開頭；名稱與別名一次比對) ===
+    # 純文字只轉一次 (摘錄也是存檔時要用的衍生欄位)
+    meta = content_meta.derive(result_text)
+    related_tool = best_tool(topic, meta['excerpt']) if Tool else None
+    
+    clean_description = meta['excerpt'][:150] + "..."
+    project = LabProject.objects.create(
+        title=f"AI 生成：{topic}", description=clean_description,
+        content=result_text, user=user,
+        status='completed', related_tool=related_tool
+    )
+    return project, used_model
+
+# --- 🚀 發布核心：LabProject → Article (網頁 / 背景任務 / 後台批次共用) ---
+def publish_projects(projects, author, attempts=3):
+    """
+    批次發布成新手村文章，回傳 [(project, article, created)]；同標題已發布過則對應到舊文章。
+    已發布標題 1 次查詢、slug 每 200 個標題 1 次查詢，再於 transaction 中 bulk_create；
+    若與同時進行的發布撞到 slug (IntegrityError)，整批重新配發再試。
+    """
+    rows = [(project, project.title.replace("AI 生成：", "").strip()[:100]) for project in projects]
+    matcher = get_matcher() if Tool else None
+
+    for attempt in range(attempts):
+        existing = {}
+        for article in Article.objects.filter(title__in={title for _, title in rows}).order_by('pk'):
+            existing.setdefault(article.title, article)
+
+        pending = {}
+        for project, title in rows:
+            if title not in existing and title not in pending:
+                pending[title] = project
+
+        slugs = allocate_slugs(list(pending), Article)
+        new_articles = {}
+        for (title, project), slug in zip(pending.items(), slugs):
+            related_tool_id = project.related_tool_id
+            if not related_tool_id and matcher:
+                ranked = matcher.rank(title, project.excerpt or strip_tags(project.content or '')[:500], limit=1)
+                related_tool_id = ranked[0] if ranked else None
+            new_articles[title] = Article(
+                title=title,
+                content=clean_ai_content(project.content),
+                author=author,
+                category="實戰教學",
+                related_tool_id=related_tool_id,
+                slug=slug,
+                is_published=True,
+                cover_image=project.cover_image,
+            )
+
+        for article in new_articles.values():
+            content_meta.apply(article)  # bulk_create 不觸發 pre_save，衍生欄位自己算
+        try:
+            with transaction.atomic():
+                Article.objects.bulk_create(new_articles.values())
+            # bulk_create 不觸發 post_save，索引與快取由這裡補上
+            search.index_objects('article', list(new_articles.values()))
+            page_cache.invalidate('articles')
+            suggest.invalidate()
+            for article in new_articles.values():
+                related.safe_update(article)
+                semantic.update_object('article', article)
+            break
+        except IntegrityError:
+            if attempt == attempts - 1:
+                raise
+            print(f"⚠️ Slug 撞號，重新配發 (第 {attempt + 2} 次)")
+
+    results = []
+    for project, title in rows:
+        if title in existing:
+            results.append((project, existing[title], False))
+        else:
+            results.append((project, new_articles[title], True))
+            existing[title] = new_articles[title]  # 同一批重複的標題只建立一次
+    return results
+
+def publish_project(project, author):
+    """發布單篇，回傳 (article, created)"""
+    _, article, created = publish_projects([project], author)[0]
+    return article, created
+
 @user_passes_test(is_superuser)
 def ai_writer_view(request):
     new_project = None
@@ -145,50 +290,8 @@ def ai_writer_view(request):
         if form.is_valid():
             topic = form.cleaned_data['topic']
             try:
-                prompt = f"""
-                你現在是一位專業的科技部落客。請寫一篇關於「{topic}」的繁體中文教學文章。
-                【格式嚴格要求】：
-                1. 直接給我 HTML 原始碼，從 <h2> 開始寫。
-                2. 絕對不要包含 <html>, <head>, <body> 標籤。
-                3. 使用 <h2>, <h3>, <p>, <ul>, <li>, <strong> 標籤排版。
-                【文章結構】：
-                1. 引言 (用 <p> 開頭)
-                2. 三個核心重點章節 (用 <h2> 標題)
-                3. 總結
-                """
-                result_text, used_model = try_generate_content(prompt)
-                
-                # === ⭐ 自動關聯工具 (升級版) ===
-                related_tool = None
-                if Tool:
-                    all_tools = Tool.objects.all()
-                    topic_lower = topic.lower()
-                    
-                    # 1. 檢查輸入主題
-                    for tool in all_tools:
-                        if tool.name.lower() in topic_lower or topic_lower in tool.name.lower():
-                            related_tool = tool
-                            break
-                    
-                    # 2. 檢查 AI 生成內容 (防漏網之魚)
-                    if not related_tool:
-                        generated_preview = strip_tags(result_text).lower()[:500]
-                        for tool in all_tools:
-                            if tool.name.lower() in generated_preview:
-                                related_tool = tool
-                                break
-
-                    # 3. 特殊縮寫
-                    if not related_tool and ("midjourney" in topic_lower or "mj" in topic_lower):
-                         related_tool = Tool.objects.filter(name__icontains="Midjourney").first()
-                # ==================================
-                
-                clean_description = strip_tags(result_text)[:150] + "..."
-                new_project = LabProject.objects.create(
-                    title=f"AI 生成：{topic}", description=clean_description,
-                    content=result_text, user=request.user,
-                    status='completed', related_tool=related_tool
-                )
+                new_project, used_model = generate_lab_project(topic, request.user)
+                related_tool = new_project.related_tool
                 msg = f'文章生成成功！(模型：{used_model})'
                 if related_tool: msg += f' 已自動關聯工具：{related_tool.name}'
                 messages.success(request, msg)
@@ -201,47 +304,56 @@ def ai_writer_view(request):
 @user_passes_test(is_superuser)
 def publish_lab_to_article(request, pk):
     project = get_object_or_404(LabProject, pk=pk)
-    clean_title = project.title.replace("AI 生成：", "").strip()[:100]
-    
-    existing_article = Article.objects.filter(title=clean_title).first()
-    if existing_article:
-        messages.info(request, "這篇文章之前已經發布過囉！")
-        return redirect('article_detail', slug=existing_article.slug)
 
     try:
-        # === ⭐ 網址生成邏輯 (中文友善版) ===
-        # 允許 Unicode (中文)
-        base_slug = slugify(clean_title, allow_unicode=True) 
-        
-        # 萬一標題全是特殊符號，回退到隨機碼
-        if not base_slug:
-            base_slug = f"ai-{uuid.uuid4().hex[:8]}"
-            
-        new_slug = base_slug
-        counter = 1
-        
-        # 避免網址重複 (例如：python-教學-1)
-        while Article.objects.filter(slug=new_slug).exists():
-            new_slug = f"{base_slug}-{counter}"
-            counter += 1
-        # ==================================
-
-        Article.objects.create(
-            title=clean_title, 
-            content=clean_ai_content(project.content),
-            author=request.user, 
-            category="實戰教學",
-            related_tool=project.related_tool, 
-            slug=new_slug,            
-            is_published=True, 
-            cover_image=project.cover_image 
-        )
-        messages.success(request, f"已成功發布！網址：/article/{new_slug}/")
+        article, created = publish_project(project, request.user)
+        if not created:
+            messages.info(request, "這篇文章之前已經發布過囉！")
+            return redirect('article_detail', slug=article.slug)
+        messages.success(request, f"已成功發布！網址：/article/{article.slug}/")
         return redirect('article_list')
     except Exception as e:
         messages.error(request, f"發布發生錯誤：{str(e)}")
         return redirect('lab_detail', pk=pk)
 
+# --- 🗂️ 寫手佇列：一次排入多個主題，交給 run_writer_jobs 背景生成 ---
+@user_passes_test(is_superuser)
+def ai_writer_queue_view(request):
+    if request.method == 'POST':
+        form = AIWriterBatchForm(request.POST)
+        if form.is_valid():
+            batch = uuid.uuid4().hex
+            WriterJob.objects.bulk_create([
+                WriterJob(topic=topic, batch=batch, user=request.user, auto_publish=form.cleaned_data['auto_publish'])
+                for topic in form.cleaned_data['topics']
+            ])
+            messages.success(request, f"已排入 {len(form.cleaned_data['topics'])} 個主題，背景 worker 會依序生成。")
+            return redirect(f"{request.path}?batch={batch}")
+    else:
+        form = AIWriterBatchForm()
+
+    batch = request.GET.get('batch')
+    jobs = WriterJob.objects.select_related('project', 'article').order_by('-created_at')
+    jobs = jobs.filter(batch=batch) if batch else jobs[:50]
+    return render(request, 'labs/ai_writer_queue.html', {'form': form, 'jobs': jobs, 'batch': batch})
+
+@user_passes_test(is_superuser)
+def ai_writer_queue_status(request):
+    """進度頁輪詢用的 JSON"""
+    batch = request.GET.get('batch')
+    jobs = WriterJob.objects.select_related('project', 'article').order_by('-created_at')
+    jobs = jobs.filter(batch=batch) if batch else jobs[:50]
+    return JsonResponse({'jobs': [{
+        'id': job.pk,
+        'topic': job.topic,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'error': job.error,
+        'used_model': job.used_model,
+        'project_url': reverse('lab_detail', args=[job.project_id]) if job.project_id else None,
+        'article_url': reverse('article_detail', args=[job.article.slug]) if job.article_id else None,
+    } for job in jobs]})
+
 @login_required
 def reverse_engineering_view(request):
     analysis_result = None
@@ -256,19 +368,7 @@ def reverse_engineering_view(request):
             reverse_obj.save()
             try:
                 img = PIL.Image.open(reverse_obj.image.path)
-                prompt = """
-                你是一位精通 Midjourney 的 Prompt 工程師。
-                請仔細觀察這張圖片，進行「逆向工程」。
-                請輸出兩部分內容：
-                1. 【英文咒語 (Prompts)】：寫出能生成這張圖片風格、構圖、光影、內容的 Midjourney 英文指令。
-                2. 【中文分析】：用繁體中文簡短分析這張圖的「構圖技巧」、「光影設定」和「藝術風格」。
-                【格式要求 - 請直接輸出 HTML】：
-                請不要給 Markdown 代碼塊。
-                英文咒語部分請用 <div class="p-3 bg-black text-warning font-monospace rounded mb-3 border border-secondary"> 包裹。
-                中文分析部分請用 <div class="text-light opacity-75"> 包裹。
-                標題請用 <h5 class="text-white fw-bold mt-3">。
-                """
-                reverse_obj.prompt_result = try_generate_vision(prompt, img)
+                reverse_obj.prompt_result = try_generate_vision(REVERSE_PROMPT, img)
                 reverse_obj.save()
                 analysis_result = reverse_obj
                 messages.success(request, "視覺分析完成！AI 已成功解析圖片基因。")
@@ -279,6 +379,72 @@ def reverse_engineering_view(request):
     return render(request, 'labs/reverse_engineering.html', {'form': form, 'result': analysis_result})
 
 
+def _ndjson(payload):
+    return json.dumps(payload, ensure_ascii=False) + "\n"
+
+def analyse_image(read):
+    """在工作執行緒內才讀檔、開圖並呼叫視覺模型 (同時只有「併發數」張圖片在記憶體裡；單張壞圖不會拖垮整批)"""
+    data = read()
+    img = PIL.Image.open(io.BytesIO(data))
+    return try_generate_vision(REVERSE_PROMPT, img, source='reverse_batch'), data
+
+def stream_reverse_batch(user, images):
+    """
+    批次逆向工程產生器：以有限併發把視覺分析分派出去，
+    每完成一張就先把圖片寫入儲存空間、吐出一行 NDJSON，全部結束後再以 bulk_create 一次寫入資料列。
+    images 是 (檔名, read) 清單 (見 ReverseBatchForm)。
+    """
+    finished = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, settings.GEMINI_VISION_CONCURRENCY))
+    futures = {executor.submit(analyse_image, read): idx for idx, (name, read) in enumerate(images)}
+
+    try:
+        yield _ndjson({'event': 'start', 'total': len(images)})
+        for future in as_completed(futures):
+            # 從 dict 移除，圖片內容隨 future 一起釋放
+            idx = futures.pop(future)
+            name = images[idx][0]
+            try:
+                result_html, data = future.result()
+            except Exception as e:
+                yield _ndjson({'event': 'result', 'index': idx, 'name': name, 'ok': False, 'error': str(e)})
+                continue
+
+            obj = ReverseImage(user=user, prompt_result=result_html)
+            obj.image.save(os.path.basename(name), ContentFile(data), save=False)
+            finished[idx] = obj
+            del data
+            yield _ndjson({'event': 'result', 'index': idx, 'name': name, 'ok': True, 'html': result_html})
+    finally:
+        # 使用者中途離開也要保住已完成的結果
+        executor.shutdown(wait=False, cancel_futures=True)
+        ReverseImage.objects.bulk_create(list(finished.values()))
+
+    yield _ndjson({
+        'event': 'done',
+        'saved': len(finished),
+        'images': [{'index': idx, 'id': obj.pk, 'url': obj.image.url} for idx, obj in finished.items()],
+    })
+
+@login_required
+def reverse_batch_view(request):
+    if request.method == 'POST':
+        form = ReverseBatchForm(request.POST, request.FILES)
+        if form.is_valid():
+            response = StreamingHttpResponse(
+                stream_reverse_batch(request.user, form.cleaned_data['batch_images']),
+                content_type='application/x-ndjson; charset=utf-8'
+            )
+            # 關閉 nginx 緩衝，讓結果逐張推送到瀏覽器
+            response['X-Accel-Buffering'] = 'no'
+            response['Cache-Control'] = 'no-cache'
+            return response
+        return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
+
+    form = ReverseBatchForm()
+    return render(request, 'labs/reverse_batch.html', {'form': form})
+
+
 # ==========================================
 # 2. ISO 11608 核心演算法 (Anderson-Darling Minitab 版)
 # ==========================================
@@ -571,7 +737,7 @@ def chat_view(request):
                 # 為了讓 AI 知道這是聊天，我們可以加一點點 System Prompt (可選)
                 prompt = f"使用者說：{user_input}\n請以繁體中文、友善且專業的語氣回答。"
                 
-                result_text, used_model = try_generate_content(prompt)
+                result_text, used_model = try_generate_content(prompt, source='chat')
                 
                 # 為了讓前端顯示漂亮，將換行符號轉成 HTML 的 <br> (簡易處理)
                 response_text = result_text.replace('\n', '<br>')
@@ -22,7 +22,7 @@ class ToolAdmin(admin.ModelAdmin):
     list_filter = ('category',)
     
     # 搜尋：名稱、描述
-    search_fields = ('name', 'description')
+    search_fields = ('name', 'aliases', 'description')
     
     # 自動填入 Slug (當您輸入名稱時，Slug 會自動產生)
     prepopulated_fields = {'slug': ('name',)}
@@ -30,7 +30,7 @@ class ToolAdmin(admin.ModelAdmin):
     # === 2. 編輯頁設定 ===
     fieldsets = (
         ('工具資訊', {
-            'fields': ('name', 'slug', 'category', 'website_url', 'description')
+            'fields': ('name', 'slug', 'aliases', 'category', 'website_url', 'description')
         }),
         ('視覺設定', {
             'fields': ('image', 'logo_preview_large'), # 假設您的模型欄位是 image (如果是 logo 請自行修改)
@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-19 19:28
+
+from django.db import migrations, models
+
+
+def add_midjourney_alias(apps, schema_editor):
+    # 原本寫死在 ai_writer_view 裡的「MJ」縮寫，改成資料
+    Tool = apps.get_model('tools', 'Tool')
+    Tool.objects.filter(name__icontains='Midjourney', aliases='').update(aliases='MJ')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0008_alter_tool_favorites'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tool',
+            name='aliases',
+            field=models.CharField(blank=True, help_text='以逗號分隔，例如：MJ, Midjourney AI', max_length=200, verbose_name='別名'),
+        ),
+        migrations.RunPython(add_midjourney_alias, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0009_tool_aliases'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tool',
+            name='trending_score',
+            field=models.FloatField(db_index=True, default=0, verbose_name='熱門分數'),
+        ),
+    ]
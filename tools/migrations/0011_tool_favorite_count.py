@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 19:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0010_tool_trending_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tool',
+            name='favorite_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='收藏人數'),
+        ),
+    ]
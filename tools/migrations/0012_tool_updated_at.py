@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 20:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0011_tool_favorite_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tool',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -13,16 +13,25 @@ class Tool(models.Model):
     
     # 分類與精選
     category = models.CharField(max_length=50, default='Uncategorized')
+    # 自動關聯文章時使用的別名 (例如 Midjourney 填「MJ」)
+    aliases = models.CharField(max_length=200, blank=True, verbose_name="別名", help_text="以逗號分隔，例如：MJ, Midjourney AI")
     is_featured = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # 內容最後修改時間 (詳情頁 ETag / Last-Modified 用)；瀏覽、收藏、熱門分數都以 update() 寫入，不會動到它
+    updated_at = models.DateTimeField(auto_now=True)
 
     # 👇 2. 新增這行：收藏功能
     # related_name='saved_tools' 意思是：以後可以用 user.saved_tools 查出這個人收藏了哪些工具
     favorites = models.ManyToManyField(User, related_name='saved_tools', blank=True, verbose_name="收藏的使用者")
+    # 收藏人數 (由 core/counters.py 隨收藏異動維護，不必每次 COUNT)
+    favorite_count = models.PositiveIntegerField(default=0, verbose_name="收藏人數")
 
     # 👇 新增這一行：瀏覽次數 (預設為 0)
     views = models.PositiveIntegerField(default=0, verbose_name="瀏覽次數")
 
+    # 近期熱門分數 (每日瀏覽 / 收藏依時間衰減加總，由 refresh_trending 定時更新)
+    trending_score = models.FloatField(default=0, db_index=True, verbose_name="熱門分數")
+
     def __str__(self):
         return self.name
 
@@ -41,4 +50,4 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f'{self.user.username} 評論 {self.tool.name}'
\ No newline at end of file
+        return f'{self.user.username} 評論 {self.tool.name}'
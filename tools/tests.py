@@ -1,3 +1,45 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core import view_counter
+from .models import Comment, Tool
+
+
+# --- 🏷️ 詳情頁 conditional GET ---
+class ToolDetailConditionalTests(TestCase):
+    def setUp(self):
+        self.tool = Tool.objects.create(name='Notion', slug='notion', description='筆記工具')
+        self.url = reverse('tool_detail', args=[self.tool.slug])
+        # 不讓背景執行緒把瀏覽數寫進測試資料庫
+        self.enterContext(view_counter.paused())
+
+    def test_matching_etag_returns_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response.headers['ETag'], etag)
+
+    def test_new_comment_changes_etag(self):
+        etag = self.client.get(self.url).headers['ETag']
+        Comment.objects.create(tool=self.tool, user=User.objects.create_user('alice'), content='好用')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_etag_differs_per_user(self):
+        etag = self.client.get(self.url).headers['ETag']
+        self.client.force_login(User.objects.create_user('alice'))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response.headers['Cache-Control'])
+
+    def test_missing_tool_is_404(self):
+        response = self.client.get(reverse('tool_detail', args=['missing']))
+        self.assertEqual(response.status_code, 404)
@@ -1,63 +1,73 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django.core.paginator import Paginator
 from django.db.models import Q 
 from .models import Tool, Comment
+from core import conditional, counters, page_cache, search, view_counter
+
+TOOLS_PER_PAGE = 12  # 3 欄或 4 欄排版都排得滿 (靜態輸出也依這個分頁)
 
 # ==========================================
-# 1. 收藏切換功能 (保留原樣)
+# 1. 收藏切換功能 (前端以 fetch 呼叫時回傳 JSON，不重新載入頁面)
 # ==========================================
 @login_required
+@require_POST
 def tool_favorite(request, slug):
     tool = get_object_or_404(Tool, slug=slug)
-    
-    if tool.favorites.filter(id=request.user.id).exists():
-        tool.favorites.remove(request.user)
-    else:
-        tool.favorites.add(request.user)
-        
+    active, count = counters.toggle(tool, 'favorites', request.user)
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({'active': active, 'count': count})
+
     return redirect(request.META.get('HTTP_REFERER', 'tool_list'))
 
-# (備用版，可保留或刪除)
-@login_required
-def toggle_favorite(request, slug):
-    tool = get_object_or_404(Tool, slug=slug)
-    
-    if request.user in tool.favorites.all():
-        tool.favorites.remove(request.user)
-    else:
-        tool.favorites.add(request.user)
-        
-    next_url = request.META.get('HTTP_REFERER')
-    if next_url:
-        return redirect(next_url)
-    
-    return redirect('tool_detail', slug=slug)
+# (備用網址，與 tool_favorite 相同)
+toggle_favorite = tool_favorite
 
 # ==========================================
 # 2. 顯示工具詳情 (保留原樣)
 # ==========================================
+def tool_versions(request, slug):
+    """工具本身 + 頁面上的留言、相關文章、實驗室作品 (conditional GET 用)"""
+    from tutorials.models import Article
+    from labs.models import LabProject
+
+    tool = Tool.objects.filter(slug=slug).values('pk', 'updated_at').first()
+    if tool is None:
+        return None
+    comments = conditional.versions(Comment.objects.filter(tool_id=tool['pk']), 'created_at')
+    articles = conditional.versions(Article.objects.filter(related_tool_id=tool['pk'], is_published=True), 'updated_at')
+    projects = conditional.versions(LabProject.objects.filter(related_tool_id=tool['pk']), 'updated_at')
+    parts = [tool['updated_at'], comments, articles, projects]
+    if request.user.is_authenticated:
+        parts.append(counters.has_link('tools.Tool', 'favorites', tool['pk'], request.user.pk))
+    return tool['pk'], parts, conditional.latest(tool['updated_at'], comments[1], articles[1], projects[1])
+
+
+@conditional.conditional_detail('tool', tool_versions)
 def tool_detail(request, slug):
     tool = get_object_or_404(Tool, slug=slug)
     
     # 計數器 +1
-    tool.views += 1
-    tool.save()
+    # 瀏覽次數先附加到緩衝檔，由背景執行緒批次寫回 (見 core/view_counter.py)
+    tool.views += view_counter.record_view('tool', tool.pk)
 
     # 檢查是否已收藏
-    is_favorited = False
-    if request.user.is_authenticated:
-        if request.user in tool.favorites.all():
-            is_favorited = True
+    is_favorited = request.user.is_authenticated and counters.has_link('tools.Tool', 'favorites', tool.pk, request.user.pk)
 
     # 找出相關文章
-    related_articles = tool.articles.filter(is_published=True)
+    related_articles = tool.articles.filter(is_published=True).defer('content')
+    # 留言者與實驗室作品一次查完，模板裡不再逐筆查關聯 (N+1)
+    comments = list(tool.comments.select_related('user').order_by('-id'))
+    lab_projects = list(tool.lab_projects.all())
 
     context = {
         'tool': tool,
         'is_favorited': is_favorited,
         'related_articles': related_articles,
+        'comments': comments,
+        'lab_projects': lab_projects,
     }
     return render(request, 'tools/tool_detail.html', context)
 
@@ -82,6 +92,7 @@ def add_comment(request, slug):
 # ==========================================
 # 4. 軍火庫總清單 (🔥 核心升級區)
 # ==========================================
+@page_cache.cache_public_page('tools')
 def tool_list(request):
     # 1. 取得所有工具
     tools_all = Tool.objects.all().order_by('-created_at')
@@ -89,7 +100,9 @@ def tool_list(request):
     # 2. 搜尋邏輯 (Search)
     query = request.GET.get('q')
     if query:
-        tools_all = tools_all.filter(
+        # 有全文索引就依相關度排序，否則退回 icontains
+        ranked = search.rank_queryset(tools_all, 'tool', query)
+        tools_all = ranked if ranked is not None else tools_all.filter(
             Q(name__icontains=query) | 
             Q(description__icontains=query)
         )
@@ -103,8 +116,13 @@ def tool_list(request):
     # values_list(flat=True) 會回傳 ['繪圖', '寫作', ...] 的清單，而不是 [('繪圖',), ...]
     categories = Tool.objects.values_list('category', flat=True).distinct()
 
+    # 排序：預設最新；sort=trending 為本週熱門
+    sort = request.GET.get('sort')
+    if sort == 'trending' and not query:
+        tools_all = tools_all.order_by('-trending_score', '-views')
+
     # 5. 設定分頁：改為 12 個 (適合 3欄或4欄排版)
-    paginator = Paginator(tools_all, 12) 
+    paginator = Paginator(tools_all, TOOLS_PER_PAGE)
     
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
@@ -115,6 +133,7 @@ def tool_list(request):
         'query': query,           # 搜尋關鍵字
         'categories': categories, # 👇 傳送分類清單給前端
         'active_category': category, # 👇 傳送目前選中的分類(讓按鈕變色)
+        'sort': sort,
     }
     
     return render(request, 'tools/tool_list.html', context)
\ No newline at end of file
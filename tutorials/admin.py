@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Article, Prompt, Comment  # 👈 修正：是用 Prompt，不是 PromptCard
+from .models import Article, Prompt, Comment, ImageAnalysis  # 👈 修正：是用 Prompt，不是 PromptCard
 # 👇 1. 引入 Summernote 的後台類別
 from django_summernote.admin import SummernoteModelAdmin
 
@@ -25,4 +25,11 @@ class ArticleAdmin(SummernoteModelAdmin):
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('author', 'article', 'created_at')
     list_filter = ('created_at',)
-    search_fields = ('content', 'author__username', 'article__title')
\ No newline at end of file
+    search_fields = ('content', 'author__username', 'article__title')
+
+# 👇 圖片逆向分析紀錄
+@admin.register(ImageAnalysis)
+class ImageAnalysisAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'model_name', 'created_at')
+    list_filter = ('model_name', 'created_at')
+    search_fields = ('result_prompt', 'user__username')
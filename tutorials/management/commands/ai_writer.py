@@ -1,59 +1,491 @@
+import os
+import re
 import time
 import json
 import urllib.request
 import urllib.error
-from django.core.management.base import BaseCommand
-from django.utils.text import slugify
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from tutorials.models import Article
 from tools.models import Tool
+from core.gemini import rest_url
+from core.llm_ledger import new_call_id, record_llm_call, rest_usage
+from core.title_index import TitleIndex
+from core.tool_matcher import match_tools
+from core.slugs import allocate_slugs
+
+# --- 📐 結構化輸出 Schema (Gemini responseSchema，OpenAPI 子集) ---
+# 由模型端強制輸出合法 JSON，不再靠 prompt 拜託「不要有其他廢話」
+IDEA_SCHEMA = {
+    "type": "ARRAY",
+    "items": {"type": "STRING"},
+}
+
+ARTICLE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "title": {"type": "STRING"},
+        "content": {"type": "STRING", "description": "HTML 內容 (h2, p, ul)，不含 markdown 標記"},
+        "difficulty": {"type": "INTEGER", "description": "1=新手, 2=進階, 3=專家"},
+    },
+    "required": ["title", "content", "difficulty"],
+    "propertyOrdering": ["title", "content", "difficulty"],
+}
+
+# 單次呼叫模式：titles 排在 articles 前面，回應被截斷時至少能救回題目
+BUNDLE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "titles": IDEA_SCHEMA,
+        "articles": {"type": "ARRAY", "items": ARTICLE_SCHEMA},
+    },
+    "required": ["titles", "articles"],
+    "propertyOrdering": ["titles", "articles"],
+}
+BUNDLE_MAX_OUTPUT_TOKENS = 8192
+
+MIN_CONTENT_CHARS = 200
+
+# prompt 只附上最相關的 k 個既有標題 + 一行摘要，長度不隨文章總數成長
+CONTEXT_TOP_K = 15
+
+REPAIR_PROMPT = """
+你上一次的輸出沒有通過檢查：{error}
+請只修正這個問題，其餘內容保持不變，並依照指定的 JSON 結構重新輸出。
+上一次的輸出：
+{output}
+"""
+
+
+def parse_json(text):
+    """先照規矩解析；失敗時再從 Markdown 圍欄或前後廢話中撈出 JSON 本體"""
+    try:
+        return json.loads(text, strict=False)
+    except json.JSONDecodeError:
+        pass
+    starts = [i for i in (text.find('['), text.find('{')) if i != -1]
+    if not starts:
+        raise ValueError("回傳內容不是 JSON")
+    start = min(starts)
+    end = text.rfind(']' if text[start] == '[' else '}')
+    try:
+        return json.loads(text[start:end + 1], strict=False)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON 解析失敗 ({e.msg}，第 {e.pos} 字元)")
+
+
+def validate_ideas(data):
+    if not isinstance(data, list):
+        raise ValueError("需要 JSON 字串陣列")
+    titles = [t.strip() for t in data if isinstance(t, str) and t.strip()]
+    if not titles:
+        raise ValueError("陣列中沒有任何標題")
+    return [t[:200] for t in titles]
+
+
+def validate_article(data):
+    if not isinstance(data, dict):
+        raise ValueError("需要 JSON 物件")
+    title = data.get('title')
+    content = data.get('content')
+    if not isinstance(title, str) or not title.strip():
+        raise ValueError("缺少 title")
+    if not isinstance(content, str) or len(content.strip()) < MIN_CONTENT_CHARS:
+        raise ValueError(f"content 為空或少於 {MIN_CONTENT_CHARS} 字")
+    if '<' not in content:
+        raise ValueError("content 不是 HTML (需要 h2 / p / ul 標籤)")
+
+    # 難度超出範圍不值得再花一次呼叫，直接就地修正
+    try:
+        difficulty = min(max(int(data.get('difficulty', 1)), 1), 3)
+    except (TypeError, ValueError):
+        difficulty = 1
+    return {'title': title.strip()[:200], 'content': content.strip(), 'difficulty': difficulty}
+
+
+_SEPARATORS = re.compile(r'[\s,]*')
+
+def _salvage_array(text, key):
+    """從被截斷的 JSON 中，逐一取出 "key": [...] 裡已經完整輸出的元素"""
+    match = re.search(rf'"{key}"\s*:\s*\[', text)
+    if not match:
+        return []
+    decoder = json.JSONDecoder(strict=False)
+    items, pos = [], match.end()
+    while True:
+        pos = _SEPARATORS.match(text, pos).end()
+        if pos >= len(text) or text[pos] == ']':
+            return items
+        try:
+            item, pos = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            return items
+        items.append(item)
+
+
+def parse_bundle(text):
+    """解析多篇合併回應，回傳 (titles, 通過驗證的文章)；被截斷時盡量救回完整的部分"""
+    try:
+        data = parse_json(text)
+    except ValueError:
+        data = {'titles': _salvage_array(text, 'titles'), 'articles': _salvage_array(text, 'articles')}
+    if not isinstance(data, dict):
+        return [], []
+
+    try:
+        titles = validate_ideas(data.get('titles'))
+    except ValueError:
+        titles = []
+    articles = []
+    for item in data.get('articles') or []:
+        try:
+            articles.append(validate_article(item))
+        except ValueError:
+            continue
+    return titles, articles
+
+
+class Checkpoint:
+    """
+    長跑進度檔 (JSON)：每完成一步就原子寫入，中斷後以 --resume 接續。
+    tools[工具 id] = {status: pending/running/done/failed, ideas: 尚未寫的題目, failed: 失敗的題目, error}
+    finished：整輪工具都跑過一次才設為 True；中斷的進度檔不會被新的執行蓋掉 (除非加 --force)
+    """
+    def __init__(self, path, topic, single_call):
+        self.path = path
+        self.data = {
+            'topic': topic,
+            'single_call': single_call,
+            'started_at': timezone.now().isoformat(),
+            'finished': False,
+            'tools': {},
+        }
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        checkpoint = cls(path, data['topic'], data.get('single_call', False))
+        checkpoint.data.update(data)
+        return checkpoint
+
+    def save(self):
+        self.data['updated_at'] = timezone.now().isoformat()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def tool(self, tool_id):
+        return self.data['tools'].setdefault(str(tool_id), {'status': 'pending', 'ideas': [], 'failed': [], 'error': ''})
+
+    def set_ideas(self, tool_id, ideas):
+        state = self.tool(tool_id)
+        state.update(status='running', ideas=list(ideas), error='')
+        self.save()
+
+    def finish_idea(self, tool_id, title, error=None):
+        state = self.tool(tool_id)
+        if title in state['ideas']:
+            state['ideas'].remove(title)
+        state['failed'] = [item for item in state['failed'] if item['title'] != title]
+        if error:
+            state['failed'].append({'title': title, 'error': error})
+        self.save()
+
+    def finish_tool(self, tool_id, error=None):
+        state = self.tool(tool_id)
+        if error:
+            state.update(status='failed', error=error)
+        elif not state['ideas']:
+            state.update(status='done', error='')
+        self.save()
+
+    def finish_run(self):
+        self.data['finished'] = True
+        self.save()
+
+    def unfinished(self):
+        """中途中斷，或還有已發想但未寫的題目"""
+        return not self.data.get('finished') or any(s['ideas'] for s in self.data['tools'].values())
+
+    def summary(self):
+        states = self.data['tools'].values()
+        done = sum(1 for s in states if s['status'] == 'done')
+        pending = sum(len(s['ideas']) for s in states)
+        failed_tools = sum(1 for s in states if s['status'] == 'failed')
+        failed_topics = sum(len(s['failed']) for s in states)
+        return f"已完成 {done} 個工具 ｜ 待寫 {pending} 篇 ｜ 失敗：工具 {failed_tools} 個、文章 {failed_topics} 篇"
+
 
 class Command(BaseCommand):
     help = '新手村自動寫手 (CLI 直連版 - 免安裝套件)'
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # calls：成功拿到回覆的生成次數；wasted：其中因格式不合而被丟掉的次數
+        self.stats = {'calls': 0, 'wasted': 0, 'repaired': 0}
+        self.last_finish_reason = None
+
     def add_arguments(self, parser):
         parser.add_argument('topic', type=str, help='工具名稱 (輸入 "ALL" 跑全部)')
+        parser.add_argument('--single-call', action='store_true',
+                            help='每個工具只呼叫一次：題目與 3 篇內文一起生成 (被截斷時自動改逐篇補寫)')
+        parser.add_argument('--checkpoint', default=str(settings.BASE_DIR / '.ai_writer_checkpoint.json'),
+                            help='進度檔路徑 (執行期間的狀態，已列入 .gitignore)')
+        parser.add_argument('--resume', action='store_true',
+                            help='從進度檔接續：跳過已完成的工具，已發想但未寫的題目直接撰寫')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='接續時一併重試失敗的工具與文章 (隱含 --resume)')
+        parser.add_argument('--force', action='store_true',
+                            help='不接續時，連尚未跑完的進度檔也直接覆蓋 (預設拒絕，以免蓋掉中斷的長跑進度)')
 
     # --- 🔧 核心工具：通用 API 呼叫函式 ---
-    def call_gemini(self, prompt, api_key):
+    def call_gemini(self, prompt, api_key, schema=None, max_output_tokens=None, timeout=30):
         # 優先使用 2.5 (最強)，備援 2.0
         matrix = ["gemini-2.5-flash", "gemini-2.0-flash", "gemini-flash-latest"]
+        call_id = new_call_id()
         
-        for model in matrix:
+        for attempt, model in enumerate(matrix, start=1):
+            started = time.perf_counter()
             try:
-                url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}"
+                url = rest_url(model, api_key)
                 headers = {'Content-Type': 'application/json'}
-                data = json.dumps({"contents": [{"parts": [{"text": prompt}]}]}).encode('utf-8')
+                payload = {"contents": [{"parts": [{"text": prompt}]}]}
+                config = {}
+                if schema:
+                    config.update(responseMimeType="application/json", responseSchema=schema)
+                if max_output_tokens:
+                    config["maxOutputTokens"] = max_output_tokens
+                if config:
+                    payload["generationConfig"] = config
+                data = json.dumps(payload).encode('utf-8')
                 
                 req = urllib.request.Request(url, data=data, headers=headers, method='POST')
-                with urllib.request.urlopen(req, timeout=30) as response:
+                with urllib.request.urlopen(req, timeout=timeout) as response:
                     if response.status == 200:
                         res_json = json.loads(response.read().decode('utf-8'))
                         try:
-                            text = res_json['candidates'][0]['content']['parts'][0]['text']
+                            candidate = res_json['candidates'][0]
+                            text = candidate['content']['parts'][0]['text']
+                            self.last_finish_reason = candidate.get('finishReason')
+                            record_llm_call('ai_writer_cli', model, started, call_id, attempt, usage=rest_usage(res_json))
+                            self.stats['calls'] += 1
                             # 清理 Markdown
                             if text.startswith("```"): 
                                 text = text.replace("```json", "").replace("```html", "").replace("```", "")
                             return text.strip()
-                        except KeyError:
+                        except KeyError as e:
+                            record_llm_call('ai_writer_cli', model, started, call_id, attempt, error=e)
                             print(f"⚠️ {model} 回傳內容格式錯誤 (KeyError)")
                             continue
 
             except urllib.error.HTTPError as e:
+                record_llm_call('ai_writer_cli', model, started, call_id, attempt, error=e)
                 # 👇 把錯誤原因印出來，方便除錯
                 print(f"❌ 連線失敗 [{model}]: HTTP {e.code} - {e.reason}")
                 if e.code == 400:
                     print("   (提示：可能是 API Key 無效，或 Key 沒有權限存取此模型)")
                 if e.code == 429:
-                    print(f"⚠️ API 塞車 (429)，休息 10 秒...")
+                    print("⚠️ API 塞車 (429)，休息 10 秒...")
                     time.sleep(10)
                 continue 
             except Exception as e:
+                record_llm_call('ai_writer_cli', model, started, call_id, attempt, error=e)
                 print(f"❌ 未知錯誤 [{model}]: {e}")
                 continue 
 
         return None # 全軍覆沒
 
+    # --- 🧾 結構化生成：解析 + 驗證，失敗時針對錯誤修復一次 ---
+    def generate_json(self, prompt, schema, validate, api_key):
+        text = self.call_gemini(prompt, api_key, schema=schema)
+        if text is None:
+            return None
+
+        try:
+            return validate(parse_json(text))
+        except ValueError as e:
+            print(f"🩹 格式檢查失敗：{e}，嘗試修復...")
+            self.stats['wasted'] += 1
+            repair_prompt = REPAIR_PROMPT.format(error=e, output=text)
+
+        repaired = self.call_gemini(repair_prompt, api_key, schema=schema)
+        if repaired is None:
+            return None
+        try:
+            data = validate(parse_json(repaired))
+            self.stats['repaired'] += 1
+            return data
+        except ValueError as e:
+            print(f"❌ 修復後仍不合格：{e}")
+            self.stats['wasted'] += 1
+            return None
+
+    # --- 📚 既有文章脈絡：相似度 top-k + 摘要 ---
+    def existing_context(self, tool):
+        titles = Article.objects.filter(related_tool=tool).order_by('-created_at').values_list('title', flat=True)
+        existing = TitleIndex(titles)
+        print(f"📊 已有文章：{len(existing)} 篇，正在發想新題目...")
+        if not len(existing):
+            return "目前還沒有任何文章。"
+
+        # 與工具本身最相關的標題最容易被「再寫一次」，優先列出；不足 k 個用最新的補齊
+        profile = f"{tool.name} {tool.category} {tool.description[:200]}"
+        picked = [title for _, title in existing.similar(profile, k=CONTEXT_TOP_K)]
+        for title in existing.titles:
+            if len(picked) >= CONTEXT_TOP_K:
+                break
+            if title not in picked:
+                picked.append(title)
+        return f"{existing.digest(exclude=[tool.name])}\n代表性標題：{picked}"
+
+    # --- ✍️ 逐篇模式：1 次發想 + 每篇 1 次 ---
+    def write_separate(self, tool, context, api_key):
+        idea_prompt = f"""
+        你是一個內容策略師。目標工具：{tool.name}。
+        我們已有的文章 (節錄)：
+        {context}
+        請發想 3 個「完全不同」的繁體中文教學標題，以 JSON 陣列回傳。
+        """
+
+        new_topics = self.generate_json(idea_prompt, IDEA_SCHEMA, validate_ideas, api_key)
+
+        if not new_topics:
+            print("💀 發想失敗，跳過此工具。")
+            return "發想失敗"
+        print(f"💡 AI 點子：{new_topics}")
+
+        self.checkpoint.set_ideas(tool.pk, new_topics)
+        self.write_pending(tool, api_key)
+
+    def write_pending(self, tool, api_key):
+        """寫完進度檔中這個工具還沒寫的題目 (題目已付過錢，不再重新發想)"""
+        for sub_topic in list(self.checkpoint.tool(tool.pk)['ideas']):
+            error = self.write_one(tool, sub_topic, api_key)
+            self.checkpoint.finish_idea(tool.pk, sub_topic, error)
+
+    def write_one(self, tool, sub_topic, api_key):
+        """回傳 None 代表完成 (含跳過重複)，否則回傳錯誤訊息"""
+        duplicate = self.title_index.near_duplicate(sub_topic)
+        if duplicate:
+            print(f"⏭️ 跳過重複：{sub_topic} (已有：{duplicate})")
+            return None
+
+        print(f"✍️ 正在撰寫：{sub_topic} ...")
+        write_prompt = f"""
+        請為「{tool.name}」寫一篇教學，主題：「{sub_topic}」。
+        要求：繁體中文、HTML 格式 (h2, p, ul)、不含 markdown 標記。
+        title 請使用「{sub_topic}」，difficulty 為 1~3。
+        """
+
+        data = self.generate_json(write_prompt, ARTICLE_SCHEMA, validate_article, api_key)
+        if not data:
+            print("❌ 生成內容失敗")
+            return "生成內容失敗"
+        return self.save_article(tool, data)
+
+    # --- 📦 單次呼叫模式：題目 + 全部內文一次生成，截斷或缺篇時改逐篇補寫 ---
+    def write_combined(self, tool, context, api_key):
+        bundle_prompt = f"""
+        你是一個內容策略師兼教學作者。目標工具：{tool.name}。
+        我們已有的文章 (節錄)：
+        {context}
+        請發想 3 個「完全不同」的繁體中文教學標題放在 titles，
+        再依相同順序為每個標題各寫一篇教學放在 articles (title 與 titles 一致)。
+        內文要求：繁體中文、HTML 格式 (h2, p, ul)、不含 markdown 標記，difficulty 為 1~3。
+        """
+
+        text = self.call_gemini(bundle_prompt, api_key, schema=BUNDLE_SCHEMA,
+                                max_output_tokens=BUNDLE_MAX_OUTPUT_TOKENS, timeout=120)
+        if text is None:
+            print("💀 生成失敗 (所有模型皆報錯)，跳過此工具。")
+            return "生成失敗"
+
+        titles, articles = parse_bundle(text)
+        if not titles and not articles:
+            self.stats['wasted'] += 1
+            print("🩹 合併回應無法使用，改回逐篇模式...")
+            return self.write_separate(tool, context, api_key)
+
+        if self.last_finish_reason == 'MAX_TOKENS':
+            print(f"⚠️ 回應被截斷：完整 {len(articles)}/{len(titles)} 篇，其餘改逐篇補寫")
+        print(f"💡 AI 點子：{titles}")
+
+        extra = [data['title'] for data in articles if data['title'] not in titles]
+        self.checkpoint.set_ideas(tool.pk, titles + extra)
+        for data in articles:
+            duplicate = self.title_index.near_duplicate(data['title'])
+            if duplicate:
+                print(f"⏭️ 跳過重複：{data['title']} (已有：{duplicate})")
+                error = None
+            else:
+                print(f"✍️ 收到內文：{data['title']}")
+                error = self.save_article(tool, data)
+            self.checkpoint.finish_idea(tool.pk, data['title'], error)
+
+        self.write_pending(tool, api_key)
+
+    def save_article(self, tool, data):
+        article = Article(
+            title=data['title'],
+            content=data['content'],
+            difficulty=data['difficulty'],
+            category=tool.category,
+            related_tool=tool,
+            author_id=1,
+            is_published=True
+        )
+        try:
+            # slug 若剛好被同時執行的發布搶走，重新配發一次即可，不必重寫文章
+            for attempt in range(3):
+                article.slug = allocate_slugs([article.title], Article)[0]
+                try:
+                    with transaction.atomic():
+                        article.save()
+                    break
+                except IntegrityError:
+                    if attempt == 2:
+                        raise
+            self.title_index.add(data['title'])
+            print("✅ 存檔成功！")
+            time.sleep(3)
+        except Exception as e:
+            self.stats['wasted'] += 1
+            print(f"💥 存檔失敗：{e}")
+            return f"存檔失敗：{e}"
+
+    # --- ♻️ 進度檔：--resume 讀回，否則重新建立 ---
+    def open_checkpoint(self, topic_input, kwargs):
+        path = kwargs['checkpoint']
+        if kwargs['resume'] or kwargs['retry_failed']:
+            if not os.path.exists(path):
+                raise CommandError(f"找不到進度檔：{path}")
+            checkpoint = Checkpoint.load(path)
+            if checkpoint.data['topic'] != topic_input:
+                raise CommandError(f"進度檔屬於「{checkpoint.data['topic']}」，與本次的「{topic_input}」不同")
+            print(f"♻️ 接續上次進度：{checkpoint.summary()}")
+            checkpoint.data['finished'] = False  # 這次接續中斷的話，下次仍要能接續
+            checkpoint.save()
+            return checkpoint
+
+        if os.path.exists(path):
+            try:
+                previous = Checkpoint.load(path)
+            except (OSError, ValueError, KeyError):
+                previous = None  # 壞掉的進度檔無從接續，直接覆蓋
+            if previous and previous.unfinished() and not kwargs['force']:
+                raise CommandError(
+                    f"進度檔 {path} 還沒跑完 (「{previous.data['topic']}」：{previous.summary()})；"
+                    f"要接續請加 --resume，確定放棄請加 --force，或用 --checkpoint 指定另一個檔案"
+                )
+            print(f"⚠️ 覆蓋舊的進度檔 {path} (要接續請加 --resume)")
+        checkpoint = Checkpoint(path, topic_input, kwargs['single_call'])
+        checkpoint.save()
+        return checkpoint
+
     def handle(self, *args, **kwargs):
         topic_input = kwargs['topic']
         
@@ -69,77 +501,61 @@ class Command(BaseCommand):
         # 顯示前幾碼確認
         print(f"🔑 目前使用的鑰匙：{MY_API_KEY[:10]}... (來自 settings.py)")
 
-        # 1. 篩選工具
+        # 1. 篩選工具 (固定順序，接續時才對得上)
         target_tools = Tool.objects.all() if topic_input == "ALL" else Tool.objects.filter(name__icontains=topic_input)
+        if topic_input != "ALL" and not target_tools.exists():
+            # 名稱找不到時改用名稱 + 別名比對 (例如輸入 "mj")
+            target_tools = Tool.objects.filter(pk__in=[t.pk for t in match_tools(topic_input)])
+        target_tools = target_tools.order_by('pk')
         
         if not target_tools.exists():
             self.stdout.write(self.style.ERROR(f"❌ 找不到工具：{topic_input}"))
             return
 
         print(f"🚀 啟動寫手！目標：{[t.name for t in target_tools]}")
+        self.checkpoint = self.open_checkpoint(topic_input, kwargs)
+        retry = kwargs['retry_failed']
+
+        # 全站標題索引：生成前先擋掉相同或高度相似的題目，省下整篇的生成費用
+        self.title_index = TitleIndex(Article.objects.values_list('title', flat=True))
 
         # 2. 開始巡迴
         for tool in target_tools:
-            print(f"\n🔥 正在處理：{tool.name}...")
-            
-            # --- 階段一：發想題目 ---
-            existing = Article.objects.filter(related_tool=tool).values_list('title', flat=True)
-            print(f"📊 已有文章：{len(existing)} 篇，正在發想新題目...")
-
-            idea_prompt = f"""
-            你是一個內容策略師。目標工具：{tool.name}。
-            我們已有：{list(existing)}。
-            請發想 3 個「完全不同」的繁體中文教學標題。
-            只回傳 JSON 陣列字串，不要有其他廢話。範例：["標題A", "標題B"]
-            """
-            
-            json_str = self.call_gemini(idea_prompt, MY_API_KEY)
-            
-            if not json_str:
-                print("💀 發想失敗 (所有模型皆報錯)，跳過此工具。")
-                continue
+            state = self.checkpoint.tool(tool.pk)
 
-            try:
-                # 加入 strict=False 以防發想階段也有換行符號問題
-                new_topics = json.loads(json_str, strict=False)
-                print(f"💡 AI 點子：{new_topics}")
-            except json.JSONDecodeError:
-                print(f"❌ JSON 解析失敗，AI 回傳了：{json_str[:50]}...")
+            if state['status'] == 'done' and not (retry and state['failed']):
+                print(f"⏩ {tool.name} 已完成，跳過")
+                continue
+            if state['status'] == 'failed' and not retry:
+                print(f"⏩ {tool.name} 上次失敗 ({state['error']})，跳過 (可加 --retry-failed 重試)")
                 continue
 
-            # --- 階段二：撰寫文章 ---
-            for sub_topic in new_topics:
-                if Article.objects.filter(title=sub_topic).exists():
-                    print(f"⏭️ 跳過重複：{sub_topic}")
-                    continue
+            print(f"\n🔥 正在處理：{tool.name}...")
 
-                print(f"✍️ 正在撰寫：{sub_topic} ...")
-                write_prompt = f"""
-                請為「{tool.name}」寫一篇教學，主題：「{sub_topic}」。
-                要求：繁體中文、HTML 格式 (h2, p, ul)、不含 markdown 標記。
-                回傳 JSON：{{ "title": "{sub_topic}", "content": "HTML內容", "difficulty": 1 }}
-                """
+            # 上次失敗的文章：題目已經有了，直接重寫
+            if retry:
+                for item in list(state['failed']):
+                    error = self.write_one(tool, item['title'], MY_API_KEY)
+                    self.checkpoint.finish_idea(tool.pk, item['title'], error)
 
-                article_json_str = self.call_gemini(write_prompt, MY_API_KEY)
-                
-                if article_json_str:
-                    try:
-                        # 🌟 關鍵修改：加入 strict=False 允許控制字元（如換行）
-                        data = json.loads(article_json_str, strict=False)
-                        
-                        Article.objects.create(
-                            title=data['title'],
-                            slug=slugify(data['title'], allow_unicode=True),
-                            content=data['content'],
-                            difficulty=data.get('difficulty', 1),
-                            category=tool.category,
-                            related_tool=tool,
-                            author_id=1,
-                            is_published=True
-                        )
-                        print(f"✅ 存檔成功！")
-                        time.sleep(3) 
-                    except Exception as e:
-                        print(f"💥 存檔或解析失敗：{e}")
+            if state['status'] == 'running':
+                print(f"📝 接續撰寫已發想的 {len(state['ideas'])} 個題目")
+                self.write_pending(tool, MY_API_KEY)
+                error = None
+            elif state['status'] in ('pending', 'failed'):
+                context = self.existing_context(tool)
+                if kwargs['single_call']:
+                    error = self.write_combined(tool, context, MY_API_KEY)
                 else:
-                    print("❌ 生成內容失敗")
\ No newline at end of file
+                    error = self.write_separate(tool, context, MY_API_KEY)
+            else:
+                error = None
+            self.checkpoint.finish_tool(tool.pk, error)
+        self.checkpoint.finish_run()
+
+        # 3. 成本報告：成功回傳、卻因格式不合被丟掉的呼叫比例
+        calls, wasted = self.stats['calls'], self.stats['wasted']
+        rate = wasted / calls * 100 if calls else 0.0
+        print(f"\n📡 共 {calls} 次生成呼叫 (平均每個工具 {calls / len(target_tools):.1f} 次)")
+        print(f"📉 浪費率：{wasted}/{calls} 次生成被丟棄 ({rate:.1f}%)，修復成功 {self.stats['repaired']} 次")
+        print(f"🗂️ 進度：{self.checkpoint.summary()}")
@@ -1,6 +1,7 @@
 import google.generativeai as genai
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from core.gemini import configure_genai
 
 class Command(BaseCommand):
     help = '查詢目前 API Key 可用的所有 Gemini 模型'
@@ -15,7 +16,7 @@ class Command(BaseCommand):
         self.stdout.write(f"🔑 使用鑰匙：{api_key[:10]}...")
 
         try:
-            genai.configure(api_key=api_key)
+            configure_genai(api_key)
             
             self.stdout.write("📡 正在連線 Google 查詢可用模型清單...\n")
             
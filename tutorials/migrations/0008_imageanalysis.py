@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-19 19:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0007_alter_article_slug'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to='image_analysis/', verbose_name='原始圖片')),
+                ('preview', models.ImageField(blank=True, null=True, upload_to='image_analysis/previews/', verbose_name='預覽縮圖')),
+                ('result_prompt', models.TextField(blank=True, verbose_name='AI 分析出的咒語')),
+                ('model_name', models.CharField(blank=True, max_length=100, verbose_name='使用模型')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='建立時間')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_analyses', to=settings.AUTH_USER_MODEL, verbose_name='使用者')),
+            ],
+            options={
+                'verbose_name': '圖片分析紀錄',
+                'verbose_name_plural': '圖片分析紀錄',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 19:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0010_article_trending_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='favorite_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='收藏人數'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='按讚人數'),
+        ),
+    ]
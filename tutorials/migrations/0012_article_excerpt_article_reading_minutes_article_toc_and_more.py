@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-19 19:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0011_article_favorite_count_article_like_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='純文字摘錄'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='reading_minutes',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='閱讀時間 (分鐘)'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='標題目錄'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='字數'),
+        ),
+    ]
@@ -1,14 +1,24 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from tools.models import Tool
+from . import related
 
 class Article(models.Model):
     title = models.CharField(max_length=200)
     # ⭐ 重點是加上 allow_unicode=True (允許萬國碼/中文)
     slug = models.SlugField(unique=True, allow_unicode=True, verbose_name="網址 Slug")
     content = models.TextField()
+    # 存檔時由 core/content_meta.py 算好，列表頁不必讀整份內文
+    excerpt = models.TextField(blank=True, editable=False, verbose_name="純文字摘錄")
+    word_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="字數")
+    reading_minutes = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="閱讀時間 (分鐘)")
+    toc = models.JSONField(default=list, blank=True, editable=False, verbose_name="標題目錄")
     
     views = models.PositiveIntegerField(default=0, verbose_name="瀏覽次數")
+    # 近期熱門分數 (每日瀏覽 / 收藏依時間衰減加總，由 refresh_trending 定時更新)
+    trending_score = models.FloatField(default=0, db_index=True, verbose_name="熱門分數")
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -20,6 +30,10 @@ class Article(models.Model):
     # 👇 2. 新增按讚功能 (新增這個!)
     likes = models.ManyToManyField(User, related_name='liked_articles', blank=True, verbose_name="按讚用戶")
 
+    # 收藏 / 按讚人數 (由 core/counters.py 隨異動維護，不必每次 COUNT)
+    favorite_count = models.PositiveIntegerField(default=0, verbose_name="收藏人數")
+    like_count = models.PositiveIntegerField(default=0, verbose_name="按讚人數")
+
     # 分類與難度
     difficulty = models.IntegerField(default=1, choices=[
         (1, '新手'), (2, '進階'), (3, '專家')
@@ -37,10 +51,10 @@ class Article(models.Model):
     
     # 👇 新增這兩個小幫手函式，方便模板呼叫
     def total_likes(self):
-        return self.likes.count()
+        return self.like_count
         
     def total_favorites(self):
-        return self.favorites.count()
+        return self.favorite_count
 
 class Prompt(models.Model):
     PROMPT_TYPES = [('TEXT', '文字生成'), ('IMAGE', '圖片生成')]
@@ -62,4 +76,65 @@ class Comment(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f'{self.author.username} on {self.article.title}'
\ No newline at end of file
+        return f'{self.author.username} on {self.article.title}'
+
+# ==========================================
+# 圖片逆向分析紀錄 (image_analysis 實驗室)
+# ==========================================
+class ImageAnalysis(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='image_analyses', verbose_name="使用者")
+    image = models.ImageField(upload_to='image_analysis/', verbose_name="原始圖片")
+    # 縮圖：頁面只載入這張，原圖僅供點擊下載
+    preview = models.ImageField(upload_to='image_analysis/previews/', blank=True, null=True, verbose_name="預覽縮圖")
+    result_prompt = models.TextField(blank=True, verbose_name="AI 分析出的咒語")
+    model_name = models.CharField(max_length=100, blank=True, verbose_name="使用模型")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="建立時間")
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "圖片分析紀錄"
+        verbose_name_plural = "圖片分析紀錄"
+
+    def __str__(self):
+        return f"Image Analysis #{self.id} - {self.created_at.strftime('%Y/%m/%d')}"
+
+# ==========================================
+# 相關文章索引 (TF-IDF，由 tutorials/related.py 維護)
+# ==========================================
+class ArticleTerm(models.Model):
+    """每篇已發布文章權重最高的詞彙 (已正規化)，當作倒排索引找相似文章"""
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='terms')
+    term = models.CharField(max_length=64, db_index=True)
+    weight = models.FloatField()
+
+    class Meta:
+        unique_together = ('article', 'term')
+
+
+class TermStat(models.Model):
+    """全站的文件頻率 (df) 快照，rebuild_related_articles 時重算；單篇存檔時只讀不寫"""
+    term = models.CharField(max_length=64, unique=True)
+    df = models.PositiveIntegerField()
+
+
+class RelatedArticle(models.Model):
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='related_from')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['article', 'rank']
+        unique_together = ('article', 'related')
+        indexes = [models.Index(fields=['article', 'rank'])]
+
+    def __str__(self):
+        return f"{self.article_id} → {self.related_id} ({self.score:.3f})"
+
+
+# 文章內容異動時 (commit 後) 增量更新相關文章；只更新瀏覽數的 save 不算
+@receiver(post_save, sender=Article)
+def update_related_articles(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and set(update_fields) <= {'views'}):
+        return
+    transaction.on_commit(lambda: related.safe_update(instance))
@@ -0,0 +1,194 @@
+"""
+相關文章 (TF-IDF 內容相似度，預先算好的 top-k 鄰居表)
+
+- 詞彙：英數字詞 + 中文 bigram (與全文檢索相同的切法)，標題加權，相關工具當成一個強特徵
+- 每篇文章只保留權重最高的 TOP_TERMS 個詞並正規化，存進 ArticleTerm 當倒排索引
+- 整批重建 (python manage.py rebuild_related_articles)：重算 df、所有向量，以稀疏矩陣乘法取 top-k
+- 單篇存檔：沿用 TermStat 的 df 快照算出新向量，用倒排索引找候選，
+  更新自己的鄰居，並把自己補進 (或移出) 受影響文章的鄰居清單
+
+文章頁只要查一次 RelatedArticle (article, rank) 索引即可。
+"""
+import math
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+from django.db import DatabaseError, transaction
+from django.utils.html import strip_tags
+
+from core.title_index import normalize, terms as title_terms
+
+TOP_K = 6
+TOP_TERMS = 40
+TITLE_WEIGHT = 3
+TOOL_WEIGHT = 5
+MIN_SCORE = 0.05
+MATRIX_CHUNK = 500
+
+_WORD_RE = re.compile(r'[a-z0-9][a-z0-9+#.]*|[㐀-鿿]+')
+
+
+# --- ✂️ 詞頻 ---
+def term_counts(title, content, related_tool_id=None):
+    counts = Counter()
+    for word in _WORD_RE.findall(normalize(strip_tags(content or ''))):
+        if word[0].isascii():
+            counts[word.rstrip('.')[:64]] += 1
+        else:
+            counts.update(word[i:i + 2] for i in range(len(word) - 1))
+    for term in title_terms(title):
+        counts[term[:64]] += TITLE_WEIGHT
+    if related_tool_id:
+        counts[f"tool:{related_tool_id}"] += TOOL_WEIGHT
+    return counts
+
+
+def idf(df, total):
+    return math.log((total + 1) / (df + 1)) + 1
+
+
+def vectorize(counts, df, total):
+    """回傳 {term: weight}：只留前 TOP_TERMS 個詞，L2 正規化"""
+    weights = {term: (1 + math.log(tf)) * idf(df.get(term, 1), total) for term, tf in counts.items()}
+    top = sorted(weights.items(), key=lambda item: -item[1])[:TOP_TERMS]
+    norm = math.sqrt(sum(w * w for _, w in top)) or 1.0
+    return {term: w / norm for term, w in top}
+
+
+def _article_counts(article):
+    return term_counts(article.title, article.content, article.related_tool_id)
+
+
+# --- 🧱 整批重建 ---
+def rebuild(batch_size=1000, top_k=TOP_K):
+    """重算 df、所有文章向量與 top-k 鄰居表；回傳 (文章數, 鄰居筆數)"""
+    from .models import Article, ArticleTerm, RelatedArticle, TermStat
+
+    ids, counts_list, df = [], [], Counter()
+    articles = Article.objects.filter(is_published=True).only('pk', 'title', 'content', 'related_tool_id')
+    for article in articles.iterator(chunk_size=batch_size):
+        counts = _article_counts(article)
+        ids.append(article.pk)
+        counts_list.append(counts)
+        df.update(counts.keys())
+    total = len(ids)
+    vectors = [vectorize(counts, df, total) for counts in counts_list]
+
+    # 稀疏矩陣 (文章 × 詞)，每列已正規化，X · Xᵀ 就是餘弦相似度
+    vocabulary = {}
+    rows, cols, values = [], [], []
+    for row, vector in enumerate(vectors):
+        for term, weight in vector.items():
+            rows.append(row)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+            values.append(weight)
+    links = []
+    if total > 1:
+        from scipy.sparse import csr_matrix
+        matrix = csr_matrix((values, (rows, cols)), shape=(total, len(vocabulary)), dtype=np.float32)
+        transposed = matrix.T.tocsr()
+        k = min(top_k, total - 1)
+        for start in range(0, total, MATRIX_CHUNK):
+            scores = (matrix[start:start + MATRIX_CHUNK] @ transposed).toarray()
+            for offset, row_scores in enumerate(scores):
+                row_scores[start + offset] = -1  # 排除自己
+                best = np.argpartition(-row_scores, k - 1)[:k]
+                best = best[np.argsort(-row_scores[best])]
+                rank = 0
+                for col in best:
+                    if row_scores[col] < MIN_SCORE:
+                        break
+                    links.append(RelatedArticle(article_id=ids[start + offset], related_id=ids[col],
+                                                score=float(row_scores[col]), rank=rank))
+                    rank += 1
+
+    with transaction.atomic():
+        TermStat.objects.all().delete()
+        TermStat.objects.bulk_create((TermStat(term=term, df=count) for term, count in df.items()), batch_size=batch_size)
+        ArticleTerm.objects.all().delete()
+        ArticleTerm.objects.bulk_create(
+            (ArticleTerm(article_id=pk, term=term, weight=weight) for pk, vector in zip(ids, vectors) for term, weight in vector.items()),
+            batch_size=batch_size,
+        )
+        RelatedArticle.objects.all().delete()
+        RelatedArticle.objects.bulk_create(links, batch_size=batch_size)
+    return total, len(links)
+
+
+# --- 🔁 單篇增量更新 ---
+def _write_neighbours(article_id, scored, top_k=TOP_K):
+    """scored: {related_id: score}；整組換掉這篇文章的鄰居清單"""
+    from .models import RelatedArticle
+
+    best = sorted(((score, pk) for pk, score in scored.items() if score >= MIN_SCORE and pk != article_id), reverse=True)[:top_k]
+    RelatedArticle.objects.filter(article_id=article_id).delete()
+    RelatedArticle.objects.bulk_create([
+        RelatedArticle(article_id=article_id, related_id=pk, score=score, rank=rank)
+        for rank, (score, pk) in enumerate(best)
+    ])
+
+
+def _patch_neighbour_lists(article_id, scores, top_k=TOP_K):
+    """把 article_id 以新分數放進 (或移出) 候選文章與原本就列它為鄰居的文章清單"""
+    from .models import RelatedArticle
+
+    affected = set(pk for pk, score in scores.items() if score >= MIN_SCORE)
+    affected |= set(RelatedArticle.objects.filter(related_id=article_id).values_list('article_id', flat=True))
+    affected.discard(article_id)
+    if not affected:
+        return
+
+    current = defaultdict(dict)
+    for owner, related, score in RelatedArticle.objects.filter(article_id__in=affected).values_list('article_id', 'related_id', 'score'):
+        current[owner][related] = score
+    for owner in affected:
+        neighbours = dict(current[owner])
+        neighbours.pop(article_id, None)
+        if scores.get(owner, 0) >= MIN_SCORE:
+            neighbours[article_id] = scores[owner]
+        before = sorted(current[owner].items(), key=lambda item: -item[1])[:top_k]
+        after = sorted(neighbours.items(), key=lambda item: -item[1])[:top_k]
+        if before != after:
+            _write_neighbours(owner, dict(after), top_k)
+
+
+def remove_article(article_id):
+    from .models import ArticleTerm, RelatedArticle
+
+    with transaction.atomic():
+        ArticleTerm.objects.filter(article_id=article_id).delete()
+        RelatedArticle.objects.filter(article_id=article_id).delete()
+        RelatedArticle.objects.filter(related_id=article_id).delete()
+
+
+def update_article(article):
+    """文章存檔後呼叫：草稿直接移出索引，已發布的重算向量與鄰居"""
+    from .models import Article, ArticleTerm, TermStat
+
+    if not article.is_published:
+        return remove_article(article.pk)
+
+    counts = _article_counts(article)
+    df = dict(TermStat.objects.filter(term__in=list(counts)).values_list('term', 'df'))
+    total = max(Article.objects.filter(is_published=True).count(), 1)
+    vector = vectorize(counts, df, total)
+
+    scores = defaultdict(float)
+    postings = ArticleTerm.objects.filter(term__in=list(vector)).exclude(article_id=article.pk)
+    for other, term, weight in postings.values_list('article_id', 'term', 'weight'):
+        scores[other] += vector[term] * weight
+
+    with transaction.atomic():
+        ArticleTerm.objects.filter(article_id=article.pk).delete()
+        ArticleTerm.objects.bulk_create([ArticleTerm(article_id=article.pk, term=term, weight=weight) for term, weight in vector.items()])
+        _write_neighbours(article.pk, scores)
+        _patch_neighbour_lists(article.pk, scores)
+
+
+def safe_update(article):
+    """給 signal 用：索引更新失敗不應讓文章存檔失敗 (之後 rebuild_related_articles 即可補齊)"""
+    try:
+        update_article(article)
+    except DatabaseError as e:
+        print(f"⚠️ 相關文章索引更新失敗 (article #{article.pk})：{e}")
@@ -1,3 +1,139 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.query_budget import QueryBudgetExceeded, query_budget
+from tools.models import Tool
+from tutorials.management.commands.ai_writer import MIN_CONTENT_CHARS, Checkpoint, Command, _salvage_array, parse_bundle
+from tutorials.models import Article, ImageAnalysis
+
+
+def article(title, difficulty=2):
+    return {'title': title, 'content': '<p>' + '內容' * MIN_CONTENT_CHARS + '</p>', 'difficulty': difficulty}
+
+
+# --- ✂️ 截斷回應的救援 ---
+class ParseBundleTests(SimpleTestCase):
+    def setUp(self):
+        self.full = json.dumps({
+            'titles': ['Notion 入門', 'Notion 資料庫'],
+            'articles': [article('Notion 入門'), article('Notion 資料庫')],
+        }, ensure_ascii=False)
+
+    def test_complete_response(self):
+        titles, articles = parse_bundle(self.full)
+        self.assertEqual(titles, ['Notion 入門', 'Notion 資料庫'])
+        self.assertEqual([a['title'] for a in articles], ['Notion 入門', 'Notion 資料庫'])
+
+    def test_truncated_article_is_dropped(self):
+        # 截在第二篇文章的 content 中間
+        text = self.full[:self.full.rindex('內容')]
+        titles, articles = parse_bundle(text)
+        self.assertEqual(titles, ['Notion 入門', 'Notion 資料庫'])
+        self.assertEqual([a['title'] for a in articles], ['Notion 入門'])
+
+    def test_truncated_inside_titles(self):
+        text = '{"titles": ["Notion 入門", "Notion 資'
+        self.assertEqual(parse_bundle(text), (['Notion 入門'], []))
+
+    def test_salvage_without_key(self):
+        self.assertEqual(_salvage_array('{"ideas": [', 'titles'), [])
+
+    def test_invalid_articles_are_skipped(self):
+        text = json.dumps({'titles': [], 'articles': [
+            {'title': '太短', 'content': '<p>短</p>'},
+            {'title': '不是 HTML', 'content': '純文字' * MIN_CONTENT_CHARS},
+            article('難度超出範圍', difficulty=9),
+        ]}, ensure_ascii=False)
+        titles, articles = parse_bundle(text)
+        self.assertEqual(titles, [])
+        self.assertEqual([(a['title'], a['difficulty']) for a in articles], [('難度超出範圍', 3)])
+
+
+# --- ♻️ 寫手進度檔 ---
+class CheckpointOverwriteTests(SimpleTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, 'checkpoint.json')
+
+    def open(self, topic, **options):
+        kwargs = {'checkpoint': self.path, 'resume': False, 'retry_failed': False, 'force': False, 'single_call': False}
+        kwargs.update(options)
+        return Command().open_checkpoint(topic, kwargs)
+
+    def test_interrupted_run_is_not_overwritten(self):
+        self.open('ALL').set_ideas(1, ['Notion 入門'])
+        with self.assertRaisesMessage(CommandError, '--force'):
+            self.open('Notion')
+        self.assertEqual(Checkpoint.load(self.path).data['topic'], 'ALL')
+
+    def test_force_overwrites(self):
+        self.open('ALL')
+        self.assertEqual(self.open('Notion', force=True).data['topic'], 'Notion')
+
+    def test_finished_run_is_overwritten(self):
+        self.open('ALL').finish_run()
+        self.assertEqual(self.open('Notion').data['topic'], 'Notion')
+
+    def test_resume_clears_finished_flag(self):
+        self.open('ALL').finish_run()
+        self.open('ALL', resume=True)
+        self.assertTrue(Checkpoint.load(self.path).unfinished())
+
+
+# --- 🧮 文章列表查詢預算 ---
+class ArticleListQueryBudgetTests(TestCase):
+    def setUp(self):
+        # 每篇文章各有不同作者與工具：卡片若逐筆查關聯，就會出現重複的查詢形狀
+        for i in range(5):
+            Article.objects.create(
+                title=f'教學 {i}', slug=f'article-{i}', content='<p>內容</p>', is_published=True,
+                author=User.objects.create_user(f'writer{i}'),
+                related_tool=Tool.objects.create(name=f'工具 {i}', slug=f'tool-{i}', description='說明'),
+            )
+        # 登入後不走整頁快取，量到的是 view 與模板真正的查詢
+        self.client.force_login(User.objects.create_user('reader'))
+
+    def test_article_list_within_budget(self):
+        with query_budget('article_list') as recorder:
+            response = self.client.get(reverse('article_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(recorder.queries), 0)
+
+    def test_n_plus_one_is_reported(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'N+1'):
+            with query_budget(budget=100):
+                for article in Article.objects.all():
+                    article.author.username
+
+
+# --- 🖼️ 圖片分析：縮圖失敗仍保留結果 ---
+class ImageAnalysisPreviewTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.enterContext(mock.patch('tutorials.views.configure_genai'))
+        model = self.enterContext(mock.patch('tutorials.views.genai.GenerativeModel'))
+        model.return_value.generate_content.return_value = mock.Mock(text='cyberpunk city, neon lights', usage_metadata=None)
+        self.client.force_login(User.objects.create_user('alice'))
+
+    def test_undecodable_image_keeps_analysis_without_preview(self):
+        upload = SimpleUploadedFile('photo.jpg', b'not really a jpeg', content_type='image/jpeg')
+        response = self.client.post(reverse('image_analysis'), {'upload_image': upload})
+
+        analysis = ImageAnalysis.objects.get()
+        self.assertRedirects(response, reverse('image_analysis_detail', args=[analysis.pk]), fetch_redirect_response=False)
+        self.assertEqual(analysis.result_prompt, 'cyberpunk city, neon lights')
+        self.assertFalse(analysis.preview)
+
+        response = self.client.get(reverse('image_analysis_detail', args=[analysis.pk]))
+        self.assertEqual(response.context['image_url'], analysis.image.url)
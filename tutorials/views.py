@@ -1,9 +1,13 @@
-import base64
+import io
+import os
 import time  # 時間控制模組
+import PIL.Image
+import PIL.ImageOps
+from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
-from django.conf import settings
 import google.generativeai as genai
 from django.shortcuts import render, get_object_or_404, redirect
+from django.http import JsonResponse
 # 👇 確認引入 login_required
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
@@ -12,28 +16,46 @@ from django.db.models import Q
 from django.contrib import messages 
 
 # 引入模型
-from .models import Article, Comment
+from .models import Article, Comment, ImageAnalysis, Prompt
+from core.gemini import configure_genai
+from core import conditional, counters, page_cache, search, view_counter
+from core.llm_ledger import new_call_id, record_llm_call, sdk_usage
+
+# 預覽縮圖的最長邊 (px)
+PREVIEW_MAX_SIZE = 800
+# 文章列表每頁幾篇 (靜態輸出也依這個分頁)
+ARTICLES_PER_PAGE = 9
 
 # ==========================================
 # 1. 文章列表 (確保僅顯示已發布文章)
 # ==========================================
+@page_cache.cache_public_page('articles')
 def article_list(request):
-    articles_all = Article.objects.filter(is_published=True).order_by('-created_at')
+    # 卡片會顯示作者頭像與相關工具，一併 JOIN 進來避免每張卡片各查一次；摘錄已預先算好，不讀內文
+    articles_all = Article.objects.filter(is_published=True).select_related('author__profile', 'related_tool').defer('content').order_by('-created_at')
     
     query = request.GET.get('q') 
     if query:
-        articles_all = articles_all.filter(
+        # 有全文索引就依相關度排序，否則退回 icontains
+        ranked = search.rank_queryset(articles_all, 'article', query)
+        articles_all = ranked if ranked is not None else articles_all.filter(
             Q(title__icontains=query) | 
             Q(content__icontains=query)
         )
     
-    paginator = Paginator(articles_all, 9) 
+    # sort=trending：本週熱門 (已建索引的 trending_score)
+    sort = request.GET.get('sort')
+    if sort == 'trending' and not query:
+        articles_all = articles_all.order_by('-trending_score', '-views')
+
+    paginator = Paginator(articles_all, ARTICLES_PER_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
     context = {
         'articles': page_obj,
         'query': query, 
+        'sort': sort,
     }
     
     return render(request, 'tutorials/article_list.html', context)
@@ -42,20 +64,50 @@ def article_list(request):
 # ==========================================
 # 2. 文章詳情 (確保 HTML 渲染與計數正常)
 # ==========================================
+def article_versions(request, slug):
+    """文章本身 + 提示詞、相關文章、關聯工具 (conditional GET 用)"""
+    article = Article.objects.filter(slug=slug, is_published=True).values('pk', 'updated_at', 'related_tool__updated_at').first()
+    if article is None:
+        return None
+    # 提示詞在後台以 inline 編輯，存檔時文章的 updated_at 也會更新；這裡再補上新增 / 刪除
+    prompts = conditional.versions(Prompt.objects.filter(article_id=article['pk']), 'pk')
+    published = Article.objects.filter(is_published=True)
+    related = conditional.versions(published.filter(related_from__article_id=article['pk']), 'updated_at')
+    if not related[0]:
+        # 還沒有相關文章索引時頁面顯示最新文章
+        related = conditional.versions(published, 'updated_at')
+    parts = [article['updated_at'], article['related_tool__updated_at'], prompts, related]
+    if request.user.is_authenticated:
+        parts += [
+            counters.has_link('tutorials.Article', 'likes', article['pk'], request.user.pk),
+            counters.has_link('tutorials.Article', 'favorites', article['pk'], request.user.pk),
+        ]
+    return article['pk'], parts, conditional.latest(article['updated_at'], article['related_tool__updated_at'], related[1])
+
+
+@conditional.conditional_detail('article', article_versions)
 def article_detail(request, slug):
     article = get_object_or_404(Article, slug=slug, is_published=True)
     
-    article.views += 1
-    article.save()
+    # 瀏覽次數先附加到緩衝檔，由背景執行緒批次寫回 (見 core/view_counter.py)
+    article.views += view_counter.record_view('article', article.pk)
 
     prompts = article.prompts.all()
     
-    related_articles = Article.objects.filter(is_published=True).exclude(id=article.id).order_by('-created_at')[:3]
+    # 預先算好的內容相似鄰居 (RelatedArticle)；索引還沒建立時退回最新文章
+    related_articles = list(
+        Article.objects.filter(is_published=True, related_from__article=article)
+        .order_by('related_from__rank').only('title', 'slug')[:3]
+    )
+    if not related_articles:
+        related_articles = Article.objects.filter(is_published=True).exclude(id=article.id).order_by('-created_at')[:3]
 
     context = {
         'article': article,
         'prompts': prompts,
         'related_articles': related_articles,
+        'is_liked': request.user.is_authenticated and counters.has_link('tutorials.Article', 'likes', article.pk, request.user.pk),
+        'is_favorited': request.user.is_authenticated and counters.has_link('tutorials.Article', 'favorites', article.pk, request.user.pk),
     }
     
     return render(request, 'tutorials/article_detail.html', context)
@@ -82,19 +134,20 @@ def add_article_comment(request, slug):
 
 
 # ==========================================
-# 4. 文章收藏功能
+# 4. 文章收藏功能 (前端以 fetch 呼叫時回傳 JSON，不重新載入頁面)
 # ==========================================
 @login_required
+@require_POST
 def article_favorite(request, slug):
     article = get_object_or_404(Article, slug=slug)
-    
-    if request.user in article.favorites.all():
-        article.favorites.remove(request.user)
-        messages.info(request, '已從收藏中移除')
-    else:
-        article.favorites.add(request.user)
+    active, count = counters.toggle(article, 'favorites', request.user)
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({'active': active, 'count': count})
+
+    if active:
         messages.success(request, '已加入收藏！')
-        
+    else:
+        messages.info(request, '已從收藏中移除')
     return redirect('article_detail', slug=slug)
 
 
@@ -102,21 +155,29 @@ def article_favorite(request, slug):
 # 5. 文章按讚功能
 # ==========================================
 @login_required
+@require_POST
 def article_like(request, slug):
     article = get_object_or_404(Article, slug=slug)
-    
-    if request.user in article.likes.all():
-        article.likes.remove(request.user)
-    else:
-        article.likes.add(request.user)
+    active, count = counters.toggle(article, 'likes', request.user)
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({'active': active, 'count': count})
+
+    if active:
         messages.success(request, '感謝您的點讚！')
-        
     return redirect('article_detail', slug=slug)
 
 
 # ==========================================
 # 6. 實驗室功能：逆向工程引擎 (Image to Prompt)
 # ==========================================
+def make_preview(img_data, max_size=PREVIEW_MAX_SIZE):
+    """把上傳原圖縮成 JPEG 預覽圖 (修正手機 EXIF 旋轉)，回傳 ContentFile"""
+    img = PIL.ImageOps.exif_transpose(PIL.Image.open(io.BytesIO(img_data)))
+    img.thumbnail((max_size, max_size))
+    buffer = io.BytesIO()
+    img.convert('RGB').save(buffer, format='JPEG', quality=82, optimize=True)
+    return ContentFile(buffer.getvalue())
+
 # 👇 修改點：加上 @login_required，保護您的 API 額度
 @login_required
 def image_analysis(request):
@@ -124,6 +185,7 @@ def image_analysis(request):
 
     result_prompt = None
     image_url = None
+    used_model = None
 
     if request.method == 'POST' and request.FILES.get('upload_image'):
         print("📸 [Debug] 偵測到 POST 請求與圖片上傳")
@@ -133,7 +195,7 @@ def image_analysis(request):
             img_file = request.FILES['upload_image']
             
             # 2. 設定 API Key
-            genai.configure(api_key=settings.GEMINI_API_KEY)
+            configure_genai()
             
             # 3. 讀取圖片數據
             img_data = img_file.read()
@@ -170,8 +232,10 @@ def image_analysis(request):
             """
 
             # 迴圈嘗試所有模型
-            for model_name in candidate_models:
+            call_id = new_call_id()
+            for attempt, model_name in enumerate(candidate_models, start=1):
                 print(f"🚀 [Debug] 正在嘗試模型：{model_name}...")
+                started = time.perf_counter()
                 try:
                     model = genai.GenerativeModel(model_name)
                     
@@ -181,10 +245,13 @@ def image_analysis(request):
                     ])
                     
                     result_prompt = response.text
+                    used_model = model_name
+                    record_llm_call('image_analysis', model_name, started, call_id, attempt, usage=sdk_usage(response))
                     print(f"✅ [Debug] {model_name} 分析成功！")
                     break 
 
                 except Exception as inner_e:
+                    record_llm_call('image_analysis', model_name, started, call_id, attempt, error=inner_e)
                     error_msg = str(inner_e)
                     print(f"⚠️ [Debug] {model_name} 失敗: {error_msg}")
                     
@@ -198,9 +265,17 @@ def image_analysis(request):
             if not result_prompt:
                 raise Exception("所有可用模型的額度皆已耗盡 (Daily Quota Exceeded)。請明天再來，或嘗試升級 API Key。")
 
-            # 轉成 base64 以在前端顯示
-            b64_img = base64.b64encode(img_data).decode('utf-8')
-            image_url = f"data:{img_file.content_type};base64,{b64_img}"
+            # 存下原圖與縮圖 (不再把整張圖 base64 塞進 HTML)，導向可重複讀取的結果頁
+            stem = os.path.splitext(os.path.basename(img_file.name))[0]
+            analysis = ImageAnalysis(user=request.user, result_prompt=result_prompt, model_name=used_model)
+            analysis.image.save(img_file.name, ContentFile(img_data), save=False)
+            # 分析已經付費成功：縮圖失敗 (格式無法解碼、檔案截斷) 就不存縮圖，結果頁改顯示原圖
+            try:
+                analysis.preview.save(f"{stem}_preview.jpg", make_preview(img_data), save=False)
+            except (OSError, ValueError, PIL.Image.DecompressionBombError) as preview_e:
+                print(f"⚠️ [Debug] 縮圖失敗，改用原圖：{preview_e}")
+            analysis.save()
+            return redirect('image_analysis_detail', pk=analysis.pk)
 
         except Exception as e:
             print(f"❌ [Debug] 最終錯誤: {e}")
@@ -209,4 +284,15 @@ def image_analysis(request):
     return render(request, 'tutorials/lab_image_analysis.html', {
         'result_prompt': result_prompt,
         'image_url': image_url
+    })
+
+
+@login_required
+def image_analysis_detail(request, pk):
+    # 只能查看自己的分析紀錄
+    analysis = get_object_or_404(ImageAnalysis, pk=pk, user=request.user)
+    return render(request, 'tutorials/lab_image_analysis.html', {
+        'analysis': analysis,
+        'result_prompt': analysis.result_prompt,
+        'image_url': analysis.preview.url if analysis.preview else analysis.image.url,
     })
\ No newline at end of file